@@ -0,0 +1,273 @@
+"""
+Local stand-ins for the provider APIs, for offline benchmarks.
+
+Each server speaks just enough of a provider's HTTP protocol for the official
+SDK to list models and stream a chat completion. Answers are made of
+`tokens` fake tokens sent `latency` seconds after the request, at
+`token_rate` tokens per second (0 for as fast as possible).
+
+Usage (standalone, for manual testing):
+    python bench/fake_servers.py openai --port 8081 --token-rate 50
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROTOCOLS = ["openai", "anthropic", "mistral", "gemini", "ollama"]
+
+# Words the fake answers are made of, with some Markdown to render
+ANSWER_WORDS = ["The", " **quick**", " brown", " fox", " jumps", " over", " the", " `lazy`", " dog", ".\n\n"]
+
+
+class FakeConfig:
+    """Behaviour of a fake server"""
+
+    def __init__(self, models=("bench-model",), tokens=200, token_rate=0.0, latency=0.0):
+        self.models = list(models)
+        self.tokens = tokens
+        self.token_rate = token_rate
+        self.latency = latency
+
+    def answer_tokens(self):
+        """Yield the answer's tokens, paced like a real model"""
+        time.sleep(self.latency)
+        interval = 1.0 / self.token_rate if self.token_rate else 0
+        for i in range(self.tokens):
+            if interval:
+                time.sleep(interval)
+            yield ANSWER_WORDS[i % len(ANSWER_WORDS)]
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = FakeConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading the answer (interrupted stream)
+            pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def write_event(self, payload, event=None):
+        prefix = f"event: {event}\n" if event else ""
+        self.write_chunk(f"{prefix}data: {json.dumps(payload)}\n\n".encode())
+
+    def unknown_model(self, model):
+        self.send_json({"error": {"message": f"model '{model}' not found", "code": 404}}, status=404)
+
+
+class OpenAIHandler(FakeHandler):
+    """OpenAI chat completions (also used by DeepSeek and Mistral)"""
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json({"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "bench"}
+                for model in self.config.models
+            ]})
+        else:
+            self.send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        request = self.read_json()
+        if request.get("model") not in self.config.models:
+            return self.unknown_model(request.get("model"))
+        self.start_stream("text/event-stream")
+        for token in self.config.answer_tokens():
+            self.write_event({
+                "id": "bench", "object": "chat.completion.chunk", "created": 0, "model": request["model"],
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": token}, "finish_reason": None}],
+            })
+        self.write_event({
+            "id": "bench", "object": "chat.completion.chunk", "created": 0, "model": request["model"],
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        })
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.end_stream()
+
+
+class MistralHandler(OpenAIHandler):
+    """Mistral speaks the OpenAI streaming format, its model entries carry capabilities"""
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.send_json({"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "bench", "type": "base",
+                 "capabilities": {"completion_chat": True, "completion_fim": False,
+                                  "function_calling": False, "fine_tuning": False, "vision": False}}
+                for model in self.config.models
+            ]})
+        else:
+            super().do_GET()
+
+
+class AnthropicHandler(FakeHandler):
+    """Anthropic messages API"""
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/").endswith("/models"):
+            data = [{"id": model, "type": "model", "display_name": model, "created_at": "2025-01-01T00:00:00Z"}
+                    for model in self.config.models]
+            self.send_json({"data": data, "has_more": False,
+                            "first_id": data[0]["id"] if data else None,
+                            "last_id": data[-1]["id"] if data else None})
+        else:
+            self.send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        request = self.read_json()
+        model = request.get("model")
+        if model not in self.config.models:
+            return self.unknown_model(model)
+        self.start_stream("text/event-stream")
+        self.write_event({"type": "message_start", "message": {
+            "id": "bench", "type": "message", "role": "assistant", "model": model, "content": [],
+            "stop_reason": None, "stop_sequence": None, "usage": {"input_tokens": 1, "output_tokens": 0}}},
+            event="message_start")
+        self.write_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                         event="content_block_start")
+        count = 0
+        for token in self.config.answer_tokens():
+            count += 1
+            self.write_event({"type": "content_block_delta", "index": 0,
+                              "delta": {"type": "text_delta", "text": token}}, event="content_block_delta")
+        self.write_event({"type": "content_block_stop", "index": 0}, event="content_block_stop")
+        self.write_event({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                          "usage": {"output_tokens": count}}, event="message_delta")
+        self.write_event({"type": "message_stop"}, event="message_stop")
+        self.end_stream()
+
+
+class GeminiHandler(FakeHandler):
+    """Gemini generateContent API"""
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/").endswith("/models"):
+            self.send_json({"models": [{"name": f"models/{model}"} for model in self.config.models]})
+        else:
+            self.send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        self.read_json()
+        # /v1beta/models/<model>:streamGenerateContent?alt=sse
+        model = self.path.split("?")[0].rsplit("/", 1)[-1].split(":")[0]
+        if model not in self.config.models:
+            return self.unknown_model(model)
+        self.start_stream("text/event-stream")
+        for token in self.config.answer_tokens():
+            self.write_event({"candidates": [{"content": {"role": "model", "parts": [{"text": token}]}, "index": 0}]})
+        self.write_event({"candidates": [{"content": {"role": "model", "parts": [{"text": ""}]},
+                                          "finishReason": "STOP", "index": 0}]})
+        self.end_stream()
+
+
+class OllamaHandler(FakeHandler):
+    """Ollama native API (newline-delimited JSON streams)"""
+
+    def do_GET(self):
+        if self.path.startswith("/api/tags"):
+            self.send_json({"models": [
+                {"name": model, "model": model, "modified_at": "2025-01-01T00:00:00Z", "size": 1,
+                 "digest": "0" * 64, "details": {}}
+                for model in self.config.models
+            ]})
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        request = self.read_json()
+        model = request.get("model")
+        if model not in self.config.models:
+            return self.send_json({"error": f"model '{model}' not found"}, status=404)
+        if request.get("stream") is False:
+            # Without messages or prompt, as sent to preload a model (llm warm)
+            return self.send_json({"model": model, "created_at": "2025-01-01T00:00:00Z", "response": "",
+                                   "done": True, "done_reason": "load"})
+        self.start_stream("application/x-ndjson")
+        for token in self.config.answer_tokens():
+            self.write_chunk((json.dumps({"model": model, "created_at": "2025-01-01T00:00:00Z",
+                                          "message": {"role": "assistant", "content": token},
+                                          "done": False}) + "\n").encode())
+        self.write_chunk((json.dumps({"model": model, "created_at": "2025-01-01T00:00:00Z",
+                                      "message": {"role": "assistant", "content": ""},
+                                      "done": True, "done_reason": "stop"}) + "\n").encode())
+        self.end_stream()
+
+
+HANDLERS = {
+    "openai": OpenAIHandler,
+    "anthropic": AnthropicHandler,
+    "mistral": MistralHandler,
+    "gemini": GeminiHandler,
+    "ollama": OllamaHandler,
+}
+
+
+def start_server(protocol, config, port=0):
+    """
+    Start a fake server in a background thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server, `server.server_address` has its port
+    """
+    handler = type(f"{protocol.title()}BenchHandler", (HANDLERS[protocol],), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake provider server")
+    parser.add_argument("protocol", choices=PROTOCOLS)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tokens", type=int, default=200, help="tokens per answer")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="tokens per second (0: unlimited)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--models", type=int, default=1, help="number of models to list")
+    options = parser.parse_args()
+
+    models = ["bench-model"] + [f"bench-model-{i}" for i in range(1, options.models)]
+    config = FakeConfig(models, options.tokens, options.token_rate, options.latency)
+    server = start_server(options.protocol, config, options.port)
+    print(f"Fake {options.protocol} server on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of every provider backend.
+
+Starts the fake servers of bench/fake_servers.py and points each backend of
+srcs/files/llm_*.py at them through <PROVIDER>_BASE_URL / OLLAMA_ADDR, with a
+throwaway HOME so the user's configuration and caches are left alone. For
+each backend it measures, in fresh processes:
+
+- cold_start_ms: wall time of `llm run provider/model "prompt" --raw`
+- sdk_import_ms: time to load the provider and its SDK
+- discovery_ms: time to list the provider's models
+- first_token_ms: time from sending the request to the first token on screen
+- tokens_per_s: tokens rendered per second once the answer streams
+- peak_memory_mb: peak resident memory of the process rendering the answer
+
+Timings are medians over --runs runs. Results are printed as JSON.
+
+Usage:
+    python bench/run_benchmarks.py [--runs 3] [--tokens 500] [--output results.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRCS_DIR = os.path.join(ROOT_DIR, 'srcs')
+MAIN_PY = os.path.join(SRCS_DIR, 'main.py')
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_servers import FakeConfig, start_server  # noqa: E402
+
+# Backend -> protocol of the fake server it talks to
+BACKENDS = {
+    "openai": "openai",
+    "deepseek": "openai",
+    "anthropic": "anthropic",
+    "mistral": "mistral",
+    "gemini": "gemini",
+    "ollama": "ollama",
+}
+
+BENCH_MODEL = "bench-model"
+BENCH_PROMPT = "Write a short story about a fox."
+
+
+def server_env(backend, url):
+    """Environment variables pointing a backend at its fake server"""
+    if backend == "ollama":
+        return {"OLLAMA_ADDR": url}
+    # The OpenAI SDK expects the /v1 prefix in the base URL, the others add it
+    base_url = f"{url}/v1" if BACKENDS[backend] == "openai" else url
+    return {f"{backend.upper()}_API_KEY": "bench", f"{backend.upper()}_BASE_URL": base_url}
+
+
+def bench_model_name(backend):
+    # Gemini lists its models as "models/<name>"
+    return f"models/{BENCH_MODEL}" if backend == "gemini" else BENCH_MODEL
+
+
+def child(backend):
+    """Measure one backend in this (fresh) process and print the results as JSON"""
+    import resource
+
+    sys.path.insert(0, SRCS_DIR)
+    from files.config import load_environment
+    load_environment()
+
+    start = time.perf_counter()
+    from files.providers import get_provider
+    provider = get_provider(backend)
+    sdk_import = time.perf_counter() - start
+
+    start = time.perf_counter()
+    models = provider.list_models()
+    discovery = time.perf_counter() - start
+    model = bench_model_name(backend)
+    if model not in models:
+        raise SystemExit(f"{model} not listed by {backend}: {models[:5]}")
+
+    # Render like a terminal would, into memory
+    from rich.console import Console
+    from files import render
+    render.console = Console(file=io.StringIO(), force_terminal=True, width=100, color_system="truecolor")
+
+    tokens = 0
+    first_token = None
+    start = time.perf_counter()
+    with render.MarkdownStream(model) as stream:
+        for content in provider.stream_chat(model, [{"role": "user", "content": BENCH_PROMPT}]):
+            stream.write(content)
+            tokens += 1
+            if first_token is None:
+                first_token = time.perf_counter()
+    end = time.perf_counter()
+
+    streaming = end - first_token if first_token else 0
+    print(json.dumps({
+        "sdk_import_ms": round(sdk_import * 1000, 1),
+        "discovery_ms": round(discovery * 1000, 1),
+        "first_token_ms": round((first_token - start) * 1000, 1) if first_token else None,
+        "tokens": tokens,
+        "tokens_per_s": round(tokens / streaming, 1) if streaming else None,
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        "peak_memory_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+    }))
+
+
+def run_child(backend, env):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", backend],
+        env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_cold_start(backend, env):
+    """Wall time of a one-shot `llm run` in a new process, in milliseconds"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, MAIN_PY, "run", f"{backend}/{bench_model_name(backend)}", BENCH_PROMPT, "--raw"],
+        env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return round(elapsed * 1000, 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def median(values):
+    values = [value for value in values if value is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline provider benchmarks")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="comma-separated backends to measure (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="runs per backend (default: 3)")
+    parser.add_argument("--tokens", type=int, default=500, help="tokens per answer (default: 500)")
+    parser.add_argument("--token-rate", type=float, default=0.0,
+                        help="tokens per second sent by the servers (default: unlimited)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds before the first token (default: 0)")
+    parser.add_argument("--models", type=int, default=50, help="models listed by each server (default: 50)")
+    parser.add_argument("--output", "-o", default="-", help="file to write the JSON results to (default: stdout)")
+    options = parser.parse_args()
+
+    if options.child:
+        return child(options.child)
+
+    backends = [backend.strip() for backend in options.backends.split(",") if backend.strip()]
+    unknown = [backend for backend in backends if backend not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(unknown)}")
+
+    config = FakeConfig(
+        [BENCH_MODEL] + [f"{BENCH_MODEL}-{i}" for i in range(1, options.models)],
+        tokens=options.tokens,
+        token_rate=options.token_rate,
+        latency=options.latency,
+    )
+    servers = {protocol: start_server(protocol, config) for protocol in set(BACKENDS[b] for b in backends)}
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="promptly-bench-") as home:
+        env = dict(os.environ, HOME=home, PYTHONDONTWRITEBYTECODE="1")
+        backend_env = {}
+        for backend in backends:
+            port = servers[BACKENDS[backend]].server_address[1]
+            backend_env.update(server_env(backend, f"http://127.0.0.1:{port}"))
+        env.update(backend_env)
+
+        # The CLI reloads keys from its .env file, so they go there too
+        config_dir = os.path.join(home, ".config", "promptly_cli")
+        os.makedirs(config_dir)
+        with open(os.path.join(config_dir, ".env"), "w") as f:
+            for key, value in backend_env.items():
+                f.write(f"{key}={value}\n")
+
+        for backend in backends:
+            sys.stderr.write(f"Benchmarking {backend}...\n")
+            try:
+                runs = [run_child(backend, env) for _ in range(options.runs)]
+                cold_starts = [measure_cold_start(backend, env) for _ in range(options.runs)]
+            except RuntimeError as e:
+                results[backend] = {"error": str(e)}
+                continue
+            result = {"cold_start_ms": median(cold_starts)}
+            for key in runs[0]:
+                if key in ("peak_memory_mb", "tokens"):
+                    result[key] = max(run[key] for run in runs)
+                else:
+                    result[key] = median([run[key] for run in runs])
+            results[backend] = result
+
+    for server in servers.values():
+        server.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "runs": options.runs,
+            "tokens": options.tokens,
+            "token_rate": options.token_rate,
+            "latency": options.latency,
+            "models": options.models,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if options.output == "-":
+        print(output)
+    else:
+        with open(options.output, "w") as f:
+            f.write(output + "\n")
+    return 1 if any("error" in result for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
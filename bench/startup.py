@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark of a piped one-shot query, before and after a change.
+
+Runs `llm run openai/bench-model "hi"` with stdout piped (as a script would)
+against a local fake OpenAI server, in fresh processes, for the working tree
+and for a baseline git revision checked out in a temporary worktree. For each
+tree it reports:
+
+- wall_ms: wall time of the whole command (median and min over --runs runs)
+- import_ms: time spent importing modules, interpreter startup excluded
+- sdk_import_ms: the part of import_ms spent importing the provider SDK and
+  its HTTP stack
+- cli_import_ms: import_ms without the SDK, i.e. the CLI's own startup cost
+- ui_modules: UI libraries loaded although nothing is rendered
+
+The cold-start target (see README.md) is on cli_import_ms: the provider SDK
+is needed by any query, everything else is overhead.
+
+Usage:
+    python bench/startup.py [--baseline HEAD~1] [--runs 10] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_servers import FakeConfig, start_server  # noqa: E402
+
+BENCH_MODEL = "bench-model"
+
+# Libraries a piped query has no use for
+UI_MODULES = ["rich", "prompt_toolkit", "pygments", "markdown_it"]
+
+# The SDK talking to the fake server, and the HTTP stack it loads when it
+# first connects
+SDK_PACKAGES = ["openai", "httpx", "httpcore", "httpcore2", "anyio", "h11", "h2",
+                "sniffio", "certifi", "distro", "jiter", "pydantic", "pydantic_core"]
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        list: (depth, module, cumulative microseconds) in output order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            # Header line
+            continue
+        name = parts[2].rstrip()
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), cumulative))
+    return entries
+
+
+def import_breakdown(entries, startup_modules):
+    """Total import time, SDK import time (microseconds) and UI modules loaded"""
+    total = sum(us for depth, name, us in entries if depth == 0 and name not in startup_modules)
+    # A module is printed after the modules it imports, so reversed entries
+    # come parent first. An SDK module's cumulative time includes its own
+    # imports: only count SDK modules with no SDK module above them.
+    sdk = 0
+    in_sdk = []
+    for depth, name, us in reversed(entries):
+        if depth == 0:
+            startup = name in startup_modules
+        del in_sdk[depth:]
+        is_sdk = name.split(".")[0] in SDK_PACKAGES
+        if is_sdk and not startup and not any(in_sdk):
+            sdk += us
+        in_sdk.append(is_sdk)
+    loaded = {name.split(".")[0] for _, name, _ in entries}
+    return total, sdk, [module for module in UI_MODULES if module in loaded]
+
+
+def run_query(tree, env, importtime=False):
+    """Run the one-shot query from a source tree, return (wall seconds, stderr)"""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += [os.path.join(tree, "srcs", "main.py"), "run", f"openai/{BENCH_MODEL}", "hi"]
+    start = time.perf_counter()
+    # stdout is a pipe, so trees with a raw mode use it
+    result = subprocess.run(command, env=env, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0 or "quick" not in result.stdout:
+        raise RuntimeError(f"{tree}: {result.stderr.strip() or result.stdout.strip()}")
+    return elapsed, result.stderr
+
+
+def measure(tree, env, runs, startup_modules):
+    """Measure one source tree"""
+    # Warm up: compile the tree's bytecode so runs don't pay for it
+    run_query(tree, env)
+
+    walls = [run_query(tree, env)[0] * 1000 for _ in range(runs)]
+    totals, sdks, ui_modules = [], [], set()
+    for _ in range(runs):
+        _, stderr = run_query(tree, env, importtime=True)
+        total, sdk, ui = import_breakdown(parse_importtime(stderr), startup_modules)
+        totals.append(total / 1000)
+        sdks.append(sdk / 1000)
+        ui_modules.update(ui)
+
+    return {
+        "wall_ms": round(statistics.median(walls), 1),
+        "wall_min_ms": round(min(walls), 1),
+        "import_ms": round(statistics.median(totals), 1),
+        "sdk_import_ms": round(statistics.median(sdks), 1),
+        "cli_import_ms": round(statistics.median([t - s for t, s in zip(totals, sdks)]), 1),
+        "ui_modules": sorted(ui_modules),
+    }
+
+
+def git(*args):
+    return subprocess.run(["git", *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def interpreter_startup_modules():
+    """Modules imported by the interpreter itself, not ours to measure"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True)
+    return {name for _, name, _ in parse_importtime(result.stderr)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the cold start of a piped one-shot query")
+    parser.add_argument("--baseline", default="HEAD~1",
+                        help="git revision to compare the working tree with (default: HEAD~1)")
+    parser.add_argument("--runs", type=int, default=10, help="runs per tree (default: 10)")
+    parser.add_argument("--output", "-o", default="-", help="file to write the JSON results to (default: stdout)")
+    options = parser.parse_args()
+
+    baseline = git("rev-parse", "--short", options.baseline)
+    server = start_server("openai", FakeConfig([BENCH_MODEL], tokens=10))
+    startup_modules = interpreter_startup_modules()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="promptly-startup-") as tmp:
+        home = os.path.join(tmp, "home")
+        config_dir = os.path.join(home, ".config", "promptly_cli")
+        os.makedirs(config_dir)
+        # The CLI reloads keys from its .env file
+        with open(os.path.join(config_dir, ".env"), "w") as f:
+            f.write("OPENAI_API_KEY=bench\n")
+        env = dict(os.environ, HOME=home, OPENAI_API_KEY="bench",
+                   OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_address[1]}/v1")
+
+        worktree = os.path.join(tmp, "baseline")
+        git("worktree", "add", "--detach", worktree, baseline)
+        try:
+            for name, tree in (("baseline", worktree), ("current", ROOT_DIR)):
+                sys.stderr.write(f"Measuring {name}...\n")
+                try:
+                    results[name] = measure(tree, env, options.runs, startup_modules)
+                except RuntimeError as e:
+                    results[name] = {"error": str(e)}
+        finally:
+            git("worktree", "remove", "--force", worktree)
+    server.shutdown()
+
+    if all("error" not in result for result in results.values()):
+        results["delta"] = {
+            key: round(results["current"][key] - results["baseline"][key], 1)
+            for key in ("wall_ms", "wall_min_ms", "import_ms", "cli_import_ms")
+        }
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "baseline": baseline,
+            "current": git("rev-parse", "--short", "HEAD") + (" (dirty)" if git("status", "--porcelain", "srcs") else ""),
+            "runs": options.runs,
+            "command": f'llm run openai/{BENCH_MODEL} "hi" | cat',
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if options.output == "-":
+        print(output)
+    else:
+        with open(options.output, "w") as f:
+            f.write(output + "\n")
+    return 1 if any("error" in result for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,8 @@ mkdir -p "$CONFIG_DIR"
 # Copy files
 echo "Copying project files..."
 cp -r ./srcs "$INSTALL_DIR/"
+mkdir -p "$INSTALL_DIR/scripts"
+cp -r ./scripts/pyinstaller_hooks "$INSTALL_DIR/scripts/"
 
 # Handle environment configuration
 echo "Setting up configuration..."
@@ -97,7 +99,9 @@ python3 -m venv "$INSTALL_DIR/venv"
 echo "Creating executable..."
 "$INSTALL_DIR/venv/bin/pip" install pyinstaller
 cd "$INSTALL_DIR"
-"$INSTALL_DIR/venv/bin/pyinstaller" --onefile --name llm "$INSTALL_DIR/srcs/main.py"
+# Providers are imported by name, the hook lists them and their SDKs for PyInstaller
+"$INSTALL_DIR/venv/bin/pyinstaller" --onefile --name llm \
+    --additional-hooks-dir "$INSTALL_DIR/scripts/pyinstaller_hooks" "$INSTALL_DIR/srcs/main.py"
 
 # Create symbolic link
 echo "Creating symbolic link..."
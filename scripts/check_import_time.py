@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Import-time regression budget for the `llm` entry point.
+
+Imports srcs/main.py, then runs `llm help`, under `python -X importtime` and
+fails when, for either of them:
+- the cumulative import time of everything they pull in exceeds the budget
+  (for `llm help` this includes rich, which commands import when they run)
+- a provider SDK is imported at startup (they must only load on first use)
+
+Usage:
+    python scripts/check_import_time.py [--budget-ms 100] [--runs 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SRCS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'srcs')
+
+# Default budget for importing main.py, in milliseconds
+DEFAULT_BUDGET_MS = 100
+
+# What is measured: (name, interpreter arguments, depth of the modules shown in
+# the breakdown). Importing main.py shows what main.py imports; a command runs
+# main.py as a script, so what it imports is at the top level.
+TARGETS = [
+    ("main.py", ["-c", "import main"], 1),
+    ("llm help", ["main.py", "help"], 0),
+]
+
+# SDKs that must never be imported just to start the CLI
+LAZY_MODULES = ["ollama", "openai", "anthropic", "mistralai", "google.genai"]
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        tuple: (top-level module -> cumulative import time in microseconds,
+                second-level module -> cumulative import time in microseconds,
+                set of every imported module)
+    """
+    top_level = {}
+    second_level = {}
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            # Header line
+            continue
+        name = parts[2].rstrip()
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        modules.add(name)
+        if depth == 0:
+            top_level[name] = top_level.get(name, 0) + cumulative
+        elif depth == 1:
+            second_level[name] = second_level.get(name, 0) + cumulative
+    return top_level, second_level, modules
+
+
+def measure(arguments):
+    """Run a fresh interpreter with -X importtime and the given arguments"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *arguments],
+        cwd=SRCS_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        sys.exit(f"Failed to run: {' '.join(arguments)}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("PROMPTLY_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--runs", type=int, default=5, help="keep the best of N runs to reduce noise")
+    args = parser.parse_args()
+
+    # Interpreter startup imports (site, encodings, ...) are not ours to budget
+    _, _, startup_modules = measure(["-c", "pass"])
+
+    failed = False
+    for target, arguments, breakdown_depth in TARGETS:
+        best_us = None
+        best_breakdown = {}
+        imported = set()
+        for _ in range(args.runs):
+            top_level, second_level, modules = measure(arguments)
+            total = sum(us for name, us in top_level.items() if name not in startup_modules)
+            imported |= modules
+            if best_us is None or total < best_us:
+                best_us = total
+                breakdown = second_level if breakdown_depth else top_level
+                best_breakdown = {name: us for name, us in breakdown.items() if name not in startup_modules}
+
+        print(f"Import time of {target}: {best_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for name, us in sorted(best_breakdown.items(), key=lambda item: item[1], reverse=True)[:10]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+
+        eager = [name for name in LAZY_MODULES if name in imported]
+        if eager:
+            print(f"FAIL: provider SDKs imported by {target}: {', '.join(eager)}")
+            failed = True
+        if best_us / 1000 > args.budget_ms:
+            print(f"FAIL: import time budget exceeded by {target}")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+PyInstaller hook for files.providers (`--additional-hooks-dir scripts/pyinstaller_hooks`).
+
+PyInstaller only bundles modules named in import statements. Built-in
+providers are imported by name from BUILTIN_PROVIDERS, so neither their
+modules nor their SDKs would end up in the executable without this list.
+tests/test_packaging.py checks it against BUILTIN_PROVIDERS.
+"""
+from PyInstaller.utils.hooks import collect_submodules
+
+# Modules of the built-in providers (BUILTIN_PROVIDERS in files/providers.py)
+BACKENDS = [
+    "files.llm_openai",
+    "files.llm_mistral",
+    "files.llm_anthropic",
+    "files.llm_deepseek",
+    "files.llm_gemini",
+    "files.llm_ollama",
+]
+
+# SDKs the backends import; some of their modules are only loaded by name too
+SDKS = ["openai", "mistralai", "anthropic", "google.genai", "ollama"]
+
+hiddenimports = list(BACKENDS)
+for package in SDKS:
+    hiddenimports += collect_submodules(package)
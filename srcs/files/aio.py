@@ -0,0 +1,111 @@
+import asyncio
+import threading
+
+# Event loop running in a background thread, shared by every sync wrapper.
+# Keeping a single long-lived loop lets the async SDK clients (and their
+# connection pools) be reused across calls, which a fresh asyncio.run() per
+# call would throw away.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Get the background event loop, starting it on first use"""
+    global _loop
+    if _loop is not None:
+        return _loop
+
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="promptly-asyncio", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine on the background loop and wait for its result.
+
+    If the caller is interrupted (Ctrl+C), the coroutine is cancelled too.
+    """
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+async def _next(iterator):
+    return await iterator.__anext__()
+
+
+def iterate_sync(async_iterable):
+    """
+    Iterate an async iterable from synchronous code.
+
+    Each item is fetched on the background loop. Closing the generator (or
+    leaving the loop early) closes the async iterator, and with it the
+    underlying HTTP stream.
+    """
+    iterator = async_iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield run_sync(_next(iterator))
+            except StopAsyncIteration:
+                return
+    finally:
+        if hasattr(iterator, "aclose"):
+            try:
+                run_sync(iterator.aclose())
+            except Exception:
+                # The stream is being abandoned anyway
+                pass
+
+
+async def aiterate_in_thread(iterable):
+    """
+    Iterate a blocking iterable from async code without blocking the loop.
+
+    Used for providers that only implement the synchronous interface.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # The loop is gone, nobody is listening anymore
+            stop.set()
+
+    def pump():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    break
+                put(item)
+        except BaseException as e:
+            put(done, e)
+            return
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+        put(done)
+
+    threading.Thread(target=pump, daemon=True).start()
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
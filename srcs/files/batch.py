@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .oneshot import check_provider
+from .providers import get_provider
+from .raw import print_raw_error
+
+DEFAULT_CONCURRENCY = 4
+
+# In input order, finished results wait for the slower items before them. At
+# most this many results per worker are held back before submitting waits too,
+# so memory stays bounded when one request hangs.
+REORDER_WINDOW = 8
+
+
+def parse_batch_args(args):
+    """Parse the arguments of `llm batch` (args excludes the command name)"""
+    parser = argparse.ArgumentParser(
+        prog="llm batch",
+        description="Run every prompt of a JSONL file against a model.",
+    )
+    parser.add_argument("target", metavar="provider/model")
+    parser.add_argument("--input", "-i", default="-",
+                        help="JSONL file with one {\"prompt\": ...} or {\"messages\": [...]} object per line (default: stdin)")
+    parser.add_argument("--output", "-o", default="-",
+                        help="JSONL file to write results to (default: stdout)")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"number of requests in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--unordered", action="store_true",
+                        help="write results as they complete instead of in input order")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip items already answered in the output file and append the rest")
+    return parser.parse_args(args)
+
+
+def read_items(stream):
+    """
+    Lazily read the input file, closing it at the end (unless it is stdin).
+
+    Yields:
+        tuple: (index, id, messages, error) for every non-blank line; `error`
+        is set when the line can't be turned into a request
+    """
+    try:
+        index = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            item_id, messages, error = index, None, None
+            try:
+                item = json.loads(line)
+                if isinstance(item, str):
+                    item = {"prompt": item}
+                item_id = item.get("id", index)
+                if "messages" in item:
+                    messages = item["messages"]
+                elif "prompt" in item:
+                    messages = [{"role": "user", "content": item["prompt"]}]
+                else:
+                    error = "Expected a 'prompt' or 'messages' field"
+            except (ValueError, AttributeError) as e:
+                error = f"Invalid JSON line: {e}"
+            yield index, item_id, messages, error
+            index += 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def read_completed(path):
+    """Indexes of the items answered without error in an existing output file"""
+    completed = set()
+    if path == "-" or not os.path.exists(path):
+        return completed
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Partially written last line of an interrupted run
+                continue
+            if isinstance(record, dict) and record.get("error") is None and "index" in record:
+                completed.add(record["index"])
+    return completed
+
+
+def run_item(backend, model, index, item_id, messages, error):
+    """Send one request and build its result record"""
+    record = {"index": index, "id": item_id, "model": f"{backend.name}/{model}",
+              "response": None, "error": error, "latency_ms": None}
+    if error:
+        return record
+
+    start = time.monotonic()
+    try:
+        record["response"] = "".join(backend.retrying_stream(model, messages))
+    except Exception as e:
+        record["error"] = str(e) or type(e).__name__
+    record["latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+    return record
+
+
+def run_batch(args):
+    """
+    `llm batch provider/model --input prompts.jsonl --output results.jsonl --concurrency N`
+
+    The input is read lazily and at most `concurrency` requests are in flight,
+    so memory stays flat whatever the size of the input. Everything runs in a
+    single process: SDK import, environment loading and connection setup are
+    paid once for the whole file.
+    """
+    options = parse_batch_args(args)
+
+    parts = options.target.split('/', 1)
+    if len(parts) != 2:
+        print_raw_error(f"Invalid format: {options.target} (expected provider/modelname)")
+        return 1
+    provider, model = parts
+
+    error = check_provider(provider)
+    if error:
+        print_raw_error(error)
+        return 1
+    backend = get_provider(provider)
+
+    if options.resume and options.output == "-":
+        print_raw_error("--resume needs an --output file")
+        return 1
+
+    concurrency = max(1, options.concurrency)
+
+    # The input is opened first: a missing input must not truncate the output
+    try:
+        source = sys.stdin if options.input == "-" else open(options.input, 'r')
+    except OSError as e:
+        print_raw_error(f"Can't read {options.input}: {e.strerror}")
+        return 1
+    try:
+        completed = read_completed(options.output) if options.resume else set()
+        out = sys.stdout if options.output == "-" else open(options.output, 'a' if options.resume else 'w')
+    except OSError as e:
+        if source is not sys.stdin:
+            source.close()
+        print_raw_error(f"Can't write {options.output}: {e.strerror}")
+        return 1
+
+    processed = 0
+    failed = 0
+    start = time.monotonic()
+
+    def write(record):
+        nonlocal processed, failed
+        processed += 1
+        if record["error"] is not None:
+            failed += 1
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    running = set()
+    # Input order of the items not written yet, and the finished ones among them
+    # (the reorder buffer); both stay empty with --unordered
+    order = deque()
+    finished = {}
+
+    def collect():
+        """Wait for at least one request to finish and write what can be written"""
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            running.discard(future)
+            record = future.result()
+            if options.unordered:
+                write(record)
+            else:
+                finished[record["index"]] = record
+        while order and order[0] in finished:
+            write(finished.pop(order.popleft()))
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index, item_id, messages, error in read_items(source):
+                if index in completed:
+                    continue
+
+                running.add(executor.submit(run_item, backend, model, index, item_id, messages, error))
+                if not options.unordered:
+                    order.append(index)
+
+                # Keep `concurrency` requests in flight: a slow item only holds
+                # back the writing of the ones after it, not their requests
+                while len(running) >= concurrency or len(order) >= concurrency * REORDER_WINDOW:
+                    collect()
+
+            # Drain what is still running
+            while running:
+                collect()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.monotonic() - start
+    skipped = f", {len(completed)} already done" if completed else ""
+    sys.stderr.write(f"Processed {processed} prompts ({failed} failed{skipped}) in {elapsed:.1f}s\n")
+    return 1 if failed else 0
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from .config import CONFIG_DIR, atomic_write, get_env_number
+
+# On-disk model catalog, shared by `llm list` and `llm run`
+CATALOG_PATH = os.path.join(CONFIG_DIR, 'models.json')
+
+# Bump this whenever the layout of the catalog file changes
+CATALOG_VERSION = 1
+
+# Entries older than this (in seconds) are served but refreshed in the background
+DEFAULT_CATALOG_TTL = 6 * 60 * 60
+
+# Seconds a command waits at exit for background refreshes to finish
+REFRESH_EXIT_WAIT = 2
+
+_catalog_lock = threading.Lock()
+_refreshing = set()
+_refresh_threads = []
+_force_refresh = False
+
+
+def set_force_refresh(value=True):
+    """Bypass cached entries for the rest of the process (used by --refresh)"""
+    global _force_refresh
+    _force_refresh = value
+
+
+def is_force_refresh():
+    """Return True if cached entries should be ignored"""
+    return _force_refresh
+
+
+def get_catalog_ttl():
+    """Get the catalog TTL in seconds, overridable with PROMPTLY_CATALOG_TTL"""
+    return get_env_number("PROMPTLY_CATALOG_TTL", DEFAULT_CATALOG_TTL)
+
+
+def catalog_source(credential):
+    """
+    Fingerprint the credential used to list models.
+
+    The catalog never stores the API key itself, only a short hash, so that a
+    changed key or Ollama address does not serve another account's model list.
+    """
+    if not credential:
+        return ""
+    return hashlib.sha256(str(credential).encode("utf-8")).hexdigest()[:16]
+
+
+def load_catalog():
+    """Read the catalog file, returning an empty catalog if missing, corrupt or outdated"""
+    try:
+        with open(CATALOG_PATH, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CATALOG_VERSION, "providers": {}}
+
+    if not isinstance(data, dict) or data.get("version") != CATALOG_VERSION:
+        return {"version": CATALOG_VERSION, "providers": {}}
+    if not isinstance(data.get("providers"), dict):
+        data["providers"] = {}
+    return data
+
+
+def write_catalog(catalog):
+    """Replace the catalog file"""
+    try:
+        with atomic_write(CATALOG_PATH) as f:
+            json.dump(catalog, f)
+    except OSError:
+        # The catalog is only a cache, failing to write it is not fatal
+        pass
+
+
+def get_cached_models(provider, source):
+    """
+    Look up a provider in the catalog.
+
+    Returns:
+        tuple: (models, fetched_at), or (None, None) if there is no usable entry
+    """
+    entry = load_catalog()["providers"].get(provider)
+    if not entry or entry.get("source") != source:
+        return None, None
+    models = entry.get("models")
+    if not isinstance(models, list):
+        return None, None
+    return models, entry.get("fetched_at", 0)
+
+
+def is_stale(fetched_at):
+    """Return True if an entry fetched at `fetched_at` is past the TTL"""
+    return time.time() - (fetched_at or 0) > get_catalog_ttl()
+
+
+def save_models(provider, source, models):
+    """Store a provider's model list in the catalog"""
+    with _catalog_lock:
+        catalog = load_catalog()
+        old = catalog["providers"].get(provider) or {}
+        entry = catalog["providers"][provider] = {
+            "source": source,
+            "fetched_at": time.time(),
+            "models": models,
+        }
+        # The state of the provider's servers outlives a new model list
+        if old.get("source") == source and isinstance(old.get("hosts"), dict):
+            entry["hosts"] = old["hosts"]
+        write_catalog(catalog)
+
+
+def get_cached_hosts(provider, source):
+    """
+    Look up the saved state of a provider's servers (see save_hosts).
+
+    Returns:
+        dict: State of each server, by address ({} if there is none)
+    """
+    entry = load_catalog()["providers"].get(provider)
+    if not entry or entry.get("source") != source:
+        return {}
+    hosts = entry.get("hosts")
+    return hosts if isinstance(hosts, dict) else {}
+
+
+def save_hosts(provider, source, hosts):
+    """
+    Store the state of some of a provider's servers in its catalog entry.
+
+    Servers left out keep their saved state, so processes only overwrite the
+    servers they know something new about.
+
+    Args:
+        provider (str): Provider name
+        source (str): Fingerprint of the provider's configuration (see catalog_source)
+        hosts (dict): State of each server, by address
+    """
+    with _catalog_lock:
+        catalog = load_catalog()
+        entry = catalog["providers"].get(provider)
+        if not entry or entry.get("source") != source:
+            # No model list for this configuration yet, the entry only holds the servers
+            entry = catalog["providers"][provider] = {"source": source}
+        if not isinstance(entry.get("hosts"), dict):
+            entry["hosts"] = {}
+        entry["hosts"].update(hosts)
+        write_catalog(catalog)
+
+
+def refresh_in_background(provider, source, fetch):
+    """Refetch a stale provider entry without blocking the caller"""
+    with _catalog_lock:
+        if provider in _refreshing:
+            return
+        _refreshing.add(provider)
+
+    def worker():
+        try:
+            models = fetch()
+            if models:
+                save_models(provider, source, models)
+        except Exception:
+            # Keep serving the stale entry, the next run will try again
+            pass
+        finally:
+            with _catalog_lock:
+                _refreshing.discard(provider)
+
+    thread = threading.Thread(target=worker, name=f"catalog-refresh-{provider}", daemon=True)
+    thread.start()
+    _refresh_threads.append(thread)
+
+
+def wait_for_refreshes(timeout=REFRESH_EXIT_WAIT):
+    """
+    Give background refreshes a chance to finish before the process exits.
+
+    Refresh threads are daemons: without this, quick commands (`llm list`,
+    a piped `llm run`) would exit before the refetch is saved, and their
+    users would keep getting the stale entry.
+    """
+    deadline = time.monotonic() + timeout
+    for thread in _refresh_threads:
+        thread.join(max(0, deadline - time.monotonic()))
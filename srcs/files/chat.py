@@ -2,43 +2,30 @@ import signal
 import os
 from rich.console import Console
 from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.completion import WordCompleter
 from prompt_toolkit.styles import Style
-import re
 from files.llm_global import chat_completion
+from files.streams import StreamInterrupted
+from files.conversation import Conversation, get_context_budget
+from files.history import get_history
+from files.completion import WordIndexCompleter, load_word_index, save_word_index
+from files.warm import preload_in_background
 
 def chat(provider, model):
     console = Console()
+
+    # Local models start loading while the first message is typed
+    preload_in_background(provider, model)
     
-    # Set up prompt_toolkit session with history
-    history_file = os.path.join(os.path.expanduser("~"), ".promptly_history")
-    
-    # Initialize an empty completer - we'll update it with history words
-    chat_completer = WordCompleter([], ignore_case=True)
+    # Set up prompt_toolkit session with the chat history (bounded, loaded lazily)
+    history = get_history("chat")
     
-    # Try to pre-populate the completer from existing history
-    history_words = set()
-    try:
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    # Extract words from history
-                    words = re.findall(r'\b\w+\b', line)
-                    for word in words:
-                        if len(word) > 3:  # Only add substantial words
-                            history_words.add(word)
-            
-            # Update the completer with initial words from history
-            chat_completer = WordCompleter(list(history_words), ignore_case=True)
-    except Exception:
-        # If there's any issue, just continue with an empty completer
-        pass
+    # Words typed or read in earlier sessions, only the new part of the history is parsed
+    word_index = load_word_index(history.filename)
+    chat_completer = WordIndexCompleter(word_index)
     
     session = PromptSession(
-        history=FileHistory(history_file),
+        history=history,
         auto_suggest=AutoSuggestFromHistory(),
         completer=chat_completer,
         enable_history_search=True,
@@ -55,11 +42,8 @@ def chat(provider, model):
     console.print("[bold yellow]Tip: Use arrow keys to navigate history, Tab for suggestions, Ctrl+C for a new prompt.[/bold yellow]")
     console.print()
 
-    # Keep track of words to add to the completer
-    all_words = history_words.copy()
-    
-    # Initialize conversation history for the LLM
-    messages = []
+    # Conversation history for the LLM, trimmed to the model's context budget
+    conversation = Conversation(get_context_budget(provider, model))
 
     while True:
         try:
@@ -74,34 +58,32 @@ def chat(provider, model):
             if user_input.strip() == "":
                 continue
 
-            # Extract words from the current input to add to the completer
-            new_words = re.findall(r'\b\w+\b', user_input)
-            for word in new_words:
-                if len(word) > 3 and word not in all_words:  # Only add substantial words
-                    all_words.add(word)
-            
-            # Update the completer with new words
-            session.completer = WordCompleter(list(all_words), ignore_case=True)
+            # Add the words of the current input to the completer
+            word_index.add_text(user_input)
 
-            # Add user message to history
-            messages.append({"role": "user", "content": user_input})
+            # History that fits in the budget along with the new prompt
+            dropped = conversation.dropped
+            messages = conversation.window(user_input)
+            if conversation.dropped > dropped:
+                console.print(f"[dim]Dropped {conversation.dropped - dropped} earlier messages to stay within the context budget[/dim]")
             
             # Get AI response using chat_completion
             ai_response = chat_completion(provider, model, user_input, messages)
             
-            # Add AI response to conversation history if we got a valid response
+            # Add the exchange to conversation history if we got a valid response
             if ai_response:
-                messages.append({"role": "assistant", "content": ai_response})
-                
-                # Extract words from AI response to add to the completer as well
-                ai_words = re.findall(r'\b\w+\b', ai_response)
-                for word in ai_words:
-                    if len(word) > 3 and word not in all_words:  # Only add substantial words
-                        all_words.add(word)
+                conversation.add_exchange(user_input, ai_response)
                 
-                # Update the completer again with AI response words
-                session.completer = WordCompleter(list(all_words), ignore_case=True)
+                # Words from the AI response are offered as well
+                word_index.add_text(ai_response)
 
+        except StreamInterrupted as interrupted:
+            # Ctrl+C while the answer streamed: the stream is closed, keep what arrived
+            if interrupted.partial:
+                conversation.add_exchange(user_input, interrupted.partial, interrupted=True)
+                word_index.add_text(interrupted.partial)
+                console.print("[bold yellow]The partial answer is kept in the conversation, marked as interrupted.[/bold yellow]")
+            continue
         except EOFError:
             # Handle Ctrl+D
             console.print("\n[bold red]Goodbye![/bold red]")
@@ -111,4 +93,5 @@ def chat(provider, model):
             console.print("\n[bold yellow]Starting a new prompt...[/bold yellow]")
             continue
 
+    save_word_index(word_index)
     return 0
\ No newline at end of file
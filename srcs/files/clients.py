@@ -0,0 +1,55 @@
+import threading
+import weakref
+from .timings import span
+
+# Process-wide pool of SDK clients, keyed by (provider, api key, base URL).
+# Reusing a client keeps its HTTP connections alive, so only the first request
+# to a provider pays for the TCP and TLS handshakes.
+#
+# Async clients are bound to the event loop they were first used on, so they
+# are pooled per loop: {loop: {(provider, api key, base URL): client}}
+_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_async_client(provider, api_key, base_url, factory):
+    """
+    Get the pooled async client for a provider on the running event loop,
+    creating it on first use. Must be called from a coroutine.
+
+    Args:
+        provider (str): Provider name
+        api_key (str): API key the client authenticates with
+        base_url (str): Endpoint the client talks to (None for the SDK default)
+        factory (callable): Builds a new client when none is pooled yet
+
+    Returns:
+        The SDK client
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    key = (provider, api_key, base_url)
+    with _clients_lock:
+        pool = _async_clients.setdefault(loop, {})
+        client = pool.get(key)
+        if client is None:
+            with span(f"client setup: {provider}"):
+                client = factory()
+            pool[key] = client
+        return client
+
+
+def invalidate_clients(provider=None):
+    """
+    Drop pooled clients so the next request builds new ones.
+
+    Args:
+        provider (str): Only drop this provider's clients (all of them if None)
+    """
+    with _clients_lock:
+        # Async clients can only be closed from their loop, they are just
+        # dropped and their connections closed when garbage collected
+        for pool in _async_clients.values():
+            for key in [key for key in pool if provider is None or key[0] == provider]:
+                del pool[key]
@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from prompt_toolkit.completion import Completer, Completion
+from .config import CONFIG_DIR, atomic_write
+
+# Words offered by the chat completer, persisted between sessions
+WORD_INDEX_PATH = os.path.join(CONFIG_DIR, 'words.json')
+WORD_INDEX_VERSION = 1
+
+# Only substantial words are worth completing
+MIN_WORD_LENGTH = 4
+
+# Completions shown for a prefix
+MAX_COMPLETIONS = 50
+
+# Above this many new words, the list is sorted again instead of inserting each one
+BULK_INSERT_THRESHOLD = 64
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+def extract_words(text):
+    """Words of a text that are worth completing"""
+    return [word for word in WORD_PATTERN.findall(text) if len(word) >= MIN_WORD_LENGTH]
+
+
+class WordIndex:
+    """
+    Sorted, case-insensitive word list supporting prefix lookups.
+
+    Looking up a prefix is a binary search followed by a walk over the
+    matches, so it doesn't depend on the size of the vocabulary.
+    """
+
+    def __init__(self, words=()):
+        self._lock = threading.Lock()
+        # Lowercased words, sorted, and the spelling to complete with
+        self._keys = []
+        self._words = {}
+        self.changed = False
+        self.update(words)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, word):
+        """Add a word, keeping the first spelling seen"""
+        self.update([word])
+
+    def update(self, words):
+        """Add several words"""
+        with self._lock:
+            new_keys = []
+            for word in words:
+                key = word.lower()
+                if key not in self._words:
+                    self._words[key] = word
+                    new_keys.append(key)
+            if not new_keys:
+                return
+            self.changed = True
+            if len(new_keys) <= BULK_INSERT_THRESHOLD:
+                for key in new_keys:
+                    insort(self._keys, key)
+            else:
+                # One sort of the mostly sorted list beats many insertions
+                self._keys.extend(new_keys)
+                self._keys.sort()
+
+    def add_text(self, text):
+        """Add the words of a text"""
+        self.update(extract_words(text))
+
+    def words(self):
+        with self._lock:
+            return [self._words[key] for key in self._keys]
+
+    def complete(self, prefix, limit=MAX_COMPLETIONS):
+        """Words starting with `prefix` (ignoring case), in alphabetical order"""
+        key = prefix.lower()
+        matches = []
+        with self._lock:
+            index = bisect_left(self._keys, key)
+            while index < len(self._keys) and len(matches) < limit:
+                candidate = self._keys[index]
+                if not candidate.startswith(key):
+                    break
+                matches.append(self._words[candidate])
+                index += 1
+        return matches
+
+
+class WordIndexCompleter(Completer):
+    """prompt_toolkit completer backed by a WordIndex"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def get_completions(self, document, complete_event):
+        prefix = document.get_word_before_cursor()
+        if not prefix:
+            return
+        for word in self.index.complete(prefix):
+            if word != prefix:
+                yield Completion(word, start_position=-len(prefix))
+
+
+def read_history_words(history_file, offset):
+    """
+    Read the words typed in a prompt_toolkit history file from a byte offset.
+
+    Only complete lines are read, the returned offset points after the last one.
+
+    Returns:
+        tuple: (words, offset)
+    """
+    words = []
+    with open(history_file, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b'\n') + 1
+    for line in data[:end].decode('utf-8', errors='replace').splitlines():
+        # Entries are stored as "+text" lines, "#" lines are timestamps
+        if line.startswith('+'):
+            words.extend(extract_words(line[1:]))
+    return words, offset + end
+
+
+def load_word_index(history_file):
+    """
+    Load the persisted word index and bring it up to date with the history file.
+
+    Only the bytes appended to the history since the index was saved are
+    parsed. The index is rebuilt from scratch if the history file was
+    replaced or truncated.
+    """
+    try:
+        with open(WORD_INDEX_PATH, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("version") != WORD_INDEX_VERSION:
+            data = {}
+    except (OSError, ValueError):
+        data = {}
+
+    try:
+        stat = os.stat(history_file)
+    except OSError:
+        stat = None
+
+    index = WordIndex(data.get("words", []))
+    offset = data.get("offset", 0)
+    if (data.get("history_file") != history_file or stat is None
+            or data.get("inode") != stat.st_ino or stat.st_size < offset):
+        # Different, new or rewritten history: start over
+        index = WordIndex()
+        offset = 0
+    index.changed = False
+
+    if stat is not None:
+        try:
+            words, offset = read_history_words(history_file, offset)
+            index.update(words)
+        except OSError:
+            pass
+
+    index.history_file = history_file
+    index.inode = stat.st_ino if stat is not None else None
+    index.offset = offset
+    if index.changed or data.get("offset") != offset:
+        save_word_index(index)
+    return index
+
+
+def save_word_index(index):
+    """Persist the word index, along with how much of the history it covers"""
+    # Take in what was typed since loading, so the next load starts from here
+    try:
+        words, index.offset = read_history_words(index.history_file, index.offset)
+        index.update(words)
+        index.inode = os.stat(index.history_file).st_ino
+    except OSError:
+        pass
+
+    data = {
+        "version": WORD_INDEX_VERSION,
+        "history_file": index.history_file,
+        "inode": index.inode,
+        "offset": index.offset,
+        "words": index.words(),
+    }
+    try:
+        with atomic_write(WORD_INDEX_PATH) as f:
+            json.dump(data, f)
+        index.changed = False
+    except OSError:
+        # Not fatal: the next session rebuilds the index from the history
+        pass
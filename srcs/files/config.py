@@ -1,13 +1,49 @@
 import os
+from contextlib import contextmanager
 from pathlib import Path
-from dotenv import load_dotenv, find_dotenv, set_key
-from rich.console import Console
+from dotenv import load_dotenv, dotenv_values, find_dotenv, set_key
 
-console = Console()
+# Rich consoles, created on first use: importing rich costs more than a
+# piped one-shot query spends on everything else before its request
+_consoles = {}
+
+def get_console(stderr=False):
+    """Get the console config messages are printed on"""
+    if stderr not in _consoles:
+        from rich.console import Console
+        _consoles[stderr] = Console(stderr=stderr)
+    return _consoles[stderr]
 
 # Get the project root directory (where .env should be located)
 PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
 
+# Directory holding the user's configuration and local caches
+CONFIG_DIR = os.path.join(os.path.expanduser('~'), '.config', 'promptly_cli')
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """
+    Open a temporary file that replaces `path` once the block completes.
+
+    Readers never see a partially written file. If the block raises, the
+    temporary file is deleted and `path` is left untouched.
+    """
+    import tempfile
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
 # Define locations to look for .env files in order of preference
 def get_env_file_paths():
     """Get potential .env file paths in order of preference"""
@@ -16,7 +52,7 @@ def get_env_file_paths():
         os.path.join(PROJECT_ROOT, '.env'),
         
         # 2. Check in config directory
-        os.path.join(os.path.expanduser('~'), '.config', 'promptly_cli', '.env'),
+        os.path.join(CONFIG_DIR, '.env'),
         
         # 3. Check in the home directory
         os.path.join(os.path.expanduser('~'), '.promptly_cli', '.env')
@@ -30,11 +66,30 @@ def get_env_file_path():
             return path
     
     # Default to the config directory
-    return os.path.join(os.path.expanduser('~'), '.config', 'promptly_cli', '.env')
+    return os.path.join(CONFIG_DIR, '.env')
 
 # Get the active .env file path
 ENV_FILE_PATH = get_env_file_path()
 
+# Connection settings the pooled SDK clients were built with
+_connection_settings = None
+
+def get_connection_settings():
+    """Snapshot of the environment variables SDK clients depend on"""
+    return tuple(sorted(
+        (key, value) for key, value in os.environ.items()
+        if key.endswith('_API_KEY') or key.endswith('_BASE_URL') or key == 'OLLAMA_ADDR'
+    ))
+
+def invalidate_stale_clients():
+    """Drop pooled SDK clients if API keys or addresses changed since they were built"""
+    global _connection_settings
+    settings = get_connection_settings()
+    if _connection_settings is not None and settings != _connection_settings:
+        from .clients import invalidate_clients
+        invalidate_clients()
+    _connection_settings = settings
+
 def load_environment(force_reload=True):
     """
     Load environment variables from .env file using absolute path
@@ -54,18 +109,39 @@ def load_environment(force_reload=True):
     
     # Check if .env exists
     if not os.path.exists(ENV_FILE_PATH):
-        console.print(f"[yellow]Warning: Environment file not found at {ENV_FILE_PATH}[/yellow]")
-        console.print("[yellow]Using default environment variables[/yellow]")
+        # Warnings and errors go to stderr so they never end up in piped output
+        error_console = get_console(stderr=True)
+        error_console.print(f"[yellow]Warning: Environment file not found at {ENV_FILE_PATH}[/yellow]")
+        error_console.print("[yellow]Using default environment variables[/yellow]")
+        invalidate_stale_clients()
         return False
     
     # Load environment variables from file
     # Setting override=True ensures values are updated
     load_dotenv(dotenv_path=ENV_FILE_PATH, override=True)
+    invalidate_stale_clients()
     
     # Debug: print loaded environment variables
     #console.print(f"[green]Environment loaded from: {ENV_FILE_PATH}[/green]")
     return True
 
+def refresh_environment():
+    """
+    Apply the changes made to the .env file since it was loaded.
+
+    Same result as load_environment(force_reload=True), but settings that
+    didn't change are never removed, not even for a moment: threads reading
+    them meanwhile (the daemon answering other queries) keep seeing them.
+    """
+    values = dotenv_values(ENV_FILE_PATH) if os.path.exists(ENV_FILE_PATH) else {}
+    for key in list(os.environ.keys()):
+        if (key.endswith('_API_KEY') or key == 'OLLAMA_ADDR') and values.get(key) is None:
+            os.environ.pop(key, None)
+    for key, value in values.items():
+        if value is not None and os.environ.get(key) != value:
+            os.environ[key] = value
+    invalidate_stale_clients()
+
 def get_api_key(provider):
     """Get API key for the specified provider"""
     # Ollama doesn't use an API key, so handle it separately
@@ -79,17 +155,34 @@ def get_api_key(provider):
     api_key = os.environ.get(env_var_name)
     
     if not api_key:
-        console.print(f"[red]Error: {env_var_name} not found in environment variables[/red]")
-        console.print(f"[red]Please set it in your config file: {ENV_FILE_PATH}[/red]")
+        error_console = get_console(stderr=True)
+        error_console.print(f"[red]Error: {env_var_name} not found in environment variables[/red]")
+        error_console.print(f"[red]Please set it in your config file: {ENV_FILE_PATH}[/red]")
         return None
     
     return api_key
 
 def get_ollama_addr():
-    """Get the address of the Ollama server"""
+    """Get the address of the Ollama server (the whole list if several are set)"""
     ollama_addr = os.environ.get("OLLAMA_ADDR", "http://localhost:11434")
     return ollama_addr
 
+def get_ollama_addrs():
+    """Get the addresses of the Ollama servers, OLLAMA_ADDR may list several (comma separated)"""
+    addrs = [addr.strip() for addr in get_ollama_addr().replace(",", " ").split()]
+    return addrs or ["http://localhost:11434"]
+
+def get_base_url(provider):
+    """Get the endpoint override for a provider (<PROVIDER>_BASE_URL), or None"""
+    return os.environ.get(f"{provider.upper()}_BASE_URL") or None
+
+def get_env_number(name, default):
+    """Get a numeric setting from the environment, `default` if it is unset or invalid"""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
 def check_ollama_configured():
     """Check if Ollama is configured properly"""
     # Ollama typically runs on localhost:11434 by default
@@ -97,19 +190,9 @@ def check_ollama_configured():
     # Return True to indicate Ollama can potentially be used
     return True
 
-def get_available_providers():
-    """Return a list of providers that have API keys configured"""
-    providers = ["openai", "mistral", "anthropic", "deepseek", "gemini", "ollama"]
-    available = []
-    
-    for provider in providers:
-        if get_api_key(provider):
-            available.append(provider)
-    
-    return available
-
 def debug_env_vars():
     """Debug function to print all API key environment variables and Ollama address"""
+    console = get_console()
     console.print("[bold]Current Environment Variables:[/bold]")
     
     # Print API keys with masking
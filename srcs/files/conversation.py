@@ -0,0 +1,115 @@
+import os
+from collections import deque
+from .providers import get_provider
+from .tokens import estimate_tokens
+
+# Tokens added by the chat format around every message (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Appended to an answer cut short by the user, so that the model knows it
+# didn't finish it
+INTERRUPTED_MARKER = "\n\n[Answer interrupted by the user]"
+
+
+def get_model_budget_override(provider, model):
+    """
+    Budget set for a model in PROMPTLY_MODEL_CONTEXT_BUDGETS, or None.
+
+    The variable holds comma-separated `pattern=tokens` pairs, e.g.
+    "gpt-4o*=64000,ollama/llama3*=6000". Patterns are matched against the
+    model name and against provider/model; the first match wins.
+    """
+    import fnmatch
+
+    for entry in os.environ.get("PROMPTLY_MODEL_CONTEXT_BUDGETS", "").split(","):
+        pattern, _, tokens = entry.strip().rpartition("=")
+        if not pattern:
+            continue
+        if fnmatch.fnmatchcase(model, pattern) or fnmatch.fnmatchcase(f"{provider}/{model}", pattern):
+            try:
+                return int(tokens)
+            except ValueError:
+                return None
+    return None
+
+
+def get_context_budget(provider, model):
+    """
+    Get the number of prompt tokens a chat may send to a model.
+
+    A budget set for the model in PROMPTLY_MODEL_CONTEXT_BUDGETS comes first,
+    then PROMPTLY_<PROVIDER>_CONTEXT_BUDGET and PROMPTLY_CONTEXT_BUDGET, then
+    the provider's default for the model (see Provider.context_budget).
+    """
+    budget = get_model_budget_override(provider, model)
+    if budget is not None:
+        return budget
+
+    backend = get_provider(provider)
+    default = backend.context_budget(model) if backend else 8000
+    value = os.environ.get(f"PROMPTLY_{provider.upper()}_CONTEXT_BUDGET") or os.environ.get("PROMPTLY_CONTEXT_BUDGET")
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+class Conversation:
+    """
+    History of a chat, kept within a token budget.
+
+    Every message is stored with its estimated token count and a running
+    total is maintained, so fitting the history into the budget only looks
+    at the messages being dropped. The oldest exchanges go first; the request
+    size, and with it the prompt processing time, stops growing once the
+    budget is reached.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        # (message, tokens) tuples, oldest first. Only the message dicts are sent.
+        self.history = deque()
+        self.tokens = 0
+        # Number of messages dropped to stay within the budget
+        self.dropped = 0
+
+    def add(self, role, content):
+        """Record a message of the conversation"""
+        tokens = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        self.history.append(({"role": role, "content": content}, tokens))
+        self.tokens += tokens
+
+    def add_exchange(self, prompt, answer, interrupted=False):
+        """
+        Record a prompt and the model's answer to it.
+
+        `interrupted` marks an answer cut short by the user (see INTERRUPTED_MARKER).
+        """
+        if interrupted:
+            answer += INTERRUPTED_MARKER
+        self.add("user", prompt)
+        self.add("assistant", answer)
+
+    def _drop_oldest_exchange(self):
+        message, tokens = self.history.popleft()
+        self.tokens -= tokens
+        self.dropped += 1
+        # Never leave an answer without the prompt it replies to
+        while self.history and self.history[0][0]["role"] != "user":
+            message, tokens = self.history.popleft()
+            self.tokens -= tokens
+            self.dropped += 1
+
+    def window(self, prompt):
+        """
+        Get the history to send along with a new prompt.
+
+        The prompt itself is not included: chat_completion appends it.
+
+        Returns:
+            list: Messages, oldest first, fitting in the budget with the prompt
+        """
+        available = self.budget - estimate_tokens(prompt) - MESSAGE_OVERHEAD_TOKENS
+        while self.history and self.tokens > available:
+            self._drop_oldest_exchange()
+        return [message for message, _ in self.history]
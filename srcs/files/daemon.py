@@ -0,0 +1,366 @@
+import hashlib
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from .config import CONFIG_DIR, ENV_FILE_PATH
+
+# `llm serve` keeps a process with the provider SDKs imported and their pooled
+# clients (and connections) open. Piped one-shot queries are forwarded to it
+# over a Unix socket and its answers streamed back; without a daemon, or when
+# it was started with other settings, they run in-process as usual.
+#
+# Protocol: the client sends one JSON line, the daemon answers with JSON lines.
+#   {"command": "run", "target": "provider/model", "prompt": str, "settings": str}
+#     -> {"ok": true} or {"fallback": reason}, then {"text": str}... and
+#        {"done": true} or {"error": str}
+#   {"command": "status"} -> {"pid": int, "uptime": float, "requests": int, "providers": [...]}
+#   {"command": "stop"} -> {"ok": true}
+
+# PROMPTLY_SOCKET overrides it
+DEFAULT_SOCKET_PATH = os.path.join(CONFIG_DIR, 'daemon.sock')
+LOG_PATH = os.path.join(CONFIG_DIR, 'daemon.log')
+
+# Seconds `llm serve start` waits for the daemon to answer
+START_TIMEOUT = 10
+
+# Seconds a query waits for the daemon to accept it before running in-process.
+# The daemon accepts right away, before calling the provider; only the answer
+# itself may take long.
+ACCEPT_TIMEOUT = 2
+
+
+class DaemonError(Exception):
+    """Error reported by the daemon while answering"""
+
+
+def get_socket_path():
+    return os.environ.get("PROMPTLY_SOCKET") or DEFAULT_SOCKET_PATH
+
+
+def daemon_enabled():
+    """Return False if PROMPTLY_DAEMON=0 turned forwarding off"""
+    return os.environ.get("PROMPTLY_DAEMON", "1").lower() not in ("0", "false", "no", "off")
+
+
+def settings_fingerprint():
+    """
+    Hash of everything that changes how a query is answered.
+
+    Client and daemon must agree on it: a shell with another API key, base URL,
+    PROMPTLY_* setting or cache flag than the daemon answers in-process.
+    """
+    from .config import get_connection_settings
+    from .response_cache import get_cache_mode
+
+    settings = list(get_connection_settings())
+    settings += sorted((key, value) for key, value in os.environ.items()
+                       if key.startswith("PROMPTLY_") and key not in ("PROMPTLY_DAEMON", "PROMPTLY_METRICS"))
+    settings.append(("cache_mode", get_cache_mode()))
+    return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()[:16]
+
+
+def _connect(timeout=None):
+    """Connect to the daemon, None if it isn't running"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(get_socket_path())
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def request(message, timeout=5):
+    """Send a one-answer command to the daemon, None if it isn't running"""
+    sock = _connect(timeout)
+    if sock is None:
+        return None
+    try:
+        with sock, sock.makefile("rb") as reader:
+            _send(sock, message)
+            line = reader.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        # A daemon shutting down accepts connections it won't answer
+        return None
+
+
+def open_daemon_stream(target, prompt):
+    """
+    Ask the daemon to answer a prompt.
+
+    Returns:
+        iterator: Pieces of the answer, or None if the query must run in-process
+            (no daemon, or a daemon started with other settings)
+
+    The iterator raises DaemonError if the daemon reports an error.
+    """
+    if not daemon_enabled():
+        return None
+    # A daemon that hangs must not hang the query with it
+    sock = _connect(ACCEPT_TIMEOUT)
+    if sock is None:
+        return None
+
+    reader = sock.makefile("rb")
+    try:
+        _send(sock, {"command": "run", "target": target, "prompt": prompt, "settings": settings_fingerprint()})
+        line = reader.readline()
+        answer = json.loads(line) if line else {}
+    except (OSError, ValueError):
+        # Includes socket.timeout
+        answer = {}
+    if not answer.get("ok"):
+        reader.close()
+        sock.close()
+        return None
+    sock.settimeout(None)
+
+    def stream():
+        try:
+            for line in reader:
+                message = json.loads(line)
+                if "text" in message:
+                    yield message["text"]
+                elif "error" in message:
+                    raise DaemonError(message["error"])
+                elif message.get("done"):
+                    return
+            raise DaemonError("The daemon closed the connection")
+        finally:
+            # Closing the socket makes the daemon close the provider stream
+            reader.close()
+            sock.close()
+
+    return stream()
+
+
+class _Daemon:
+    """State of the running daemon"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.env_mtime = self._env_mtime()
+        self.lock = threading.Lock()
+        self.server = None
+
+    @staticmethod
+    def _env_mtime():
+        try:
+            return os.stat(ENV_FILE_PATH).st_mtime
+        except OSError:
+            return None
+
+    def reload_environment(self):
+        """Pick up edits of the config file (keys, addresses) made since the last request"""
+        from .config import refresh_environment
+
+        with self.lock:
+            mtime = self._env_mtime()
+            if mtime != self.env_mtime:
+                # Other queries may be running: only the changed settings are touched
+                refresh_environment()
+                self.env_mtime = mtime
+
+    def status(self):
+        from .providers import loaded_providers
+
+        return {"pid": os.getpid(), "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests, "providers": loaded_providers()}
+
+    def answer(self, message, write):
+        """Stream the answer to a run command"""
+        from .oneshot import check_provider
+        from .providers import get_provider
+        from .streams import close_stream
+
+        self.reload_environment()
+        if message.get("settings") != settings_fingerprint():
+            write({"fallback": "settings differ"})
+            return
+        write({"ok": True})
+        with self.lock:
+            self.requests += 1
+
+        parts = str(message.get("target", "")).split('/', 1)
+        if len(parts) != 2:
+            write({"error": f"Invalid format: {message.get('target')} (expected provider/modelname)"})
+            return
+        provider, model = parts
+        error = check_provider(provider)
+        if error:
+            write({"error": error})
+            return
+
+        chunks = get_provider(provider).completion_stream(model, message.get("prompt", ""))
+        try:
+            for content in chunks:
+                write({"text": content})
+            write({"done": True})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away (Ctrl+C), stop generating
+            pass
+        except Exception as e:
+            write({"error": str(e) or type(e).__name__})
+        finally:
+            close_stream(chunks)
+
+    def handle(self, connection):
+        """Serve one connection"""
+        with connection, connection.makefile("rb") as reader:
+            def write(message):
+                connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+            try:
+                line = reader.readline()
+                if not line:
+                    return
+                message = json.loads(line)
+                command = message.get("command")
+                if command == "run":
+                    self.answer(message, write)
+                elif command == "status":
+                    write(self.status())
+                elif command == "stop":
+                    write({"ok": True})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    write({"error": f"Unknown command: {command}"})
+            except (OSError, ValueError):
+                pass
+
+
+def preload_providers():
+    """Import the SDKs of the configured providers, so the first query doesn't wait for them"""
+    from .providers import get_provider, lacks_api_key, provider_names
+
+    for name in provider_names():
+        if lacks_api_key(name):
+            continue
+        try:
+            # Building the provider imports its SDK
+            get_provider(name)
+        except Exception:
+            # A broken provider shouldn't keep the others from being served
+            pass
+
+
+def serve():
+    """Run the daemon in the foreground until stopped"""
+    import socketserver
+
+    path = get_socket_path()
+    if request({"command": "status"}, timeout=1) is not None:
+        sys.stderr.write(f"A daemon is already listening on {path}\n")
+        return 1
+    # A socket left behind by a daemon that didn't exit cleanly
+    if os.path.exists(path):
+        os.unlink(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    state = _Daemon()
+
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            state.handle(self.request)
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # Only the user may talk to the daemon: it answers with their API keys
+    umask = os.umask(0o077)
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(umask)
+    state.server = server
+
+    preload_providers()
+    sys.stderr.write(f"Listening on {path} (pid {os.getpid()})\n")
+    sys.stderr.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
+
+
+def start_in_background():
+    """Start the daemon in a detached process and wait until it answers"""
+    import subprocess
+
+    if request({"command": "status"}, timeout=1) is not None:
+        print(f"Already running on {get_socket_path()}")
+        return 0
+
+    # A packaged executable is its own interpreter
+    if getattr(sys, "frozen", False):
+        command = [sys.executable, "serve"]
+    else:
+        command = [sys.executable, os.path.abspath(sys.argv[0]), "serve"]
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    with open(LOG_PATH, "ab") as log:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                   start_new_session=True)
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = request({"command": "status"}, timeout=1)
+        if status is not None:
+            print(f"Started on {get_socket_path()} (pid {status['pid']})")
+            return 0
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    sys.stderr.write(f"The daemon didn't start, see {LOG_PATH}\n")
+    return 1
+
+
+def run_serve(args):
+    """
+    `llm serve [start|stop|status]`
+
+    Without argument the daemon runs in the foreground; `start` runs it in
+    the background.
+    """
+    action = args[0] if args else None
+    if action is None:
+        return serve()
+    if action == "start":
+        return start_in_background()
+    if action == "stop":
+        if request({"command": "stop"}) is None:
+            print("No daemon running")
+            return 1
+        # Wait for the socket to go away, so a new daemon can start right after
+        deadline = time.monotonic() + START_TIMEOUT
+        while os.path.exists(get_socket_path()) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        print("Stopped")
+        return 0
+    if action == "status":
+        status = request({"command": "status"})
+        if status is None:
+            print("No daemon running")
+            return 1
+        providers = ", ".join(status["providers"]) or "none"
+        print(f"Running on {get_socket_path()} (pid {status['pid']}), up {status['uptime']:.0f}s, "
+              f"{status['requests']} requests served, providers loaded: {providers}")
+        return 0
+    sys.stderr.write(f"Unknown action: {action} (expected start, stop or status)\n")
+    return 1
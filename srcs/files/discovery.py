@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+import time
+from .llm_global import load_models
+from .providers import get_provider, lacks_api_key
+from .resilience import classify_error, ERROR_AUTH, ERROR_TIMEOUT
+
+# Per-provider discovery statuses
+STATUS_OK = "ok"
+STATUS_NO_KEY = "no_key"
+STATUS_AUTH_ERROR = "auth_error"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+# Discovery status of the errors a model list request can fail with (see
+# resilience.classify_error), STATUS_ERROR for any other kind
+ERROR_STATUSES = {ERROR_AUTH: STATUS_AUTH_ERROR, ERROR_TIMEOUT: STATUS_TIMEOUT}
+
+# Seconds to wait for a provider's model list before giving up on it.
+# A local Ollama server answers in milliseconds, so a dead host is detected quickly.
+DEFAULT_DISCOVERY_TIMEOUT = 10.0
+DEFAULT_OLLAMA_DISCOVERY_TIMEOUT = 3.0
+
+
+def get_discovery_timeout(provider):
+    """
+    Get the discovery timeout for a provider.
+
+    PROMPTLY_<PROVIDER>_TIMEOUT takes precedence over PROMPTLY_DISCOVERY_TIMEOUT.
+    """
+    default = DEFAULT_OLLAMA_DISCOVERY_TIMEOUT if provider == "ollama" else DEFAULT_DISCOVERY_TIMEOUT
+    value = os.environ.get(f"PROMPTLY_{provider.upper()}_TIMEOUT") or os.environ.get("PROMPTLY_DISCOVERY_TIMEOUT")
+    try:
+        return float(value) if value else default
+    except ValueError:
+        return default
+
+
+def probe_provider(provider, refresh=False):
+    """
+    Fetch the model list of a single provider.
+
+    Returns:
+        dict: {"provider", "status", "models", "error", "elapsed"}
+    """
+    start = time.monotonic()
+    result = {"provider": provider, "status": STATUS_OK, "models": [], "error": None}
+
+    try:
+        # Checked first, so providers without a key don't import their SDK
+        backend = None if lacks_api_key(provider) else get_provider(provider)
+        if backend is None and lacks_api_key(provider):
+            result["status"] = STATUS_NO_KEY
+            result["error"] = f"{provider.upper()}_API_KEY is not set"
+        elif backend is None:
+            result["status"] = STATUS_ERROR
+            result["error"] = f"Unknown provider '{provider}'"
+        elif not backend.is_configured():
+            result["status"] = STATUS_NO_KEY
+            result["error"] = f"{provider.upper()}_API_KEY is not set"
+        else:
+            result["models"] = load_models(provider, refresh=refresh) or []
+    except Exception as e:
+        result["status"] = ERROR_STATUSES.get(classify_error(e), STATUS_ERROR)
+        result["error"] = str(e)
+
+    result["elapsed"] = time.monotonic() - start
+    return result
+
+
+def discover_models(providers, on_result=None, refresh=False):
+    """
+    Probe several providers concurrently.
+
+    Every provider is queried from its own thread, so the total time is close to
+    the slowest provider that answers rather than the sum of all of them. Providers
+    that don't answer within their timeout are reported as timed out; their thread
+    is a daemon and is simply abandoned.
+
+    Args:
+        providers (list): Provider names to probe
+        on_result (callable): Called with each result as soon as it arrives
+        refresh (bool): Skip the on-disk model catalog
+
+    Returns:
+        dict: provider name -> result dict (see probe_provider), in `providers` order
+    """
+    results = queue.Queue()
+    start = time.monotonic()
+    deadlines = {provider: start + get_discovery_timeout(provider) for provider in providers}
+
+    def worker(provider):
+        results.put(probe_provider(provider, refresh=refresh))
+
+    for provider in providers:
+        threading.Thread(target=worker, args=(provider,), name=f"discover-{provider}", daemon=True).start()
+
+    collected = {}
+
+    def report(result):
+        collected[result["provider"]] = result
+        if on_result:
+            on_result(result)
+
+    while len(collected) < len(providers):
+        pending = [provider for provider in providers if provider not in collected]
+        now = time.monotonic()
+
+        # Give up on every provider whose deadline has passed
+        for provider in pending:
+            if deadlines[provider] <= now:
+                report({
+                    "provider": provider,
+                    "status": STATUS_TIMEOUT,
+                    "models": [],
+                    "error": f"No answer after {get_discovery_timeout(provider):g}s",
+                    "elapsed": now - start,
+                })
+        pending = [provider for provider in pending if provider not in collected]
+        if not pending:
+            break
+
+        try:
+            result = results.get(timeout=min(deadlines[provider] for provider in pending) - now)
+        except queue.Empty:
+            continue
+        # A late answer from a provider that already timed out is dropped
+        if result["provider"] not in collected:
+            report(result)
+
+    return {provider: collected[provider] for provider in providers}
@@ -0,0 +1,194 @@
+import queue
+import sys
+import threading
+import time
+from .oneshot import check_provider
+from .providers import get_provider
+from .raw import is_raw_mode, print_raw_error
+from .tokens import estimate_tokens
+
+
+def parse_targets(arg):
+    """
+    Split `provider/model,provider/model,...` into (provider, model) pairs.
+
+    Returns:
+        tuple: (targets, error) where error is a message for the first invalid target
+    """
+    targets = []
+    for target in arg.split(','):
+        target = target.strip()
+        if not target:
+            continue
+        parts = target.split('/', 1)
+        if len(parts) != 2 or not all(parts):
+            return None, f"Invalid format: {target} (expected provider/modelname)"
+        targets.append((parts[0], parts[1]))
+    if not targets:
+        return None, f"Invalid format: {arg} (expected provider/modelname)"
+    return targets, None
+
+
+def complete(backend, model, prompt):
+    """
+    Answer a prompt with one model and time it.
+
+    Returns:
+        dict: {"target", "text", "error", "ttft", "elapsed", "tokens"}, times in seconds
+    """
+    result = {"target": f"{backend.name}/{model}", "text": None, "error": None,
+              "ttft": None, "elapsed": None, "tokens": None}
+    start = time.monotonic()
+    parts = []
+    try:
+        for content in backend.completion_stream(model, prompt):
+            if result["ttft"] is None:
+                result["ttft"] = time.monotonic() - start
+            parts.append(content)
+        result["text"] = "".join(parts)
+        result["tokens"] = estimate_tokens(result["text"])
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["elapsed"] = time.monotonic() - start
+    return result
+
+
+def fan_out(targets, prompt, on_result=None):
+    """
+    Send the same prompt to several models at once.
+
+    Each target runs in its own thread, so the wall time is the one of the
+    slowest model rather than the sum of all of them.
+
+    Args:
+        targets (list): (provider, model) pairs
+        prompt (str): The prompt sent to every model
+        on_result (callable): Called in the caller's thread with each result,
+            in completion order
+
+    Returns:
+        list: Result dicts of complete(), in completion order
+    """
+    results_queue = queue.Queue()
+
+    def worker(backend, model):
+        results_queue.put(complete(backend, model, prompt))
+
+    for provider, model in targets:
+        thread = threading.Thread(target=worker, args=(get_provider(provider), model), daemon=True)
+        thread.start()
+
+    results = []
+    while len(results) < len(targets):
+        result = results_queue.get()
+        results.append(result)
+        if on_result:
+            on_result(result)
+    return results
+
+
+def check_targets(targets):
+    """Return an error message if a target's provider is unknown or not configured"""
+    for provider, _ in targets:
+        error = check_provider(provider)
+        if error:
+            return error
+    return None
+
+
+def format_seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+
+def run_raw_fanout(targets, prompt):
+    """Write every answer as plain text, in completion order; the summary goes to stderr"""
+    def on_result(result):
+        sys.stdout.write(f"==> {result['target']} <==\n")
+        if result["error"] is None:
+            text = result["text"]
+            sys.stdout.write(text if text.endswith("\n") or not text else text + "\n")
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+        if result["error"] is not None:
+            print_raw_error(f"{result['target']}: {result['error']}")
+
+    start = time.monotonic()
+    results = fan_out(targets, prompt, on_result=on_result)
+    wall = time.monotonic() - start
+
+    for result in results:
+        tokens = "-" if result["tokens"] is None else f"~{result['tokens']}"
+        sys.stderr.write(f"{result['target']}\tttft={format_seconds(result['ttft'])}"
+                         f"\ttotal={format_seconds(result['elapsed'])}\ttokens={tokens}\n")
+    sys.stderr.write(f"Wall time: {wall:.2f}s\n")
+    return 1 if any(result["error"] is not None for result in results) else 0
+
+
+def run_fanout(arg1, prompt):
+    """
+    `llm run provider/model,provider/model "prompt"`
+
+    Answers are shown as each model finishes, followed by a table comparing
+    time to first token, total latency and output length.
+    """
+    targets, error = parse_targets(arg1)
+    if error is None:
+        error = check_targets(targets)
+
+    if is_raw_mode():
+        if error:
+            print_raw_error(error)
+            return 1
+        return run_raw_fanout(targets, prompt)
+
+    from rich.panel import Panel
+    from rich.status import Status
+    from rich.table import Table
+    from .render import console, render_answer, print_error
+
+    if error:
+        console.print(Panel(f"[bold red]{error}[/bold red]", title="Error", border_style="red", expand=False))
+        return 1
+
+    names = ", ".join(f"[green]{provider}[/green]/[cyan]{model}[/cyan]" for provider, model in targets)
+    console.print("")
+    console.print(Panel(
+        f"[bold]Using {names} to answer:[/bold]\n{prompt}",
+        border_style="blue",
+        expand=False
+    ))
+
+    pending = [f"{provider}/{model}" for provider, model in targets]
+    start = time.monotonic()
+    with Status(f"[bold green]Waiting for: [cyan]{', '.join(pending)}[/cyan]...", spinner="dots") as status:
+        def on_result(result):
+            pending.remove(result["target"])
+            # Print the answer above the spinner while the other models keep going
+            if result["error"] is None:
+                render_answer(result["target"], result["text"])
+            else:
+                print_error(f"{result['target']}: {result['error']}")
+            if pending:
+                status.update(f"[bold green]Waiting for: [cyan]{', '.join(pending)}[/cyan]...")
+
+        results = fan_out(targets, prompt, on_result=on_result)
+    wall = time.monotonic() - start
+
+    table = Table(show_header=True, header_style="bold green", title=f"Wall time: {wall:.2f}s")
+    table.add_column("Model", style="cyan")
+    table.add_column("Status")
+    table.add_column("First token", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("Output tokens (est.)", justify="right")
+    for result in results:
+        table.add_row(
+            result["target"],
+            "[green]ok[/green]" if result["error"] is None else "[red]error[/red]",
+            format_seconds(result["ttft"]),
+            format_seconds(result["elapsed"]),
+            "-" if result["tokens"] is None else str(result["tokens"]),
+        )
+    console.print("")
+    console.print(table)
+    console.print("")
+    return 1 if any(result["error"] is not None for result in results) else 0
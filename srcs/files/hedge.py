@@ -0,0 +1,200 @@
+import sys
+import time
+from .config import get_env_number
+from .streams import aclose_stream
+from .timings import record
+
+# Turned on by --fallback: comma-separated targets become a failover list
+# instead of a side by side comparison
+_fallback_mode = False
+
+# Seconds a target gets to produce its first token before the next one is
+# asked as well, PROMPTLY_FALLBACK_DEADLINE overrides it
+DEFAULT_FALLBACK_DEADLINE = 3.0
+
+
+def set_fallback_mode(value=True):
+    """Answer with the first target that streams (used by --fallback)"""
+    global _fallback_mode
+    _fallback_mode = value
+
+
+def is_fallback_mode():
+    return _fallback_mode
+
+
+def get_fallback_deadline():
+    """Seconds to wait for a first token before hedging with the next target"""
+    return max(0.0, get_env_number("PROMPTLY_FALLBACK_DEADLINE", DEFAULT_FALLBACK_DEADLINE))
+
+
+class AllTargetsFailed(Exception):
+    """Raised when no target of a --fallback list could answer"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = "; ".join(f"{target}: {error}" for target, error in errors)
+        super().__init__(f"Every target failed ({details})")
+
+
+async def _first_token(stream):
+    """Wait for the first piece of an answer, None if the answer is empty"""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def ahedged_stream(targets, prompt, deadline, on_event=None):
+    """
+    Stream the answer of the first target to produce a token.
+
+    The first target is asked alone. When it hasn't produced a first token
+    after `deadline` seconds, or fails, the next target is asked too, and so
+    on. The first one to stream wins; the others are cancelled, which closes
+    their HTTP streams. Targets that produce their first token at the same
+    time are ranked in the order given.
+
+    Args:
+        targets (list): (backend, model) pairs, in order of preference
+        prompt (str): The prompt
+        deadline (float): Seconds before hedging with the next target
+        on_event (callable): Called with (event, target, detail) where event is
+            "hedge" (a target is asked because the previous ones are late),
+            "failover" (because they failed) or "winner"
+
+    Yields:
+        str: Pieces of the winning answer
+    """
+    import asyncio
+
+    def notify(event, target, detail=None):
+        if on_event:
+            on_event(event, target, detail)
+
+    start = time.perf_counter()
+    names = [f"{backend.name}/{model}" for backend, model in targets]
+    streams = {}
+    tasks = {}
+    errors = []
+    launched = 0
+
+    def launch():
+        nonlocal launched
+        backend, model = targets[launched]
+        stream = backend.acompletion_stream(model, prompt).__aiter__()
+        streams[launched] = stream
+        tasks[asyncio.ensure_future(_first_token(stream))] = launched
+        launched += 1
+
+    winner = None
+    try:
+        launch()
+        while winner is None:
+            timeout = deadline if launched < len(targets) else None
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # Too slow: ask the next target as well, keep the others going
+                notify("hedge", names[launched], deadline)
+                launch()
+                continue
+
+            finished = sorted(done, key=lambda task: tasks[task])
+            for task in finished:
+                index = tasks.pop(task)
+                if task.exception() is None:
+                    if winner is None:
+                        winner, first = index, task.result()
+                    continue
+                errors.append((names[index], str(task.exception()) or type(task.exception()).__name__))
+                await aclose_stream(streams.pop(index))
+
+            if winner is None and not tasks:
+                if launched == len(targets):
+                    raise AllTargetsFailed(errors)
+                # Everything asked so far failed: go on without waiting
+                notify("failover", names[launched], errors[-1][1])
+                launch()
+    finally:
+        # Cancel the losers, or everything when interrupted
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for index, stream in list(streams.items()):
+            if index != winner:
+                await aclose_stream(stream)
+
+    record(f"first token ({names[winner]})", start, time.perf_counter() - start)
+    notify("winner", names[winner], None)
+
+    stream = streams[winner]
+    try:
+        if first is not None:
+            yield first
+            async for content in stream:
+                yield content
+    finally:
+        await aclose_stream(stream)
+
+
+def hedged_stream(targets, prompt, deadline=None, on_event=None):
+    """Sync version of ahedged_stream, the race runs on the background event loop"""
+    from .aio import iterate_sync
+
+    if deadline is None:
+        deadline = get_fallback_deadline()
+    return iterate_sync(ahedged_stream(targets, prompt, deadline, on_event))
+
+
+def run_hedged(arg1, prompt):
+    """
+    `llm run --fallback provider/model,provider/model "prompt"`
+
+    Answers with the first model, hedging with the next ones when it is slow
+    to start or fails; see ahedged_stream.
+    """
+    from .fanout import parse_targets, check_targets
+    from .providers import get_provider
+    from .raw import is_raw_mode, print_raw_error, write_raw_stream
+
+    targets, error = parse_targets(arg1)
+    if error is None:
+        error = check_targets(targets)
+    raw = is_raw_mode()
+
+    if error:
+        if raw:
+            print_raw_error(error)
+        else:
+            from rich.panel import Panel
+            from .render import console
+            console.print(Panel(f"[bold red]{error}[/bold red]", title="Error", border_style="red", expand=False))
+        return 1
+
+    backends = [(get_provider(provider), model) for provider, model in targets]
+    winner = {"target": None}
+
+    def on_event(event, target, detail):
+        if event == "winner":
+            winner["target"] = target
+            return
+        if event == "hedge":
+            message = f"No first token after {detail:.1f}s, also asking {target}"
+        else:
+            message = f"Failed ({detail}), asking {target}"
+        if raw:
+            sys.stderr.write(f"{message}\n")
+            sys.stderr.flush()
+        else:
+            from .render import console
+            console.print(f"[yellow]{message}[/yellow]")
+
+    chunks = hedged_stream(backends, prompt, on_event=on_event)
+    if raw:
+        result = write_raw_stream(chunks)
+    else:
+        from .render import render_stream
+        # The header names the target that actually answered
+        result = render_stream(arg1.split(',')[0].strip(), chunks, title=lambda: winner["target"])
+    return 0 if result is not None else 1
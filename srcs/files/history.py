@@ -0,0 +1,210 @@
+import datetime
+import os
+import threading
+from prompt_toolkit.history import History
+from .config import CONFIG_DIR, atomic_write
+
+# One history file per kind of prompt, in prompt_toolkit's FileHistory format
+HISTORY_DIR = os.path.join(CONFIG_DIR, 'history')
+
+# History shared by every prompt before namespaces existed
+LEGACY_HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".promptly_history")
+
+# Entries kept per namespace, PROMPTLY_<NAMESPACE>_HISTORY_SIZE overrides them
+HISTORY_SIZES = {
+    "provider": 100,
+    "model": 100,
+    "chat": 5000,
+}
+DEFAULT_HISTORY_SIZE = 1000
+
+# Compaction starts once the file holds this many times the entries it keeps
+COMPACTION_FACTOR = 2
+
+# Bytes read at a time when loading the end of a history file
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def get_history_size(namespace):
+    """Get the number of entries kept for a namespace"""
+    default = HISTORY_SIZES.get(namespace, DEFAULT_HISTORY_SIZE)
+    value = os.environ.get(f"PROMPTLY_{namespace.upper()}_HISTORY_SIZE")
+    try:
+        return max(1, int(value)) if value else default
+    except ValueError:
+        return default
+
+
+def parse_history(data):
+    """Entries of FileHistory formatted bytes, oldest first"""
+    entries = []
+    lines = []
+
+    def add():
+        if lines:
+            # Join and drop trailing newline
+            entries.append("".join(lines)[:-1])
+
+    for line in data.decode("utf-8", errors="replace").splitlines(keepends=True):
+        if line.startswith("+"):
+            lines.append(line[1:])
+        else:
+            add()
+            lines = []
+    add()
+    return entries
+
+
+def read_last_entries(path, count):
+    """
+    Read the last `count` entries of a history file, oldest first.
+
+    The file is read backwards block by block, so the cost depends on the
+    number of entries wanted, not on the size of the file.
+
+    Returns:
+        tuple: (entries, total) where total is None unless the whole file was read
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        while position > 0:
+            size = min(READ_BLOCK_SIZE, position)
+            position -= size
+            f.seek(position)
+            data = f.read(size) + data
+            # Every entry starts with a "# timestamp" line; one more than
+            # needed guarantees the oldest kept entry is complete
+            if data.count(b"\n#") > count:
+                break
+
+    # Drop the partial entry at the start of the data
+    if position > 0:
+        data = data[data.index(b"\n#"):]
+    entries = parse_history(data)
+    total = len(entries) if position == 0 else None
+    return entries[-count:], total
+
+
+class BoundedFileHistory(History):
+    """
+    File history keeping only the most recent entries.
+
+    Only the last `max_entries` entries are loaded, whatever the size of the
+    file. Once the file holds too many entries it is compacted in a
+    background thread, keeping the most recent ones.
+    """
+
+    def __init__(self, filename, max_entries):
+        self.filename = filename
+        self.max_entries = max_entries
+        # Entries in the file, None until known
+        self._entry_count = None
+        self._compacting = False
+        self._lock = threading.Lock()
+        # Held while the file is written, so compaction can't lose an entry
+        self._file_lock = threading.Lock()
+        super().__init__()
+
+    def load_history_strings(self):
+        try:
+            entries, self._entry_count = read_last_entries(self.filename, self.max_entries)
+        except OSError:
+            entries = []
+            if not os.path.exists(self.filename):
+                self._entry_count = 0
+        # Newest items have to go first
+        return reversed(entries)
+
+    def store_string(self, string):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        with self._file_lock:
+            with open(self.filename, "ab") as f:
+                f.write(format_entry(string))
+
+        if self._entry_count is None:
+            # Entries before the loaded tail are unknown, assume the file is full
+            self._entry_count = self.max_entries
+        self._entry_count += 1
+        if self._entry_count > self.max_entries * COMPACTION_FACTOR:
+            self.compact_in_background()
+
+    def write(self, entries):
+        """Replace the file with the given entries"""
+        with atomic_write(self.filename, "wb") as f:
+            for entry in entries:
+                f.write(format_entry(entry))
+
+    def compact(self):
+        """Rewrite the file with only the most recent entries"""
+        with self._file_lock:
+            with open(self.filename, "rb") as f:
+                data = f.read()
+            entries = parse_history(data)[-self.max_entries:]
+            self.write(entries)
+            self._entry_count = len(entries)
+
+    def compact_in_background(self):
+        """Compact the file without delaying the prompt"""
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def worker():
+            try:
+                self.compact()
+            except OSError:
+                # Compaction only saves space, the history still works without it
+                pass
+            finally:
+                with self._lock:
+                    self._compacting = False
+
+        threading.Thread(target=worker, daemon=True).start()
+
+
+def format_entry(string):
+    """Format an entry like prompt_toolkit's FileHistory"""
+    lines = [f"\n# {datetime.datetime.now()}\n"]
+    lines.extend(f"+{line}\n" for line in string.split("\n"))
+    return "".join(lines).encode("utf-8")
+
+
+def read_legacy_chat_entries(count):
+    """
+    Chat entries of ~/.promptly_history, oldest first.
+
+    Provider and model picks were stored in the same file; numbers and
+    provider names are left out.
+    """
+    from .providers import provider_names
+
+    try:
+        entries, _ = read_last_entries(LEGACY_HISTORY_FILE, count * COMPACTION_FACTOR)
+    except OSError:
+        return []
+    names = set(provider_names())
+    return [entry for entry in entries if not entry.strip().isdigit() and entry.strip() not in names][-count:]
+
+
+def get_history(namespace):
+    """
+    Get the history of a kind of prompt: "provider", "model" or "chat".
+
+    The first time, the chat history is seeded with the chats of the legacy
+    ~/.promptly_history.
+    """
+    history = BoundedFileHistory(
+        os.path.join(HISTORY_DIR, f"{namespace}.history"),
+        get_history_size(namespace),
+    )
+    if namespace == "chat" and not os.path.exists(history.filename) and os.path.exists(LEGACY_HISTORY_FILE):
+        entries = read_legacy_chat_entries(history.max_entries)
+        if entries:
+            try:
+                history.write(entries)
+            except OSError:
+                pass
+    return history
@@ -1,4 +1,4 @@
-from files.config import get_available_providers, get_ollama_addr
+from files.config import get_ollama_addr
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
@@ -6,35 +6,138 @@ from rich.text import Text
 from rich.box import ROUNDED
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from .llm_global import retrieve_models
+from .providers import provider_names, get_provider, lacks_api_key
+from .discovery import (discover_models, STATUS_OK, STATUS_NO_KEY, STATUS_AUTH_ERROR,
+                        STATUS_TIMEOUT, STATUS_ERROR)
+
+# Provider colors for consistent styling
+PROVIDER_COLORS = {
+    "openai": "green",
+    "mistral": "blue",
+    "anthropic": "magenta",
+    "deepseek": "yellow",
+    "gemini": "cyan",
+    "ollama": "red"
+}
+
+# Explanations shown for providers that didn't return any model
+STATUS_MESSAGES = {
+    STATUS_OK: "No models found. Possible API key or connection issue.",
+    STATUS_NO_KEY: "No API key configured.",
+    STATUS_AUTH_ERROR: "Authentication failed. Check that your API key is valid.",
+    STATUS_TIMEOUT: "No answer in time. Possible network or server issue.",
+    STATUS_ERROR: "Request failed. Possible API key or connection issue.",
+}
+
+
+def print_provider_models(console, provider, models):
+    """Print the models of a provider in a table inside a panel"""
+    color = PROVIDER_COLORS.get(provider, "white")
+
+    # Create a table for this provider - removed show_header
+    table = Table(
+        show_header=False,  # Removed table header
+        box=ROUNDED,
+        title=f"{provider.upper()} Models",
+        title_style=f"bold {color}",
+        expand=True
+    )
+    
+    # Check the format of the models
+    if provider == "ollama" and models and isinstance(models[0], dict):
+        # Add columns but they won't be displayed as headers
+        table.add_column(style=color)  # Model name column
+        table.add_column(style="dim")  # Size column
+        table.add_column(style="italic")  # Family column
+        
+        # Sort models alphabetically
+        sorted_models = sorted(models, key=lambda x: x.get('name', '').lower())
+        
+        # Add rows
+        for model in sorted_models:
+            name = model.get('name', 'Unknown')
+            size = model.get('size', 'Unknown')
+            family = model.get('family', 'Unknown')
+            
+            # Format size in GB if available
+            if isinstance(size, int) and size > 0:
+                size = f"{size / 1_000_000_000:.2f} GB"
+            
+            table.add_row(name, size, family)
+    else:
+        # For other providers or string-based models
+        table.add_column(style=color)  # Single column with no header
+        
+        # Sort models alphabetically 
+        if isinstance(models, list):
+            # Handle different model formats - could be strings, dicts, or other objects
+            sorted_models = []
+            for model in models:
+                if isinstance(model, dict) and 'name' in model:
+                    sorted_models.append(model['name'])
+                elif isinstance(model, str):
+                    sorted_models.append(model)
+                else:
+                    # Try to convert the model to a string
+                    sorted_models.append(str(model))
+            
+            # Sort the model names
+            sorted_models.sort(key=str.lower)
+            
+            # Add rows
+            for model_name in sorted_models:
+                table.add_row(model_name)
+    
+    # Display the table in a panel
+    console.print(Panel(
+        table,
+        border_style=color,
+        padding=(1, 2)
+    ))
+    console.print()  # Add some space between providers
+
 
 def list_models():
     console = Console()
-    providers = ["openai", "mistral", "anthropic", "deepseek", "gemini", "ollama"]
     
-    # 1. Get all providers with API keys
-    keys = get_available_providers()
-    if "ollama" in keys:
-        keys.remove("ollama")
-        #console.print(f"[green]Ollama address: {get_ollama_addr()}[/green]")
-    #console.print(f"[green]Providers with API keys: {keys}[/green]")
+    # 1. Get all providers that may be usable: the built-in ones without their
+    # API key are left out here, plugins needing a key are left out once built
+    # (discovery reports them as STATUS_NO_KEY, see Provider.is_configured)
+    keys = [provider for provider in provider_names() if not lacks_api_key(provider)]
 
-    # 2. Get all models for each provider with a spinner
-    keys.append("ollama")
-    all_models = {}
+    # 2. Query every provider concurrently and print each one as soon as it answers
+    answered = []
+    unconfigured = []
+    
+    # Track providers with issues to list them at the end
+    error_providers = []
     
     with Progress(
         SpinnerColumn(),
-        TextColumn("[bold blue]Fetching models..."),
+        TextColumn("[bold blue]{task.description}"),
         console=console
     ) as progress:
-        progress.add_task("Fetching", total=None)
-        for provider in keys:
-            models = retrieve_models(provider)
-            # Include empty model lists to track providers that returned no models
-            all_models[provider] = models if models else []
+        task = progress.add_task(f"Fetching models... (0/{len(keys)})", total=None)
+
+        def on_result(result):
+            provider = result["provider"]
+            answered.append(provider)
+            progress.update(task, description=f"Fetching models... ({len(answered)}/{len(keys)})")
+
+            if result["status"] == STATUS_NO_KEY:
+                unconfigured.append(provider)
+                return
+            if not result["models"]:
+                error_providers.append(result)
+                return
+            if len(answered) - len(error_providers) - len(unconfigured) == 1:
+                console.print()
+            print_provider_models(console, provider, result["models"])
 
-    # 3. Print all models in gorgeous tables
-    if all(len(models) == 0 for models in all_models.values()):
+        discover_models(keys, on_result=on_result)
+
+    # 3. Nothing to show at all
+    if len(error_providers) + len(unconfigured) == len(keys):
         console.print(Panel.fit(
             "[yellow]No models found for any provider.[/yellow]\n"
             "[yellow]Please check your API keys and connections.[/yellow]",
@@ -42,91 +145,6 @@ def list_models():
             border_style="red"
         ))
         return
-        
-    console.print()
-    
-    # Track providers with issues to list them at the end
-    error_providers = []
-    
-    # Create tables for each provider with models
-    for provider, models in all_models.items():
-        # Create provider header with appropriate color
-        provider_colors = {
-            "openai": "green",
-            "mistral": "blue",
-            "anthropic": "magenta",
-            "deepseek": "yellow",
-            "gemini": "cyan",
-            "ollama": "red"
-        }
-        color = provider_colors.get(provider, "white")
-        
-        # Check if provider has models
-        if not models:
-            error_providers.append((provider, color))
-            continue
-        
-        # Create a table for this provider - removed show_header
-        table = Table(
-            show_header=False,  # Removed table header
-            box=ROUNDED,
-            title=f"{provider.upper()} Models",
-            title_style=f"bold {color}",
-            expand=True
-        )
-        
-        # Check the format of the models
-        if provider == "ollama" and models and isinstance(models[0], dict):
-            # Add columns but they won't be displayed as headers
-            table.add_column(style=color)  # Model name column
-            table.add_column(style="dim")  # Size column
-            table.add_column(style="italic")  # Family column
-            
-            # Sort models alphabetically
-            sorted_models = sorted(models, key=lambda x: x.get('name', '').lower())
-            
-            # Add rows
-            for model in sorted_models:
-                name = model.get('name', 'Unknown')
-                size = model.get('size', 'Unknown')
-                family = model.get('family', 'Unknown')
-                
-                # Format size in GB if available
-                if isinstance(size, int) and size > 0:
-                    size = f"{size / 1_000_000_000:.2f} GB"
-                
-                table.add_row(name, size, family)
-        else:
-            # For other providers or string-based models
-            table.add_column(style=color)  # Single column with no header
-            
-            # Sort models alphabetically 
-            if isinstance(models, list):
-                # Handle different model formats - could be strings, dicts, or other objects
-                sorted_models = []
-                for model in models:
-                    if isinstance(model, dict) and 'name' in model:
-                        sorted_models.append(model['name'])
-                    elif isinstance(model, str):
-                        sorted_models.append(model)
-                    else:
-                        # Try to convert the model to a string
-                        sorted_models.append(str(model))
-                
-                # Sort the model names
-                sorted_models.sort(key=str.lower)
-                
-                # Add rows
-                for model_name in sorted_models:
-                    table.add_row(model_name)
-        
-        # Display the table in a panel
-        console.print(Panel(
-            table,
-            border_style=color,
-            padding=(1, 2)
-        ))
-        console.print()  # Add some space between providers
     
     # Show providers with zero models
     if error_providers:
@@ -141,10 +159,12 @@ def list_models():
         issue_table.add_column(style="red")
         issue_table.add_column(style="yellow", ratio=3)
         
-        for provider, color in error_providers:
+        for result in error_providers:
+            provider = result["provider"]
+            color = PROVIDER_COLORS.get(provider, "white")
             issue_table.add_row(
                 f"[bold {color}]{provider.upper()}[/bold {color}]",
-                "[yellow]No models found. Possible API key or connection issue.[/yellow]"
+                f"[yellow]{STATUS_MESSAGES.get(result['status'], STATUS_MESSAGES[STATUS_ERROR])}[/yellow]"
             )
         
         console.print(Panel(
@@ -176,7 +196,7 @@ def list_models_with_provider(provider):
     provider = provider.lower()
     
     # Validate that the provider is supported
-    supported_providers = ["openai", "mistral", "anthropic", "deepseek", "gemini", "ollama"]
+    supported_providers = provider_names()
     
     if provider not in supported_providers:
         console.print(Panel(
@@ -187,19 +207,10 @@ def list_models_with_provider(provider):
         ))
         return
     
-    # Provider colors for consistent styling
-    provider_colors = {
-        "openai": "green",
-        "mistral": "blue",
-        "anthropic": "magenta",
-        "deepseek": "yellow",
-        "gemini": "cyan",
-        "ollama": "red"
-    }
-    color = provider_colors.get(provider, "white")
+    color = PROVIDER_COLORS.get(provider, "white")
     
-    # Check if the provider has a configured API key
-    if provider != "ollama" and provider not in get_available_providers():
+    # Check if the provider has a configured API key (or doesn't need one)
+    if lacks_api_key(provider) or not get_provider(provider).is_configured():
         console.print(Panel(
             f"[red]No API key found for {provider.upper()}.[/red]\n"
             f"[yellow]Please add your {provider.upper()}_API_KEY to your .env file.[/yellow]",
@@ -1,182 +1,109 @@
+import itertools
+from functools import lru_cache
 from google import genai
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.text import Text
-from io import StringIO
+from google.genai import types
+from .clients import get_async_client
+from .providers import Provider
 
+# The SDK doesn't close a stream's HTTP response when iteration stops early
+# (Ctrl+C, cancelled fallback), and closing the pooled client would kill the
+# other streams using it. So every stream tags its requests with this header;
+# the client's hooks strip it before sending and record the responses, which
+# the stream closes itself.
+STREAM_HEADER = "x-promptly-stream"
 
-def get_gemini_models(api_key):
+# Stream id -> HTTP responses opened for that stream
+_stream_responses = {}
+_stream_ids = itertools.count()
+
+
+async def _tag_request(request):
+    stream_id = request.headers.pop(STREAM_HEADER, None)
+    if stream_id is not None:
+        request.extensions["promptly_stream"] = stream_id
+
+
+async def _track_response(response):
+    responses = _stream_responses.get(response.request.extensions.get("promptly_stream"))
+    if responses is not None:
+        responses.append(response)
+
+
+def get_gemini_client(api_key, base_url=None):
+    """Get the pooled Gemini client (used through its `aio` interface) for an API key and endpoint"""
+    def factory():
+        import httpx
+
+        http_options = {
+            # Timeouts are set per request by the SDK (none by default)
+            "httpx_async_client": httpx.AsyncClient(
+                timeout=None,
+                event_hooks={"request": [_tag_request], "response": [_track_response]},
+            ),
+        }
+        if base_url:
+            http_options["base_url"] = base_url
+        return genai.Client(api_key=api_key, http_options=http_options)
+    return get_async_client("gemini", api_key, base_url, factory)
+
+
+async def get_gemini_models(api_key, base_url=None):
     """Get all models from the Gemini API"""
-    try:
-        client = genai.Client(api_key=api_key)
-        models = client.models.list()
-        res = [model.name for model in models]
-        return res
-    except Exception as e:
-        return []
+    client = get_gemini_client(api_key, base_url)
+    res = [model.name async for model in await client.aio.models.list()]
+    return res
 
 
-def gemini_single_completion(model, prompt, api_key):
-    console = Console()
-    try:
-        full_response = StringIO()
-        output_produced = False
+# Gemini calls the assistant role "model"
+GEMINI_ROLES = {"user": "user", "assistant": "model"}
 
-        console.print(Panel(
-            "[italic]Generating response...[/italic]",
-            title=f"[bold blue]{model}[/bold blue] response",
-            border_style="cyan",
-            padding=(0, 1),
-            expand=False
-        ))
+# Converted messages kept between turns, so each chat turn only converts the new ones
+GEMINI_CONTENT_CACHE_SIZE = 1024
 
-        console.print("", end="")
 
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content_stream(
+@lru_cache(maxsize=GEMINI_CONTENT_CACHE_SIZE)
+def to_gemini_content(role, content):
+    """Convert one message to a Gemini Content (memoized)"""
+    return types.Content(role=GEMINI_ROLES[role], parts=[types.Part(text=content)])
+
+
+def build_gemini_contents(messages):
+    """Convert the conversation into role-tagged Gemini contents"""
+    # Only include compatible roles (user, assistant)
+    return [
+        to_gemini_content(msg["role"], msg["content"])
+        for msg in messages
+        if msg["role"] in GEMINI_ROLES
+    ]
+
+
+async def gemini_stream_chat(model, messages, api_key, base_url=None):
+    """Stream a chat completion from the Gemini API"""
+    client = get_gemini_client(api_key, base_url)
+    stream_id = str(next(_stream_ids))
+    _stream_responses[stream_id] = []
+    try:
+        response = await client.aio.models.generate_content_stream(
             model=model,
-            contents=prompt,
+            contents=build_gemini_contents(messages),
+            config=types.GenerateContentConfig(http_options=types.HttpOptions(headers={STREAM_HEADER: stream_id})),
         )
-        
-        for chunk in response:
+
+        async for chunk in response:
             if hasattr(chunk, 'text') and chunk.text:
-                content = chunk.text
-                console.print(content, end="")
-                full_response.write(content)
-                output_produced = True
-        
-        # Print a newline for proper spacing
-        console.print("\n")
-
-        if output_produced:
-            text_response = full_response.getvalue()
-            
-            # 1. Display plaintext response in a panel
-            plaintext_panel = Panel(
-                Text(text_response),
-                title=f"[bold blue]{model}[/bold blue] response",
-                subtitle="Plaintext output",
-                border_style="cyan",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(plaintext_panel)
-            
-            # Add a small separator
-            console.print("")
-            
-            # 2. Display markdown response in a panel
-            md = Markdown(text_response)
-            markdown_panel = Panel(
-                md,
-                title=f"[bold blue]{model}[/bold blue] response",
-                subtitle="Rendered as Markdown",
-                border_style="green",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(markdown_panel)
-            console.print()
-            
-            return "Output displayed in both formats"
-        else:
-            return ""
-
-    except Exception as e:
-        console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
-        return str(e)
-
-
-def gemini_chat_completion(model, prompt, messages, api_key):
-    """Send a chat request to the model"""
-    console = Console()
-    
-    try:
-        client = genai.Client(api_key=api_key)
-        
-        # Prepare the content for Gemini
-        # For Gemini, we need to convert the message history into a structured content format
-        gemini_content = []
-        
-        if messages:
-            # Convert the message history into a text representation that Gemini can understand
-            conversation_text = ""
-            for msg in messages:
-                role = msg["role"]
-                content = msg["content"]
-                
-                # Format each message with a clear role indicator
-                if role == "user":
-                    conversation_text += f"User: {content}\n\n"
-                elif role == "assistant":
-                    conversation_text += f"Assistant: {content}\n\n"
-            
-            # Add the conversation history to the content
-            gemini_content.append(conversation_text)
-        
-        # Add the current prompt if provided
-        if prompt:
-            if gemini_content:
-                gemini_content.append(f"User: {prompt}")
-            else:
-                gemini_content.append(prompt)
-        
-        # Join the content parts together
-        final_content = "\n".join(gemini_content) if gemini_content else ""
-        
-        # If no content, return early
-        if not final_content:
-            console.print("[bold yellow]Warning: No content to send to the model[/bold yellow]")
-            return ""
-        
-        # Use StringIO objects to collect the response text
-        full_response = StringIO()
-        
-        # Track if we've printed anything
-        output_produced = False
-        
-        # Display a fancy animated loading indicator
-        with console.status(f"[bold blue]{model}[/bold blue] is thinking...", spinner="dots12") as status:
-            # Create the streaming request using the API method we know works
-            response = client.models.generate_content_stream(
-                model=model,
-                contents=final_content,
-            )
-            
-            # Process the streaming chunks
-            for chunk in response:
-                if hasattr(chunk, 'text') and chunk.text:
-                    content = chunk.text
-                    # Just accumulate the response without printing incrementally
-                    full_response.write(content)
-                    output_produced = True
-        
-        # If we got a response, render it as markdown inside a panel
-        if output_produced:
-            # Get the complete text
-            text_response = full_response.getvalue()
-            
-            # Add a newline before displaying the response
-            console.print("")
-            
-            # Display only the markdown response in a panel (no plaintext panel)
-            md = Markdown(text_response)
-            markdown_panel = Panel(
-                md,
-                title=f"[bold blue]{model}[/bold blue] response",
-                border_style="green",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(markdown_panel)
-            console.print()
-            
-            # Return the generated text response
-            return text_response
-        else:
-            return ""
-            
-    except Exception as e:
-        console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
-        return ""
\ No newline at end of file
+                yield chunk.text
+    finally:
+        # A no-op for responses read to the end; for a stream stopped early
+        # this drops its connection, leaving the pooled client alone
+        for http_response in _stream_responses.pop(stream_id):
+            await http_response.aclose()
+
+
+class GeminiProvider(Provider):
+    name = "gemini"
+
+    async def alist_models(self):
+        return await get_gemini_models(self.get_api_key(), self.get_base_url())
+
+    def astream_chat(self, model, messages):
+        return gemini_stream_chat(model, messages, self.get_api_key(), self.get_base_url())
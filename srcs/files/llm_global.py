@@ -1,60 +1,121 @@
-from files.config import get_api_key, get_ollama_addr
-from .llm_ollama import get_ollama_models, ollama_single_completion, ollama_chat_completion
-from .llm_openai import get_openai_models, openai_single_completion, openai_chat_completion
-from .llm_deepseek import get_deepseek_models, deepseek_single_completion, deepseek_chat_completion
-from .llm_gemini import get_gemini_models, gemini_single_completion, gemini_chat_completion
-from .llm_mistral import get_mistral_models, mistral_single_completion, mistral_chat_completion
-from .llm_anthropic import get_anthropic_models, anthropic_single_completion, anthropic_chat_completion
-
-
-def retrieve_models(provider):
-    """Retrieve all models for a given provider"""
-    if provider == "ollama":
-        return get_ollama_models(get_ollama_addr())
-    elif provider == "openai":
-        return get_openai_models(get_api_key(provider))
-    elif provider == "deepseek":
-        return get_deepseek_models(get_api_key(provider))
-    elif provider == "gemini":
-        return get_gemini_models(get_api_key(provider))
-    elif provider == "mistral":
-        return get_mistral_models(get_api_key(provider))
-    elif provider == "anthropic":
-        return get_anthropic_models(get_api_key(provider))
-    else:
-        pass
+from .catalog import (catalog_source, get_cached_models, is_force_refresh, is_stale,
+                      refresh_in_background, save_models)
+from .providers import get_provider
+from .timings import span
+
+
+def fetch_models(provider):
+    """Fetch the live model list for a given provider"""
+    backend = get_provider(provider)
+    if backend is None:
+        return []
+    with span(f"fetch models: {provider}"):
+        return backend.list_models()
+
+
+def load_models(provider, refresh=False):
+    """
+    Load all models for a given provider, raising if the provider can't be reached.
+
+    Entries from the on-disk catalog are returned right away; stale ones are
+    refetched in the background. Set `refresh` (or pass --refresh) to skip the
+    catalog and hit the provider directly.
+    """
+    backend = get_provider(provider)
+    if backend is None:
+        return []
+    source = catalog_source(backend.catalog_credential())
+
+    if not refresh and not is_force_refresh():
+        models, fetched_at = get_cached_models(provider, source)
+        if models is not None:
+            if is_stale(fetched_at):
+                refresh_in_background(provider, source, lambda: fetch_models(provider))
+            return models
+
+    models = fetch_models(provider)
+    # Empty lists usually mean a misconfigured provider, don't cache those
+    if models:
+        save_models(provider, source, models)
+    return models
+
+
+def retrieve_models(provider, refresh=False):
+    """Retrieve all models for a given provider, or [] if it can't be reached"""
+    try:
+        return load_models(provider, refresh=refresh)
+    except Exception:
+        return []
+
 
 def single_completion(provider, model, prompt):
     """Send a single request to the model"""
-    if provider == "ollama":
-        return ollama_single_completion(model, prompt)
-    elif provider == "openai":
-        return openai_single_completion(model, prompt, get_api_key(provider))
-    elif provider == "deepseek":
-        return deepseek_single_completion(model, prompt, get_api_key(provider))
-    elif provider == "gemini":
-        return gemini_single_completion(model, prompt, get_api_key(provider))
-    elif provider == "mistral":
-        return mistral_single_completion(model, prompt, get_api_key(provider))
-    elif provider == "anthropic":
-        return anthropic_single_completion(model, prompt, get_api_key(provider))
-    else:
-        pass
+    backend = get_provider(provider)
+    if backend is None:
+        return None
+    return backend.single_completion(model, prompt)
 
 
 def chat_completion(provider, model, prompt, messages):
     """Send a chat request to the model"""
-    if provider == "ollama":
-        return ollama_chat_completion(model, prompt, messages)
-    elif provider == "openai":
-        return openai_chat_completion(model, prompt, messages, get_api_key(provider))
-    elif provider == "deepseek":
-        return deepseek_chat_completion(model, prompt, messages, get_api_key(provider))
-    elif provider == "gemini":
-        return gemini_chat_completion(model, prompt, messages, get_api_key(provider))
-    elif provider == "mistral":
-        return mistral_chat_completion(model, prompt, messages, get_api_key(provider))
-    elif provider == "anthropic":
-        return anthropic_chat_completion(model, prompt, messages, get_api_key(provider))
-    else:
-        pass
\ No newline at end of file
+    backend = get_provider(provider)
+    if backend is None:
+        return None
+    return backend.chat_completion(model, prompt, messages)
+
+
+# Async equivalents, for callers running many requests on one event loop.
+# They return the answer's text without displaying it.
+
+async def afetch_models(provider):
+    """Async version of fetch_models"""
+    backend = get_provider(provider)
+    if backend is None:
+        return []
+    with span(f"fetch models: {provider}"):
+        return await backend.alist_models()
+
+
+async def aload_models(provider, refresh=False):
+    """Async version of load_models"""
+    backend = get_provider(provider)
+    if backend is None:
+        return []
+    source = catalog_source(backend.catalog_credential())
+
+    if not refresh and not is_force_refresh():
+        models, fetched_at = get_cached_models(provider, source)
+        if models is not None:
+            if is_stale(fetched_at):
+                refresh_in_background(provider, source, lambda: fetch_models(provider))
+            return models
+
+    models = await afetch_models(provider)
+    # Empty lists usually mean a misconfigured provider, don't cache those
+    if models:
+        save_models(provider, source, models)
+    return models
+
+
+async def aretrieve_models(provider, refresh=False):
+    """Async version of retrieve_models"""
+    try:
+        return await aload_models(provider, refresh=refresh)
+    except Exception:
+        return []
+
+
+async def asingle_completion(provider, model, prompt):
+    """Send a single request to the model and return the answer, None if the provider is unknown"""
+    backend = get_provider(provider)
+    if backend is None:
+        return None
+    return await backend.asingle_completion(model, prompt)
+
+
+async def achat_completion(provider, model, prompt, messages):
+    """Send a chat request to the model and return the answer, None if the provider is unknown"""
+    backend = get_provider(provider)
+    if backend is None:
+        return None
+    return await backend.achat_completion(model, prompt, messages)
@@ -1,178 +1,244 @@
+import asyncio
+import os
+import sys
+import time
 import ollama
-from .config import get_ollama_addr
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.text import Text
-from io import StringIO
+from .clients import get_async_client
+from .config import get_ollama_addr, get_ollama_addrs
+from .model_check import looks_like_unknown_model
+from .ollama_hosts import get_hosts, rank_hosts, save_states
+from .providers import Provider
 
+# Model options read from PROMPTLY_OLLAMA_<OPTION> and sent with every request
+# (e.g. PROMPTLY_OLLAMA_NUM_CTX=8192). Unset ones keep the server's defaults.
+OLLAMA_OPTIONS = ("num_ctx", "num_thread", "num_gpu")
 
-def get_ollama_models(addr):
-    """Get all models from the Ollama server"""
-    try:
-        client = ollama.Client(host=addr)
-        models = client.list()
-        res = [model["model"] for model in models["models"]]
-        return res
-    except Exception as e:
-        return []
-
-
-def ollama_single_completion(model, prompt):
-    """Send a single request to the model"""
-    console = Console()
-    
+# Seconds to wait for a server to accept a connection, so a dead one is
+# skipped quickly. Answers themselves may take as long as they need.
+CONNECT_TIMEOUT = 5
+
+
+def get_ollama_client(addr):
+    """Get the pooled async Ollama client for a server address"""
+    def create():
+        import httpx
+        return ollama.AsyncClient(host=addr, timeout=httpx.Timeout(None, connect=CONNECT_TIMEOUT))
+
+    return get_async_client("ollama", None, addr, create)
+
+
+def get_ollama_options():
+    """Model options set in the environment, as sent to Ollama"""
+    options = {}
+    for option in OLLAMA_OPTIONS:
+        value = os.environ.get(f"PROMPTLY_OLLAMA_{option.upper()}")
+        if not value:
+            continue
+        try:
+            options[option] = int(value)
+        except ValueError:
+            # A typo shouldn't break every request, the server default is used
+            pass
+    return options
+
+
+def get_keep_alive(value=None):
+    """
+    How long the server keeps a model loaded after a request.
+
+    Args:
+        value (str): Duration to use instead of PROMPTLY_OLLAMA_KEEP_ALIVE
+
+    Returns:
+        A duration Ollama understands ("30m", "2h", seconds as a number, -1
+        to keep the model loaded forever), or None for the server's default
+    """
+    value = value or os.environ.get("PROMPTLY_OLLAMA_KEEP_ALIVE")
+    if not value:
+        return None
     try:
-        client = ollama.Client(host=get_ollama_addr())
-        response = client.chat(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            stream=True
-        )
-        
-        # Use StringIO objects to collect the response text
-        full_response = StringIO()
-        
-        # Track if we've printed anything
-        output_produced = False
-        
-        # Print a panel header first to indicate streaming is starting
-        console.print(Panel(
-            "[italic]Generating response...[/italic]",
-            title=f"[bold blue]{model}[/bold blue] response",
-            border_style="cyan",
-            padding=(0, 1),
-            expand=False
-        ))
-        
-        # For streaming display, we'll print plain text as it comes in
-        console.print("", end="")  # Start on a new line
-        for chunk in response:
-            content = ""
-            if "message" in chunk and "content" in chunk["message"]:
-                content = chunk["message"]["content"]
-            elif "response" in chunk:
-                content = chunk["response"]
-                
-            if content:
-                console.print(content, end="")
-                full_response.write(content)
-                output_produced = True
-        
-        # Print a newline for proper spacing
-        console.print("\n")
-        
-        # If we got a response, render it as markdown inside a panel
-        if output_produced:
-            # Get the complete text
-            text_response = full_response.getvalue()
-            
-            # 1. Display plaintext response in a panel
-            plaintext_panel = Panel(
-                Text(text_response),
-                title=f"[bold blue]{model}[/bold blue] response",
-                subtitle="Plaintext output",
-                border_style="cyan",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(plaintext_panel)
-            
-            # Add a small separator
-            console.print("")
-            
-            # 2. Display markdown response in a panel
-            md = Markdown(text_response)
-            markdown_panel = Panel(
-                md,
-                title=f"[bold blue]{model}[/bold blue] response",
-                subtitle="Rendered as Markdown",
-                border_style="green",
-                padding=(1, 2),
-                expand=False
+        # Bare numbers are seconds
+        return int(value)
+    except ValueError:
+        return value
+
+
+async def get_ollama_models(addr):
+    """Get all models from the Ollama server"""
+    client = get_ollama_client(addr)
+    models = await client.list()
+    res = [model["model"] for model in models["models"]]
+    return res
+
+
+async def get_all_ollama_models(addrs):
+    """
+    Get the models of every Ollama server, without duplicates.
+
+    Servers that can't be reached are skipped; the error is only raised if
+    none of them answers.
+    """
+    hosts = get_hosts(addrs)
+    results = await asyncio.gather(*[get_ollama_models(host.addr) for host in hosts], return_exceptions=True)
+
+    res = []
+    errors = []
+    for host, result in zip(hosts, results):
+        if isinstance(result, BaseException):
+            host.record_failure(result)
+            errors.append(result)
+            continue
+        host.set_models(result)
+        res += [model for model in result if model not in res]
+    save_states(hosts)
+    if errors and len(errors) == len(hosts):
+        raise errors[0]
+    return res
+
+
+def notify_ejected(host):
+    """Tell the user a server is being skipped (on stderr, never in the answer)"""
+    sys.stderr.write(f"ollama: {host.addr} failed {host.failures} times in a row, skipping it for a while\n")
+    sys.stderr.flush()
+
+
+def record_success(host, latency):
+    """Record an answer, saving the server's state if it was failing"""
+    recovered = host.failures or host.is_ejected()
+    host.record_success(latency)
+    if recovered:
+        save_states([host])
+
+
+async def ollama_stream_chat(model, messages, addrs):
+    """
+    Stream a chat completion from one of the Ollama servers.
+
+    Servers are tried in the order of rank_hosts until one starts answering;
+    a server that fails or lacks the model before the first token is skipped.
+    """
+    error = None
+    for host in rank_hosts(get_hosts(addrs), model, get_ollama_models):
+        client = get_ollama_client(host.addr)
+        host.in_flight += 1
+        start = time.perf_counter()
+        started = False
+        try:
+            response = await client.chat(
+                model=model,
+                messages=messages,
+                stream=True,
+                options=get_ollama_options() or None,
+                keep_alive=get_keep_alive()
             )
-            console.print(markdown_panel)
-            console.print()
-            
-            return "Output displayed in both formats"
-        else:
-            return ""
-            
-    except Exception as e:
-        console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
-        return ""
-
-
-def ollama_chat_completion(model, prompt, messages):
-    """Send a chat request to the model"""
-    console = Console()
-    
-    try:
-        client = ollama.Client(host=get_ollama_addr())
-        
-        # Prepare messages format - append the new prompt
-        chat_messages = messages.copy() if messages else []
-        if prompt:
-            chat_messages.append({"role": "user", "content": prompt})
-        
-        # If no messages, return early
-        if not chat_messages:
-            console.print("[bold yellow]Warning: No messages to send to the model[/bold yellow]")
-            return ""
-        
-        response = client.chat(
-            model=model,
-            messages=chat_messages,
-            stream=True
-        )
-        
-        # Use StringIO objects to collect the response text
-        full_response = StringIO()
-        
-        # Track if we've printed anything
-        output_produced = False
-        
-        # Display a fancy animated loading indicator
-        with console.status(f"[bold blue]{model}[/bold blue] is thinking...", spinner="dots12") as status:
-            # For streaming display, we'll accumulate the response first
-            for chunk in response:
+
+            async for chunk in response:
                 content = ""
                 if "message" in chunk and "content" in chunk["message"]:
                     content = chunk["message"]["content"]
                 elif "response" in chunk:
                     content = chunk["response"]
-                    
+
                 if content:
-                    # Just accumulate the response without printing incrementally
-                    full_response.write(content)
-                    output_produced = True
-        
-        # If we got a response, render it as markdown inside a panel
-        if output_produced:
-            # Get the complete text
-            text_response = full_response.getvalue()
-            
-            # Add a newline before displaying the response
-            console.print("")
-            
-            # Display only the markdown response in a panel (no plaintext panel)
-            md = Markdown(text_response)
-            markdown_panel = Panel(
-                md,
-                title=f"[bold blue]{model}[/bold blue] response",
-                border_style="green",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(markdown_panel)
-            console.print()
-            
-            # Return the generated text response
-            return text_response
-        else:
-            return ""
-            
-    except Exception as e:
-        console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
-        return ""
-    
+                    if not started:
+                        started = True
+                        record_success(host, time.perf_counter() - start)
+                    yield content
+            if not started:
+                record_success(host, time.perf_counter() - start)
+            return
+        except Exception as e:
+            # Once text was shown, switching servers would repeat it
+            if started:
+                raise
+            if looks_like_unknown_model(e):
+                host.missing.add(model)
+                # Servers that answered know better than those that didn't:
+                # report the unknown model rather than a connection error
+                error = e
+            else:
+                if host.record_failure(e):
+                    notify_ejected(host)
+                if error is None or not looks_like_unknown_model(error):
+                    error = e
+            save_states([host])
+        finally:
+            host.in_flight -= 1
+    raise error
+
+
+async def ollama_preload(model, addr, keep_alive=None):
+    """Load a model into memory without generating anything"""
+    client = get_ollama_client(addr)
+    # A request without a prompt only loads the model. The options must be
+    # the chat's: a different num_ctx would make the first chat reload it.
+    await client.generate(
+        model=model,
+        options=get_ollama_options() or None,
+        keep_alive=get_keep_alive(keep_alive)
+    )
+
+
+async def ollama_preload_all(model, addrs, keep_alive=None):
+    """
+    Load a model on every healthy server that may have it.
+
+    Requests can be routed to any of them, so each one should have it loaded.
+    Raises the first error if no server could load it.
+    """
+    ranked = rank_hosts(get_hosts(addrs), model)
+    # If every server is ejected, try them anyway
+    hosts = [host for host in ranked if not host.is_ejected()] or ranked
+    results = await asyncio.gather(*[ollama_preload(model, host.addr, keep_alive) for host in hosts],
+                                   return_exceptions=True)
+    errors = []
+    for host, result in zip(hosts, results):
+        if isinstance(result, BaseException):
+            if looks_like_unknown_model(result):
+                host.missing.add(model)
+            else:
+                host.record_failure(result)
+            errors.append(result)
+    if errors:
+        save_states(hosts)
+    if len(errors) == len(hosts):
+        raise errors[0]
+
+
+class OllamaProvider(Provider):
+    name = "ollama"
+    capabilities = frozenset({"chat", "streaming", "local", "warmup"})
+
+    # Ollama doesn't use an API key, only the server address
+    requires_api_key = False
+
+    # Local models run with a small context window by default (num_ctx)
+    default_context_budget = 3000
+
+    def get_base_url(self):
+        return get_ollama_addr()
+
+    def catalog_credential(self):
+        return self.get_base_url()
+
+    def context_budget(self, model):
+        num_ctx = get_ollama_options().get("num_ctx")
+        if num_ctx:
+            # Leave a quarter of the window for the answer
+            return num_ctx * 3 // 4
+        return self.default_context_budget
+
+    def generation_params(self):
+        # The context size can truncate the prompt, threads and GPU layers
+        # only change the speed
+        num_ctx = get_ollama_options().get("num_ctx")
+        return {"num_ctx": num_ctx} if num_ctx else {}
+
+    async def alist_models(self):
+        return await get_all_ollama_models(get_ollama_addrs())
+
+    def astream_chat(self, model, messages):
+        return ollama_stream_chat(model, messages, get_ollama_addrs())
+
+    async def awarm(self, model, keep_alive=None):
+        await ollama_preload_all(model, get_ollama_addrs(), keep_alive)
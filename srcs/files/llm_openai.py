@@ -1,166 +1,52 @@
 import openai
-from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.text import Text
-from io import StringIO
+from .clients import get_async_client
+from .providers import Provider
 
 
-def get_openai_models(api_key):
-    """Get all models from the OpenAI API"""
-    try:
-        client = openai.OpenAI(api_key=api_key) 
-        models = client.models.list()
-        res = [model.id for model in models]
-        return res
-    except Exception as e:
-        return []
-
-
-def openai_single_completion(model, prompt, api_key):
-    console = Console()
-    try:
-        full_response = StringIO()
-        output_produced = False
-
-        """
-        console.print(Panel(
-            "[italic]Generating response...[/italic]",
-            title=f"[bold blue]{model}[/bold blue] response",
-            border_style="cyan",
-            padding=(0, 1),
-            expand=False
-        ))
-
-        console.print("", end="")
-        """
+def get_openai_client(api_key, base_url=None):
+    """Get the pooled async OpenAI client for an API key and endpoint"""
+    # Retries are handled by resilience.py, which knows whether tokens were shown
+    return get_async_client("openai", api_key, base_url,
+                            lambda: openai.AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0))
 
-        console.print("")
-        
-        client = openai.OpenAI(api_key=api_key)
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            stream=True
-        )
-        
-        for chunk in response:
-            if chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                console.print(content, end="")
-                full_response.write(content)
-                output_produced = True
-        
-        # Print a newline for proper spacing
-        console.print("\n")
 
-        if output_produced:
-            text_response = full_response.getvalue()
-            
-            """
-            # 1. Display plaintext response in a panel
-            plaintext_panel = Panel(
-                Text(text_response),
-                title=f"[bold blue]{model}[/bold blue] response",
-                subtitle="Plaintext output",
-                border_style="cyan",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(plaintext_panel)
-            
-            # Add a small separator
-            console.print("")
-            """
-
-            # 2. Display markdown response in a panel
-            md = Markdown(text_response)
-            markdown_panel = Panel(
-                md,
-                title=f"[bold blue]{model}[/bold blue] response",
-                subtitle="Rendered as Markdown",
-                border_style="green",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(markdown_panel)
-            console.print()
-            
-            return "Output displayed in both formats"
-        else:
-            return ""
-
-    except Exception as e:
-        console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
-        return str(e)
-    
-
-def openai_chat_completion(model, prompt, messages, api_key):
-    """Send a chat request to the model"""
-    console = Console()
-    
-    try:
-        # Prepare messages format - append the new prompt
-        chat_messages = messages.copy() if messages else []
-        if prompt:
-            chat_messages.append({"role": "user", "content": prompt})
-        
-        # If no messages, return early
-        if not chat_messages:
-            console.print("[bold yellow]Warning: No messages to send to the model[/bold yellow]")
-            return ""
-        
-        # Use StringIO objects to collect the response text
-        full_response = StringIO()
-        
-        # Track if we've printed anything
-        output_produced = False
-        
-        # Display a fancy animated loading indicator
-        with console.status(f"[bold blue]{model}[/bold blue] is thinking...", spinner="dots12") as status:
-            # Initialize the OpenAI client
-            client = openai.OpenAI(api_key=api_key)
-            
-            # Create the streaming request
-            response = client.chat.completions.create(
-                model=model,
-                messages=chat_messages,
-                stream=True
-            )
-            
-            # Process the streaming chunks
-            for chunk in response:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    # Just accumulate the response without printing incrementally
-                    full_response.write(content)
-                    output_produced = True
-        
-        # If we got a response, render it as markdown inside a panel
-        if output_produced:
-            # Get the complete text
-            text_response = full_response.getvalue()
-            
-            # Add a newline before displaying the response
-            console.print("")
-            
-            # Display only the markdown response in a panel (no plaintext panel)
-            md = Markdown(text_response)
-            markdown_panel = Panel(
-                md,
-                title=f"[bold blue]{model}[/bold blue] response",
-                border_style="green",
-                padding=(1, 2),
-                expand=False
-            )
-            console.print(markdown_panel)
-            console.print()
-            
-            # Return the generated text response
-            return text_response
-        else:
-            return ""
-            
-    except Exception as e:
-        console.print(f"\n[bold red]Error: {str(e)}[/bold red]")
-        return ""
\ No newline at end of file
+async def get_openai_models(api_key, base_url=None):
+    """Get all models from the OpenAI API"""
+    client = get_openai_client(api_key, base_url)
+    res = [model.id async for model in client.models.list()]
+    return res
+
+
+async def openai_stream_chat(model, messages, api_key, base_url=None):
+    """Stream a chat completion from the OpenAI API"""
+    client = get_openai_client(api_key, base_url)
+    response = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True
+    )
+
+    async with response:
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    # Older models, every current one has a window of 128k tokens or more
+    model_context_windows = (
+        ("gpt-3.5-turbo-instruct*", 4096),
+        ("gpt-3.5-turbo*", 16385),
+        ("gpt-4", 8192),
+        ("gpt-4-0314", 8192),
+        ("gpt-4-0613", 8192),
+        ("gpt-4-32k*", 32768),
+    )
+
+    async def alist_models(self):
+        return await get_openai_models(self.get_api_key(), self.get_base_url())
+
+    def astream_chat(self, model, messages):
+        return openai_stream_chat(model, messages, self.get_api_key(), self.get_base_url())
@@ -1,14 +1,16 @@
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.text import Text
-from rich import box
-from rich.markdown import Markdown
-from .list import list_models, list_models_with_provider
-from .run import run_no_args, run_with_model, run_with_model_and_prompt
+from .raw import is_raw_mode
+from .timings import span
+
+# rich is imported by each command that prints with it, so that piped
+# one-shot queries never load it (see oneshot.py)
 
 
 def Usage():
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
+
     console = Console()
     
     # Create a stylish header
@@ -44,6 +46,11 @@ def Usage():
 
 
 def list(args):
+    # Imported here so that other commands don't pay for loading them
+    with span("imports: list"):
+        from .list import list_models, list_models_with_provider
+        from rich.console import Console
+
     console = Console()
     if len(args) == 1: # llm list = 1 arg
         list_models()
@@ -54,18 +61,57 @@ def list(args):
 
 
 def run(args):
+    if len(args) == 3 and is_raw_mode():
+        # Piped one-shot query: only the provider SDK and a plain writer are needed
+        with span("imports: run"):
+            from .oneshot import run_raw
+        return run_raw(args[1], args[2])
+
+    # Imported here so that other commands don't pay for loading prompt_toolkit
+    with span("imports: run"):
+        from .run import run_no_args, run_with_model, run_with_model_and_prompt
+        from rich.console import Console
+
     console = Console()
     if len(args) == 1: # llm run = 1 arg
-        run_no_args()
+        return run_no_args()
     elif len(args) == 2: # llm run [model] = 2 args
-        run_with_model(args[1])
+        return run_with_model(args[1])
     elif len(args) == 3: # llm run [model] [prompt] = 3 args
-        run_with_model_and_prompt(args[1], args[2])
+        return run_with_model_and_prompt(args[1], args[2])
     else:
         console.print("Error: Invalid number of arguments. Expected 2 or 3 arguments, got", len(args))
+        return 1
+
+
+def batch(args):
+    # Batch runs are non-interactive, they never need prompt_toolkit
+    with span("imports: batch"):
+        from .batch import run_batch
+
+    return run_batch(args[1:])
+
+
+def serve(args):
+    # The daemon only answers queries, it never renders anything
+    with span("imports: serve"):
+        from .daemon import run_serve
+
+    return run_serve(args[1:])
+
+
+def warm(args):
+    with span("imports: warm"):
+        from .warm import run_warm
+
+    return run_warm(args[1:])
 
 
 def help():
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.table import Table
+
     console = Console()
     
     # Create a command table with explicit width settings
@@ -80,7 +126,17 @@ def help():
     table.add_row("llm run", "Launch a chat with a model in interactive mode.")
     table.add_row("llm run \\[provider]/\\[model]", "Run a specific model in interactive mode")
     table.add_row("llm run \\[provider]/\\[model] \\[prompt]", "Run a specific model with a single request")
+    table.add_row("llm run \\[provider]/\\[model],\\[provider]/\\[model] \\[prompt]", "Send the same request to several models at once and compare them")
+    table.add_row("llm batch \\[provider]/\\[model] --input \\[file] --output \\[file]", "Run every prompt of a JSONL file (see llm batch --help)")
+    table.add_row("llm warm ollama/\\[model] \\[keep_alive]", "Load a local model now so the first request doesn't wait for it")
+    table.add_row("llm serve \\[start|stop|status]", "Keep a daemon with warm provider clients; piped one-shot queries go through it")
     table.add_row("llm help", "Help about any command")
+    table.add_row("--refresh", "Ignore the cached model catalog and fetch model lists from the providers")
+    table.add_row("--raw", "Write answers as plain text without formatting (default when output is piped)")
+    table.add_row("--cache / --no-cache", "Serve repeated single prompts from the local response cache, or bypass it")
+    table.add_row("--cache-only", "Only answer from the response cache, never call the provider")
+    table.add_row("--fallback", "With several models, answer with the first to stream; the next one is asked when a model is slow to start or fails")
+    table.add_row("--timings", "Print how long each phase of the command took (PROMPTLY_METRICS=path logs them as JSON)")
     
     console.print(Panel(
         table,
@@ -0,0 +1,108 @@
+import os
+from .resilience import classify_error, ERROR_NOT_FOUND, ERROR_BAD_REQUEST
+from .streams import close_stream
+
+
+def is_strict_validation():
+    """
+    Return True if models must be checked against the model list before a request.
+
+    PROMPTLY_MODEL_VALIDATION=optimistic (default) sends the request right
+    away and only looks at the model list if the provider rejects the model;
+    strict checks the list before sending anything.
+    """
+    return os.environ.get("PROMPTLY_MODEL_VALIDATION", "optimistic").lower() == "strict"
+
+
+class UnknownModelError(Exception):
+    """Raised when a provider rejects a request because the model doesn't exist"""
+
+    def __init__(self, provider, model, models):
+        self.provider = provider
+        self.model = model
+        self.models = models
+        self.suggestions = suggest_models(model, models)
+        message = f"Model '{model}' not found for provider '{provider}'!"
+        if self.suggestions:
+            message += f" Did you mean: {', '.join(self.suggestions)}?"
+        super().__init__(message)
+
+
+def suggest_models(model, models, count=3):
+    """Names of `models` closest to a mistyped model name"""
+    import difflib
+    return difflib.get_close_matches(model, models, n=count, cutoff=0.5)
+
+
+def looks_like_unknown_model(error):
+    """
+    Return True if a provider error may mean the model doesn't exist.
+
+    Providers answer an unknown model with a 404 or a 400 whose message
+    mentions the model; the model list has the final word (see below).
+    """
+    kind = classify_error(error)
+    return kind in (ERROR_NOT_FOUND, ERROR_BAD_REQUEST) and "model" in str(error).lower()
+
+
+def unknown_model_error(provider, model, models):
+    """UnknownModelError if `model` isn't in the provider's model list, else None"""
+    if not models or model in models:
+        # Unreachable list or known model: the error is about something else
+        return None
+    return UnknownModelError(provider, model, models)
+
+
+def checked_stream(provider, model, chunks):
+    """
+    Pass a streamed answer through, turning an unknown model error into UnknownModelError.
+
+    Nothing is checked before the request is sent: only when the provider
+    rejects it is the model list (from the catalog if possible) looked up,
+    to tell a mistyped model apart from other errors and suggest names.
+    """
+    from .llm_global import retrieve_models
+
+    started = False
+    try:
+        for content in chunks:
+            started = True
+            yield content
+    except Exception as e:
+        if started or not looks_like_unknown_model(e):
+            raise
+        models = retrieve_models(provider)
+        if model not in models:
+            # The cached catalog may predate the model, check the provider directly
+            models = retrieve_models(provider, refresh=True)
+        error = unknown_model_error(provider, model, models)
+        if error is None:
+            raise
+        raise error from e
+    finally:
+        close_stream(chunks)
+
+
+async def achecked_stream(provider, model, chunks):
+    """Async version of checked_stream"""
+    from .llm_global import aretrieve_models
+
+    started = False
+    try:
+        async for content in chunks:
+            started = True
+            yield content
+    except Exception as e:
+        if started or not looks_like_unknown_model(e):
+            raise
+        models = await aretrieve_models(provider)
+        if model not in models:
+            models = await aretrieve_models(provider, refresh=True)
+        error = unknown_model_error(provider, model, models)
+        if error is None:
+            raise
+        raise error from e
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
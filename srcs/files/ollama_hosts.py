@@ -0,0 +1,210 @@
+import asyncio
+import random
+import threading
+import time
+from .catalog import catalog_source, get_cached_hosts, save_hosts
+from .config import get_env_number, get_ollama_addr
+from .resilience import classify_error, TRANSIENT_ERRORS
+
+# OLLAMA_ADDR may list several servers ("http://box1:11434,http://box2:11434").
+# Requests for a model go to a server that has it, preferring the one with the
+# fewest requests in flight and the fastest recent answers. A server failing
+# EJECT_AFTER times in a row is left out for EJECT_SECONDS, then health-checked
+# in the background before it gets requests again.
+#
+# What a process learns about the servers (their models, failures and
+# ejections) is saved in the Ollama entry of the model catalog, so that the
+# next `llm run` goes straight to a server that has the model and skips one
+# that is down, instead of finding out again.
+
+# Overridable with PROMPTLY_OLLAMA_EJECT_AFTER and PROMPTLY_OLLAMA_EJECT_SECONDS
+DEFAULT_EJECT_AFTER = 2
+DEFAULT_EJECT_SECONDS = 30
+
+# Seconds a health check may take before the server is considered down
+HEALTH_CHECK_TIMEOUT = 3
+
+# Weight of the newest time to first token in a server's average latency
+LATENCY_SMOOTHING = 0.3
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+class Host:
+    """Routing state of one Ollama server"""
+
+    def __init__(self, addr):
+        self.addr = addr
+        self.in_flight = 0
+        # Moving average of the time to first token, None until a request succeeded
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = None
+        self.checking = False
+        # Models listed by the server, None until listed in this process
+        self.models = None
+        # Models the server answered "not found" for since it was last listed
+        self.missing = set()
+
+    def is_ejected(self):
+        return self.ejected_until is not None
+
+    def may_have(self, model):
+        if model in self.missing:
+            return False
+        return self.models is None or model in self.models
+
+    def set_models(self, models):
+        self.models = set(models)
+        self.missing.clear()
+
+    def record_success(self, latency):
+        self.failures = 0
+        self.ejected_until = None
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+    def record_failure(self, error):
+        """Count a failed request, return True if it ejected the server"""
+        kind = classify_error(error)
+        # Errors about the request itself say nothing about the server's health
+        if kind not in TRANSIENT_ERRORS:
+            return False
+        self.failures += 1
+        if self.failures < int(get_env_number("PROMPTLY_OLLAMA_EJECT_AFTER", DEFAULT_EJECT_AFTER)):
+            return False
+        # An ejected server tried as a last resort stays out longer
+        ejected = self.is_ejected()
+        self.eject()
+        return not ejected
+
+    def eject(self):
+        self.ejected_until = time.monotonic() + get_env_number("PROMPTLY_OLLAMA_EJECT_SECONDS", DEFAULT_EJECT_SECONDS)
+
+    def state(self):
+        """What other processes should know about the server (see restore)"""
+        ejected_until = None
+        if self.ejected_until is not None:
+            # Monotonic clocks aren't shared between processes, save a wall clock time
+            ejected_until = time.time() + self.ejected_until - time.monotonic()
+        return {
+            "models": sorted(self.models) if self.models is not None else None,
+            "missing": sorted(self.missing),
+            "failures": self.failures,
+            "ejected_until": ejected_until,
+        }
+
+    def restore(self, state):
+        """Start from the state another process saved"""
+        if not isinstance(state, dict):
+            return
+        if isinstance(state.get("models"), list):
+            self.set_models(state["models"])
+        if isinstance(state.get("missing"), list):
+            self.missing.update(state["missing"])
+        if isinstance(state.get("failures"), int):
+            self.failures = state["failures"]
+        if isinstance(state.get("ejected_until"), (int, float)):
+            # Once the time out is over, the server is health-checked like any
+            # ejected server before it gets requests again
+            self.ejected_until = time.monotonic() + state["ejected_until"] - time.time()
+
+
+def get_states_source():
+    """Fingerprint of the servers' configuration, the saved states belong to it"""
+    # Same as the model list they are saved next to
+    return catalog_source(get_ollama_addr())
+
+
+def save_states(hosts):
+    """Save the state of the given servers for the next processes"""
+    if hosts:
+        save_hosts("ollama", get_states_source(), {host.addr: host.state() for host in hosts})
+
+
+def get_hosts(addrs):
+    """
+    Routing state of the given servers, kept for the life of the process.
+
+    A server is first seen with the state the last process saved.
+    """
+    with _hosts_lock:
+        states = None
+        hosts = []
+        for addr in addrs:
+            host = _hosts.get(addr)
+            if host is None:
+                if states is None:
+                    states = get_cached_hosts("ollama", get_states_source())
+                host = _hosts[addr] = Host(addr)
+                host.restore(states.get(addr))
+            hosts.append(host)
+        return hosts
+
+
+def health_check_in_background(host, check):
+    """
+    Health-check an ejected server whose time out is over.
+
+    Args:
+        host (Host): The server
+        check (callable): Coroutine function listing the server's models
+    """
+    if host.checking or host.ejected_until is None or host.ejected_until > time.monotonic():
+        return
+    host.checking = True
+
+    async def run():
+        try:
+            models = await asyncio.wait_for(check(host.addr), HEALTH_CHECK_TIMEOUT)
+        except Exception:
+            host.eject()
+        else:
+            host.set_models(models)
+            host.failures = 0
+            host.ejected_until = None
+        finally:
+            host.checking = False
+        save_states([host])
+
+    asyncio.ensure_future(run())
+
+
+def rank_hosts(hosts, model, check=None):
+    """
+    Order the servers to try for a request, best first.
+
+    Servers known not to have the model are left out. Ejected servers only
+    come last, in case every other one fails too. A server's score is its
+    average latency times the number of requests it would have in flight;
+    ties are broken at random so that separate processes, which start with no
+    latency data, spread over the servers.
+
+    Args:
+        hosts (list): Host objects
+        model (str): Requested model
+        check (callable): Health check for ejected servers (see health_check_in_background)
+    """
+    candidates = [host for host in hosts if host.may_have(model)]
+    if not candidates:
+        # Every server lacks it as far as we know: let them say so
+        candidates = list(hosts)
+
+    healthy = [host for host in candidates if not host.is_ejected()]
+    ejected = [host for host in candidates if host.is_ejected()]
+    if check is not None:
+        for host in ejected:
+            health_check_in_background(host, check)
+
+    known = [host.latency for host in healthy if host.latency is not None]
+    # A server with no latency data yet is assumed to be as fast as the best one
+    default_latency = min(known) if known else 1.0
+
+    def score(host):
+        latency = host.latency if host.latency is not None else default_latency
+        return (latency * (host.in_flight + 1), random.random())
+
+    return sorted(healthy, key=score) + ejected
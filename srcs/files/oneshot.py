@@ -0,0 +1,73 @@
+from .config import ENV_FILE_PATH
+from .llm_global import retrieve_models, single_completion
+from .model_check import UnknownModelError, is_strict_validation
+from .providers import get_provider, provider_names
+from .raw import print_raw_error, write_raw_stream
+from .timings import span, timed_stream
+
+# Piped one-shot queries (`llm run provider/model "prompt" | ...`) start here.
+# Nothing in this module imports rich or prompt_toolkit: a raw answer only
+# needs the provider's SDK and a plain writer (see raw.py).
+
+
+def check_provider(provider):
+    """
+    Return an error message if a provider is unknown or not configured, else None.
+
+    Only the requested provider is looked at, checking every API key is noise here.
+    """
+    backend = get_provider(provider)
+    if backend is None:
+        return f"Provider '{provider}' not found! Known providers: {', '.join(provider_names())}"
+    if not backend.is_configured():
+        return f"{provider.upper()}_API_KEY not found, please set it in your config file: {ENV_FILE_PATH}"
+    return None
+
+
+def run_raw(arg1, arg2):
+    """`llm run <targets> "prompt"` with plain text output"""
+    if ',' in arg1:
+        from .hedge import is_fallback_mode
+        if is_fallback_mode():
+            from .hedge import run_hedged
+            return run_hedged(arg1, arg2)
+        from .fanout import run_fanout
+        return run_fanout(arg1, arg2)
+    return run_raw_with_model_and_prompt(arg1, arg2)
+
+
+def run_raw_with_model_and_prompt(arg1, arg2):
+    """Answer a single prompt as plain text on stdout, errors go to stderr"""
+    parts = arg1.split('/', 1)
+    if len(parts) != 2:
+        print_raw_error(f"Invalid format: {arg1} (expected provider/modelname)")
+        return 1
+
+    provider, model = parts
+
+    # A running `llm serve` daemon answers without this process loading the SDK
+    if not is_strict_validation():
+        from .daemon import open_daemon_stream
+        with span("daemon connect"):
+            chunks = open_daemon_stream(arg1, arg2)
+        if chunks is not None:
+            result = write_raw_stream(timed_stream(chunks, "first token"))
+            return 0 if result is not None else 1
+
+    error = check_provider(provider)
+    if error:
+        print_raw_error(error)
+        return 1
+
+    if is_strict_validation():
+        with span("validate model"):
+            models = retrieve_models(provider)
+            if model not in models:
+                # The cached catalog may predate the model, check the provider directly
+                models = retrieve_models(provider, refresh=True)
+        if model not in models:
+            print_raw_error(str(UnknownModelError(provider, model, models)))
+            return 1
+
+    result = single_completion(provider, model, arg2)
+    return 0 if result is not None else 1
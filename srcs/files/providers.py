@@ -0,0 +1,297 @@
+import importlib
+import os
+import threading
+from .config import get_api_key, get_base_url
+from .raw import is_raw_mode, write_raw_stream
+from .timings import span, timed_stream
+
+# Built-in providers, in the order they are listed to the user
+BUILTIN_PROVIDERS = {
+    "openai": "files.llm_openai:OpenAIProvider",
+    "mistral": "files.llm_mistral:MistralProvider",
+    "anthropic": "files.llm_anthropic:AnthropicProvider",
+    "deepseek": "files.llm_deepseek:DeepSeekProvider",
+    "gemini": "files.llm_gemini:GeminiProvider",
+    "ollama": "files.llm_ollama:OllamaProvider",
+}
+
+# Built-in providers usable without an API key
+KEYLESS_PROVIDERS = frozenset({"ollama"})
+
+# Entry point group third-party packages use to register extra providers, e.g.
+#   [project.entry-points."promptly_cli.providers"]
+#   inhouse = "inhouse_llm.promptly:InhouseProvider"
+ENTRY_POINT_GROUP = "promptly_cli.providers"
+
+_providers = {}
+# One lock per provider name: importing a slow SDK doesn't hold up the others
+_provider_locks = {}
+_provider_locks_lock = threading.Lock()
+_plugin_entry_points = None
+
+
+class Provider:
+    """
+    Common interface of every model provider.
+
+    Subclasses must set `name` and implement either the async methods
+    (`alist_models` and `astream_chat`) or the sync ones (`list_models` and
+    `stream_chat`); each side defaults to a thin wrapper around the other.
+    Built-in providers are async. Rendering of single and chat completions is
+    shared by all providers.
+    """
+
+    name = None
+
+    # Features supported by the provider
+    capabilities = frozenset({"chat", "streaming"})
+
+    # Whether <NAME>_API_KEY must be set for the provider to be usable
+    requires_api_key = True
+
+    # Default endpoint, None for the SDK default. <NAME>_BASE_URL overrides it.
+    base_url = None
+
+    # Default number of prompt tokens a chat sends to a model
+    # (PROMPTLY_<NAME>_CONTEXT_BUDGET / PROMPTLY_CONTEXT_BUDGET override it)
+    default_context_budget = 16000
+
+    # Context windows (tokens) of the models too small for that default, as
+    # (fnmatch pattern, tokens) pairs; the first match wins
+    model_context_windows = ()
+
+    def get_api_key(self):
+        """Get the provider's API key, printing an error if it is missing"""
+        return get_api_key(self.name)
+
+    def get_base_url(self):
+        """Get the endpoint the provider's client talks to"""
+        return get_base_url(self.name) or self.base_url
+
+    def is_configured(self):
+        """Return True if the provider can be used with the current environment"""
+        if not self.requires_api_key:
+            return True
+        return bool(os.environ.get(f"{self.name.upper()}_API_KEY"))
+
+    def catalog_credential(self):
+        """Value identifying the account the model list belongs to (see catalog_source)"""
+        return os.environ.get(f"{self.name.upper()}_API_KEY")
+
+    def list_models(self):
+        """Return the names of all models, raising if the provider can't be reached"""
+        if type(self).alist_models is Provider.alist_models:
+            raise NotImplementedError
+        from .aio import run_sync
+        return run_sync(self.alist_models())
+
+    async def alist_models(self):
+        """Async version of list_models"""
+        if type(self).list_models is Provider.list_models:
+            raise NotImplementedError
+        import asyncio
+        return await asyncio.to_thread(self.list_models)
+
+    def stream_chat(self, model, messages):
+        """
+        Send a conversation to the model.
+
+        Args:
+            model (str): Model name
+            messages (list): [{"role": "user" | "assistant", "content": str}, ...]
+
+        Yields:
+            str: Pieces of the response text as they arrive
+        """
+        if type(self).astream_chat is Provider.astream_chat:
+            raise NotImplementedError
+        from .aio import iterate_sync
+        return iterate_sync(self.astream_chat(model, messages))
+
+    def astream_chat(self, model, messages):
+        """
+        Async version of stream_chat.
+
+        Returns:
+            async iterator: Pieces of the response text as they arrive
+        """
+        if type(self).stream_chat is Provider.stream_chat:
+            raise NotImplementedError
+        from .aio import aiterate_in_thread
+        return aiterate_in_thread(self.stream_chat(model, messages))
+
+    def retrying_stream(self, model, messages):
+        """
+        stream_chat, retrying rate limits and transient errors until the first token.
+
+        Every completion goes through here; see resilience.py. A request for
+        an unknown model raises UnknownModelError (see model_check.py).
+        """
+        from .model_check import checked_stream
+        from .resilience import resilient_stream
+        return checked_stream(self.name, model,
+                              resilient_stream(self.name, lambda: self.stream_chat(model, messages)))
+
+    def aretrying_stream(self, model, messages):
+        """Async version of retrying_stream"""
+        from .model_check import achecked_stream
+        from .resilience import aresilient_stream
+        return achecked_stream(self.name, model,
+                               aresilient_stream(self.name, lambda: self.astream_chat(model, messages)))
+
+    def warm(self, model, keep_alive=None):
+        """
+        Load a model ahead of the first request (providers with the "warmup" capability).
+
+        Args:
+            model (str): Model name
+            keep_alive (str): How long the model stays loaded, None for the default
+        """
+        from .aio import run_sync
+        return run_sync(self.awarm(model, keep_alive))
+
+    async def awarm(self, model, keep_alive=None):
+        """Async version of warm"""
+        raise NotImplementedError
+
+    def context_budget(self, model):
+        """Number of prompt tokens a chat may send to the model"""
+        import fnmatch
+        for pattern, window in self.model_context_windows:
+            if fnmatch.fnmatchcase(model, pattern):
+                # Leave a quarter of the window for the answer
+                return min(self.default_context_budget, window * 3 // 4)
+        return self.default_context_budget
+
+    def generation_params(self):
+        """Parameters, besides model and messages, that change the answer (part of the cache key)"""
+        return {}
+
+    def completion_stream(self, model, prompt):
+        """Stream the answer to a single prompt, served from the response cache when enabled"""
+        from .response_cache import cached_stream
+
+        messages = [{"role": "user", "content": prompt}]
+        return cached_stream(self.name, model, messages, self.generation_params(),
+                             lambda: timed_stream(self.retrying_stream(model, messages), "first token"))
+
+    def acompletion_stream(self, model, prompt):
+        """Async version of completion_stream"""
+        from .response_cache import acached_stream
+
+        messages = [{"role": "user", "content": prompt}]
+        return acached_stream(self.name, model, messages, self.generation_params(),
+                              lambda: self.aretrying_stream(model, messages))
+
+    async def asingle_completion(self, model, prompt):
+        """Send a single request to the model and return the text of the answer"""
+        return "".join([content async for content in self.acompletion_stream(model, prompt)])
+
+    async def achat_completion(self, model, prompt, messages):
+        """Send a chat request to the model and return the text of the answer"""
+        chat_messages = list(messages) if messages else []
+        if prompt:
+            chat_messages.append({"role": "user", "content": prompt})
+        if not chat_messages:
+            return ""
+        return "".join([content async for content in self.aretrying_stream(model, chat_messages)])
+
+    def single_completion(self, model, prompt):
+        """Send a single request to the model, display the answer and return its text"""
+        chunks = self.completion_stream(model, prompt)
+        if is_raw_mode():
+            return write_raw_stream(chunks)
+
+        from .render import render_stream
+        return render_stream(model, chunks)
+
+    def chat_completion(self, model, prompt, messages):
+        """
+        Send a chat request to the model, display the answer and return its text.
+
+        `messages` is the conversation so far, without `prompt`.
+        """
+        from .render import render_stream, print_warning
+
+        # Prepare messages format - append the new prompt
+        chat_messages = list(messages) if messages else []
+        if prompt:
+            chat_messages.append({"role": "user", "content": prompt})
+
+        # If no messages, return early
+        if not chat_messages:
+            print_warning("No messages to send to the model")
+            return ""
+
+        return render_stream(model, timed_stream(self.retrying_stream(model, chat_messages), "first token"))
+
+
+def _load_entry_points():
+    """Find providers registered by installed packages (cached)"""
+    global _plugin_entry_points
+    if _plugin_entry_points is None:
+        from importlib.metadata import entry_points
+        try:
+            found = entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:
+            # Python < 3.10
+            found = entry_points().get(ENTRY_POINT_GROUP, [])
+        except Exception:
+            found = []
+        _plugin_entry_points = {ep.name: ep for ep in found if ep.name not in BUILTIN_PROVIDERS}
+    return _plugin_entry_points
+
+
+def provider_names():
+    """Names of every known provider, built-in ones first"""
+    return list(BUILTIN_PROVIDERS) + sorted(_load_entry_points())
+
+
+def loaded_providers():
+    """Names of the providers built so far in this process"""
+    return list(_providers)
+
+
+def lacks_api_key(name):
+    """
+    Return True if a built-in provider needs an API key that isn't set.
+
+    Unlike Provider.is_configured, this doesn't build the provider, so its SDK
+    isn't imported just to find out it can't be used.
+    """
+    return (name in BUILTIN_PROVIDERS and name not in KEYLESS_PROVIDERS
+            and not os.environ.get(f"{name.upper()}_API_KEY"))
+
+
+def get_provider(name):
+    """
+    Get the provider object for a name, or None if the provider is unknown.
+
+    Providers are built on first use and cached for the life of the process, so
+    only the SDK of the providers actually used gets imported.
+    """
+    provider = _providers.get(name)
+    if provider is not None:
+        return provider
+
+    with _provider_locks_lock:
+        lock = _provider_locks.setdefault(name, threading.Lock())
+
+    with lock:
+        if name in _providers:
+            return _providers[name]
+
+        with span(f"sdk import: {name}"):
+            if name in BUILTIN_PROVIDERS:
+                module_name, class_name = BUILTIN_PROVIDERS[name].split(":")
+                provider_class = getattr(importlib.import_module(module_name), class_name)
+            elif name in _load_entry_points():
+                provider_class = _load_entry_points()[name].load()
+            else:
+                return None
+
+        provider = provider_class()
+        if provider.name is None:
+            provider.name = name
+        _providers[name] = provider
+        return provider
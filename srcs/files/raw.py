@@ -0,0 +1,74 @@
+import sys
+from .streams import StreamInterrupted, close_stream
+
+# None means "auto": raw output whenever stdout is not a terminal
+_raw_mode = None
+
+
+def set_raw_mode(value=True):
+    """Force raw output on or off (used by --raw)"""
+    global _raw_mode
+    _raw_mode = value
+
+
+def is_raw_mode():
+    """
+    Return True if answers should be written as plain text.
+
+    Raw mode writes tokens straight to stdout, without spinners, panels or
+    Markdown rendering, so `llm run ... | jq` runs at network speed.
+    """
+    if _raw_mode is not None:
+        return _raw_mode
+    try:
+        return not sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return True
+
+
+def print_raw_error(message):
+    """Print an error to stderr so it never ends up in piped output"""
+    sys.stderr.write(f"Error: {message}\n")
+    sys.stderr.flush()
+
+
+def write_raw_stream(chunks, out=None):
+    """
+    Write a streamed answer to stdout as it arrives.
+
+    Args:
+        chunks (iterable): Pieces of the response text
+        out (file): Where to write (stdout by default)
+
+    Returns:
+        str: The full response text, or None on error
+
+    Raises:
+        StreamInterrupted: On Ctrl+C, after closing the provider stream
+    """
+    out = out or sys.stdout
+    parts = []
+    try:
+        for content in chunks:
+            out.write(content)
+            out.flush()
+            parts.append(content)
+    except KeyboardInterrupt:
+        close_stream(chunks)
+        if parts:
+            out.write("\n")
+            out.flush()
+        raise StreamInterrupted("".join(parts))
+    except Exception as e:
+        if parts:
+            out.write("\n")
+            out.flush()
+        print_raw_error(e)
+        return None
+
+    text = "".join(parts)
+    # End the output with a newline like any well-behaved command
+    if text and not text.endswith("\n"):
+        out.write("\n")
+        out.flush()
+    return text
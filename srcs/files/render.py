@@ -0,0 +1,196 @@
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+from rich.padding import Padding
+from rich.rule import Rule
+from rich.spinner import Spinner
+from rich.text import Text
+from io import StringIO
+from .streams import StreamInterrupted, close_stream
+from .timings import timed_calls
+
+console = Console()
+
+# Redraws per second of the live (unfinished) part of a streamed answer
+LIVE_REFRESH_PER_SECOND = 12
+
+
+def split_completed_blocks(text):
+    """
+    Split streamed Markdown into the part that can't change anymore and the rest.
+
+    A block is complete once it is followed by a blank line outside of a code
+    fence: later text can't change how it renders.
+
+    Returns:
+        tuple: (completed, pending)
+    """
+    in_fence = False
+    split_at = 0
+    position = 0
+    # The last line may still be growing, only look at complete lines
+    for line in text.splitlines(keepends=True):
+        if not line.endswith("\n"):
+            break
+        position += len(line)
+        stripped = line.strip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+        elif not stripped and not in_fence:
+            split_at = position
+    return text[:split_at], text[split_at:]
+
+
+class _LiveMarkdown:
+    """Renderable parsing its text only when Live redraws, not on every token"""
+
+    def __init__(self):
+        self.text = ""
+        # Blank line separating the text from the blocks printed above it
+        self.separated = False
+
+    def __rich_console__(self, console, options):
+        if not self.text.strip():
+            return
+        if self.separated:
+            yield Text("")
+        yield Padding(Markdown(self.text), (0, 2))
+
+
+class MarkdownStream:
+    """
+    Render a streamed Markdown answer as it arrives.
+
+    Completed blocks are printed once and never redrawn; only the trailing,
+    unfinished block lives in the Live region. The cost of a redraw therefore
+    depends on the size of the last block, not on the length of the answer.
+    """
+
+    def __init__(self, model, title=None):
+        self.model = model
+        # Called at the first token for the header, when it isn't known upfront
+        self.title = title
+        self.pending = ""
+        self.tail = _LiveMarkdown()
+        self.live = Live(
+            Spinner("dots12", text=f"[bold blue]{model}[/bold blue] is thinking..."),
+            console=console,
+            refresh_per_second=LIVE_REFRESH_PER_SECOND,
+            vertical_overflow="visible",
+        )
+        self.started = False
+
+    def __enter__(self):
+        console.print("")
+        self.live.start()
+        return self
+
+    def write(self, content):
+        """Add a piece of the answer"""
+        if not self.started:
+            # First token: replace the spinner with the answer
+            self.started = True
+            title = (self.title() if self.title else None) or self.model
+            self.live.console.print(Rule(f"[bold blue]{title}[/bold blue] response", style="green"))
+            self.live.update(self.tail)
+
+        completed, self.pending = split_completed_blocks(self.pending + content)
+        if completed.strip():
+            # Frozen blocks are printed above the live region, once, spaced
+            # like consecutive blocks of a single Markdown document
+            if self.tail.separated:
+                self.live.console.print("")
+            self.live.console.print(Padding(Markdown(completed), (0, 2)))
+            self.tail.separated = True
+        self.tail.text = self.pending
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.started:
+            # Nothing arrived, don't leave the spinner behind
+            self.live.update(Text(""))
+        self.live.stop()
+        if not console.is_terminal and self.tail.text.strip():
+            # Live doesn't end its last line when the output isn't a terminal
+            console.print("")
+        if self.started:
+            console.print(Rule(style="green"))
+            console.print()
+        return False
+
+
+def render_answer(title, text):
+    """Print a complete answer with the same header and footer as a streamed one"""
+    console.print("")
+    console.print(Rule(f"[bold blue]{title}[/bold blue] response", style="green"))
+    console.print(Padding(Markdown(text), (0, 2)))
+    console.print(Rule(style="green"))
+    console.print()
+
+
+def print_warning(message):
+    """Print a warning in the same style as the completion errors"""
+    console.print(f"[bold yellow]Warning: {message}[/bold yellow]")
+
+
+def print_error(error):
+    """Print an error raised while talking to a provider"""
+    from .model_check import UnknownModelError
+
+    if isinstance(error, UnknownModelError):
+        print_unknown_model(error)
+        return
+    console.print(f"\n[bold red]Error: {str(error)}[/bold red]")
+
+
+def print_unknown_model(error):
+    """Show the models closest to a mistyped one (or the first ones, if none is close)"""
+    from rich.panel import Panel
+
+    if error.suggestions:
+        hint = f"Did you mean: {', '.join(error.suggestions)}?"
+    else:
+        models = error.models
+        hint = f"Available models: {', '.join(models[:10])}{'...' if len(models) > 10 else ''}"
+    console.print("")
+    console.print(Panel(
+        f"[bold red]Model '{error.model}' not found for provider '{error.provider}'![/bold red]\n{hint}",
+        title="Error",
+        border_style="red",
+        expand=False
+    ))
+
+
+def render_stream(model, chunks, title=None):
+    """
+    Render streamed text with MarkdownStream and return it.
+
+    Used for single completions and chat answers alike. `model` names the
+    spinner; `title`, if given, is called at the first token to get the
+    header (defaults to the model name).
+
+    On Ctrl+C the provider stream is closed, what arrived stays on screen and
+    StreamInterrupted is raised with the partial text.
+    """
+    # Use StringIO objects to collect the response text
+    full_response = StringIO()
+    try:
+        with MarkdownStream(model, title) as stream:
+            # Time spent rendering, as opposed to waiting for the provider
+            write = timed_calls("render", stream.write)
+            for content in chunks:
+                full_response.write(content)
+                write(content)
+        if hasattr(write, "flush"):
+            write.flush()
+
+        # Return the generated text response
+        return full_response.getvalue()
+
+    except KeyboardInterrupt:
+        close_stream(chunks)
+        console.print("[bold yellow]Interrupted.[/bold yellow]")
+        raise StreamInterrupted(full_response.getvalue())
+
+    except Exception as e:
+        print_error(e)
+        return None
@@ -0,0 +1,291 @@
+import random
+import sys
+import threading
+import time
+from .config import get_env_number
+from .streams import close_stream, aclose_stream
+
+# Error kinds
+ERROR_RATE_LIMIT = "rate_limit"
+ERROR_OVERLOADED = "overloaded"
+ERROR_SERVER = "server_error"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_AUTH = "auth"
+ERROR_NOT_FOUND = "not_found"
+ERROR_BAD_REQUEST = "bad_request"
+ERROR_UNKNOWN = "unknown"
+
+# Kinds worth trying again: the same request may well succeed a bit later
+TRANSIENT_ERRORS = frozenset({ERROR_RATE_LIMIT, ERROR_OVERLOADED, ERROR_SERVER, ERROR_TIMEOUT, ERROR_CONNECTION})
+
+# Retry policy, overridable with PROMPTLY_MAX_RETRIES and PROMPTLY_RETRY_MAX_WAIT
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_MAX_WAIT = 30
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8
+
+# Circuit breaker, overridable with PROMPTLY_BREAKER_THRESHOLD and PROMPTLY_BREAKER_COOLDOWN
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider that keeps failing"""
+
+
+def get_status_code(error):
+    """HTTP status of an SDK error, or None"""
+    # The SDKs disagree on the attribute name holding the HTTP status
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def classify_error(error):
+    """Map an exception raised by a provider SDK to an error kind"""
+    if isinstance(error, CircuitOpenError):
+        return ERROR_UNKNOWN
+
+    status_code = get_status_code(error)
+    if status_code == 429:
+        return ERROR_RATE_LIMIT
+    if status_code in (503, 529):
+        return ERROR_OVERLOADED
+    if status_code in (408, 504):
+        return ERROR_TIMEOUT
+    if status_code is not None and status_code >= 500:
+        return ERROR_SERVER
+    if status_code in (401, 403):
+        return ERROR_AUTH
+    if status_code == 404:
+        return ERROR_NOT_FOUND
+    if status_code is not None and status_code >= 400:
+        return ERROR_BAD_REQUEST
+
+    name = type(error).__name__.lower()
+    if "timeout" in name:
+        return ERROR_TIMEOUT
+    if "connect" in name or "remoteprotocol" in name or "readerror" in name:
+        return ERROR_CONNECTION
+    if "ratelimit" in name:
+        return ERROR_RATE_LIMIT
+    if "overload" in name:
+        return ERROR_OVERLOADED
+    return ERROR_UNKNOWN
+
+
+def get_retry_after(error):
+    """Seconds the provider asked us to wait (Retry-After header), or None"""
+    for attribute in ("response", "raw_response"):
+        headers = getattr(getattr(error, attribute, None), "headers", None)
+        if not headers:
+            continue
+        try:
+            milliseconds = headers.get("retry-after-ms")
+            if milliseconds:
+                return max(0.0, float(milliseconds) / 1000)
+            value = headers.get("retry-after")
+            if not value:
+                continue
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                # HTTP date form (email is slow to import, and rarely needed)
+                import email.utils
+                date = email.utils.parsedate_to_datetime(value)
+                return max(0.0, date.timestamp() - time.time())
+        except (TypeError, ValueError, AttributeError):
+            continue
+    return None
+
+
+def retry_delay(error, kind, attempt):
+    """
+    Seconds to wait before retrying, or None if the request shouldn't be retried.
+
+    Waits follow an exponential backoff with full jitter, unless the provider
+    sent a Retry-After header, which is honored as is.
+    """
+    max_retries = int(get_env_number("PROMPTLY_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+    if kind not in TRANSIENT_ERRORS or attempt >= max_retries:
+        return None
+
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        # Not worth waiting minutes in an interactive tool
+        if retry_after > get_env_number("PROMPTLY_RETRY_MAX_WAIT", DEFAULT_RETRY_MAX_WAIT):
+            return None
+        return retry_after
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Stop calling a provider that keeps failing.
+
+    After `threshold` transient failures in a row the circuit opens and calls
+    fail right away for `cooldown` seconds. The next call after that is let
+    through; it closes the circuit if it succeeds.
+    """
+
+    def __init__(self, provider, threshold, cooldown):
+        self.provider = provider
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"{self.provider} failed {self.failures} times in a row, "
+                    f"not calling it for another {remaining:.0f}s"
+                )
+            # Half open: let this call through, one more failure reopens the circuit
+            self.opened_at = None
+            self.failures = self.threshold - 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self, kind):
+        # Errors about the request itself say nothing about the provider's health
+        if kind not in TRANSIENT_ERRORS:
+            return
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+def get_breaker(provider):
+    """Get the circuit breaker of a provider (one per process)"""
+    with _breakers_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                provider,
+                int(get_env_number("PROMPTLY_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD)),
+                get_env_number("PROMPTLY_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN),
+            )
+            _breakers[provider] = breaker
+        return breaker
+
+
+def notify_retry(provider, kind, delay, attempt):
+    """Tell the user why the answer is late (on stderr, never in the answer)"""
+    reason = kind.replace("_", " ")
+    sys.stderr.write(f"{provider}: {reason}, retrying in {delay:.1f}s (attempt {attempt + 2})\n")
+    sys.stderr.flush()
+
+
+def resilient_stream(provider, open_stream):
+    """
+    Stream an answer, retrying transient failures.
+
+    A request is only retried until its first token arrives: once text has
+    been handed to the caller, a failure is raised as is, so streamed output
+    is never duplicated.
+
+    Args:
+        provider (str): Provider name, for its circuit breaker
+        open_stream (callable): Sends the request, returns an iterator of text
+
+    Yields:
+        str: Pieces of the response text
+    """
+    breaker = get_breaker(provider)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        stream = open_stream()
+        try:
+            first = next(stream)
+        except StopIteration:
+            breaker.record_success()
+            return
+        except Exception as e:
+            close_stream(stream)
+            kind = classify_error(e)
+            breaker.record_failure(kind)
+            delay = retry_delay(e, kind, attempt)
+            if delay is None:
+                raise
+            notify_retry(provider, kind, delay, attempt)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Ctrl+C while waiting for the first token
+            close_stream(stream)
+            raise
+        breaker.record_success()
+        break
+
+    try:
+        yield first
+        for content in stream:
+            yield content
+    except Exception as e:
+        breaker.record_failure(classify_error(e))
+        raise
+    finally:
+        close_stream(stream)
+
+
+async def aresilient_stream(provider, open_stream):
+    """Async version of resilient_stream, `open_stream` returns an async iterator"""
+    import asyncio
+
+    breaker = get_breaker(provider)
+    attempt = 0
+    while True:
+        breaker.before_call()
+        stream = open_stream().__aiter__()
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            breaker.record_success()
+            return
+        except Exception as e:
+            await aclose_stream(stream)
+            kind = classify_error(e)
+            breaker.record_failure(kind)
+            delay = retry_delay(e, kind, attempt)
+            if delay is None:
+                raise
+            notify_retry(provider, kind, delay, attempt)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Cancelled while waiting for the first token
+            await aclose_stream(stream)
+            raise
+        breaker.record_success()
+        break
+
+    try:
+        yield first
+        async for content in stream:
+            yield content
+    except Exception as e:
+        breaker.record_failure(classify_error(e))
+        raise
+    finally:
+        await aclose_stream(stream)
@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from .config import CONFIG_DIR, get_env_number
+
+# Local cache of single-completion answers, keyed by a hash of the request
+CACHE_PATH = os.path.join(CONFIG_DIR, 'responses.sqlite')
+
+# Cache modes
+CACHE_OFF = "off"
+CACHE_ON = "on"
+CACHE_ONLY = "only"
+
+# Eviction limits, overridable with PROMPTLY_CACHE_MAX_MB,
+# PROMPTLY_CACHE_MAX_ENTRIES and PROMPTLY_CACHE_MAX_AGE_DAYS
+DEFAULT_MAX_MB = 50
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_AGE_DAYS = 30
+
+_cache_mode = None
+_db_lock = threading.Lock()
+
+
+class CacheMiss(Exception):
+    """Raised in --cache-only mode when there is no cached answer"""
+
+
+def set_cache_mode(mode):
+    """Set the cache mode for the rest of the process (--cache, --no-cache, --cache-only)"""
+    global _cache_mode
+    _cache_mode = mode
+
+
+def get_cache_mode():
+    """
+    Get the cache mode.
+
+    The cache is opt-in: it is used with --cache or when PROMPTLY_RESPONSE_CACHE
+    is set to 1, and --no-cache always wins.
+    """
+    if _cache_mode is not None:
+        return _cache_mode
+    if os.environ.get("PROMPTLY_RESPONSE_CACHE", "").lower() in ("1", "true", "yes", "on"):
+        return CACHE_ON
+    return CACHE_OFF
+
+
+def cache_key(provider, model, messages, params):
+    """Content address of a request: a hash of everything that shapes the answer"""
+    payload = json.dumps(
+        {"provider": provider, "model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _connect():
+    import sqlite3
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    db = sqlite3.connect(CACHE_PATH, timeout=5)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS responses ("
+        " key TEXT PRIMARY KEY,"
+        " provider TEXT,"
+        " model TEXT,"
+        " response TEXT,"
+        " size INTEGER,"
+        " created_at REAL,"
+        " last_access REAL)"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+    return db
+
+
+def get_cached_response(key):
+    """Return the cached answer for a key, or None"""
+    max_age = get_env_number("PROMPTLY_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS) * 86400
+    now = time.time()
+    try:
+        with _db_lock:
+            db = _connect()
+            try:
+                row = db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > max_age:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    db.commit()
+                    return None
+                db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                db.commit()
+                return row[0]
+            finally:
+                db.close()
+    except Exception:
+        # A broken cache must never break a request
+        return None
+
+
+def store_response(key, provider, model, response):
+    """Store an answer and evict old entries to stay within the limits"""
+    max_bytes = get_env_number("PROMPTLY_CACHE_MAX_MB", DEFAULT_MAX_MB) * 1024 * 1024
+    max_entries = int(get_env_number("PROMPTLY_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    max_age = get_env_number("PROMPTLY_CACHE_MAX_AGE_DAYS", DEFAULT_MAX_AGE_DAYS) * 86400
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    try:
+        with _db_lock:
+            db = _connect()
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, provider, model, response, size, now, now),
+                )
+                # Age-based eviction
+                db.execute("DELETE FROM responses WHERE created_at < ?", (now - max_age,))
+                # Size-based eviction, least recently used first
+                count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+                while count > max_entries or total > max_bytes:
+                    rows = db.execute(
+                        "SELECT key, size FROM responses ORDER BY last_access LIMIT ?",
+                        (max(1, count - max_entries),),
+                    ).fetchall()
+                    if not rows:
+                        break
+                    db.executemany("DELETE FROM responses WHERE key = ?", [(row[0],) for row in rows])
+                    count -= len(rows)
+                    total -= sum(row[1] for row in rows)
+                db.commit()
+            finally:
+                db.close()
+    except Exception:
+        pass
+
+
+def cached_stream(provider, model, messages, params, open_stream):
+    """
+    Serve a request from the cache when possible.
+
+    Args:
+        provider (str): Provider name
+        model (str): Model name
+        messages (list): Conversation sent to the model
+        params (dict): Generation parameters that change the answer
+        open_stream (callable): Starts the live request, returns an iterator of text
+
+    Returns:
+        iterator: Pieces of the answer, replayed from the cache or streamed live
+    """
+    mode = get_cache_mode()
+    if mode == CACHE_OFF:
+        return open_stream()
+
+    key = cache_key(provider, model, messages, params)
+    cached = get_cached_response(key)
+    if cached is not None:
+        return iter([cached])
+    if mode == CACHE_ONLY:
+        def miss():
+            # Raised when iterated so the renderer reports it like any error
+            raise CacheMiss(f"No cached answer for this prompt with {provider}/{model}")
+            yield
+        return miss()
+
+    def record():
+        parts = []
+        stream = open_stream()
+        try:
+            for content in stream:
+                parts.append(content)
+                yield content
+        finally:
+            # Closing the wrapper closes the provider stream
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        # Only complete answers are cached, an interrupted or failed one skips this
+        if parts:
+            store_response(key, provider, model, "".join(parts))
+
+    return record()
+
+
+async def acached_stream(provider, model, messages, params, open_stream):
+    """Async version of cached_stream, `open_stream` returns an async iterator"""
+    mode = get_cache_mode()
+    if mode != CACHE_OFF:
+        key = cache_key(provider, model, messages, params)
+        cached = get_cached_response(key)
+        if cached is not None:
+            yield cached
+            return
+        if mode == CACHE_ONLY:
+            raise CacheMiss(f"No cached answer for this prompt with {provider}/{model}")
+
+    parts = []
+    stream = open_stream()
+    try:
+        async for content in stream:
+            parts.append(content)
+            yield content
+    finally:
+        # Closing the wrapper closes the provider stream
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    # Only complete answers are cached, an error above skips this
+    if mode != CACHE_OFF and parts:
+        store_response(key, provider, model, "".join(parts))
@@ -5,36 +5,32 @@ from rich.style import Style
 from rich.markdown import Markdown
 from rich.status import Status
 from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
 from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
 from prompt_toolkit.completion import WordCompleter
 from prompt_toolkit.styles import Style as PromptStyle
-import os
-from .config import get_available_providers
+from .providers import provider_names
 from .llm_global import retrieve_models, single_completion
+from .discovery import discover_models
+from .raw import is_raw_mode
+from .oneshot import check_provider, run_raw_with_model_and_prompt
 from .chat import chat
+from .history import get_history
+from .hedge import is_fallback_mode
+from .model_check import UnknownModelError, is_strict_validation
+from .render import print_unknown_model
+from .timings import span
 
 
 def run_no_args():
     console = Console()
     
-    # Set up prompt_toolkit session with history
-    history_file = os.path.join(os.path.expanduser("~"), ".promptly_history")
-    session = PromptSession(
-        history=FileHistory(history_file),
-        auto_suggest=AutoSuggestFromHistory(),
-        enable_history_search=True,
-        complete_in_thread=True,
-        complete_while_typing=True
-    )
-    
     # Define prompt style - corrected from previous errors
     prompt_style = PromptStyle.from_dict({
         'prompt': 'bold green',
     })
 
     # 1. check for all AVAILABLE providers
-    providers = ["openai", "mistral", "anthropic", "deepseek", "gemini", "ollama"]
+    providers = provider_names()
     available_providers = []
     
     with Status("[bold green]Loading available providers...", spinner="dots") as status:
@@ -44,12 +40,18 @@ def run_no_args():
         provider_table.add_column("Provider", style="green")
         provider_table.add_column("Available Models", style="cyan", justify="right")
         
-        # First, collect all available providers
-        for provider in providers:
-            status.update(f"[bold green]Checking provider: [cyan]{provider}[/cyan]...")
-            models = retrieve_models(provider)
-            if models != []:
-                available_providers.append((provider, len(models)))
+        # First, collect all available providers, querying them all at once
+        pending = list(providers)
+
+        def on_result(result):
+            pending.remove(result["provider"])
+            if pending:
+                status.update(f"[bold green]Waiting for: [cyan]{', '.join(pending)}[/cyan]...")
+
+        results = discover_models(providers, on_result=on_result)
+        for provider, result in results.items():
+            if result["models"]:
+                available_providers.append((provider, len(result["models"])))
         
         # Then add them to the table with sequential numbering
         for idx, (provider, model_count) in enumerate(available_providers, start=1):
@@ -76,16 +78,16 @@ def run_no_args():
     
     # Now available_providers is a list of tuples (provider_name, model_count)
     # We need to extract just the provider names for later use
-    provider_names = [provider for provider, _ in available_providers]
+    available_names = [provider for provider, _ in available_providers]
     
     # Create completers for the providers
     # We'll create completers for both provider names and numeric indices
-    provider_name_completer = WordCompleter(provider_names)
-    provider_idx_completer = WordCompleter([str(i) for i in range(1, len(provider_names) + 1)])
+    provider_name_completer = WordCompleter(available_names)
+    provider_idx_completer = WordCompleter([str(i) for i in range(1, len(available_names) + 1)])
     
     # Combine both completers by creating a session with both options
     provider_session = PromptSession(
-        history=FileHistory(history_file),
+        history=get_history("provider"),
         auto_suggest=AutoSuggestFromHistory(),
         completer=provider_idx_completer,  # Primary completer is numeric selection
         enable_history_search=True,
@@ -138,21 +140,21 @@ def run_no_args():
                 prompt_result = "1"
                 
             # Check if the input is a provider name directly
-            if prompt_result in provider_names:
+            if prompt_result in available_names:
                 provider = prompt_result
-                provider_idx = provider_names.index(provider)
+                provider_idx = available_names.index(provider)
                 console.print(f"[bold green]Selected provider:[/bold green] [bold cyan]{provider}[/bold cyan]")
                 break
                 
             try:
                 provider_idx = int(prompt_result) - 1
-                if 0 <= provider_idx < len(provider_names):
-                    provider = provider_names[provider_idx]
+                if 0 <= provider_idx < len(available_names):
+                    provider = available_names[provider_idx]
                     console.print(f"[bold green]Selected provider:[/bold green] [bold cyan]{provider}[/bold cyan]")
                     break
                 else:
                     # Display the table first, then the error
-                    display_provider_error(f"Please enter a number between 1 and {len(provider_names)}")
+                    display_provider_error(f"Please enter a number between 1 and {len(available_names)}")
             except ValueError:
                 # Display the table first, then the error
                 display_provider_error("Please enter a valid number or provider name")
@@ -184,7 +186,7 @@ def run_no_args():
     
     # Create a session with model options
     model_session = PromptSession(
-        history=FileHistory(history_file),
+        history=get_history("model"),
         auto_suggest=AutoSuggestFromHistory(),
         completer=model_idx_completer,  # Primary completer is numeric selection
         enable_history_search=True,
@@ -268,6 +270,19 @@ def run_no_args():
     chat(provider, model)
     return 0
 
+def validate_model(provider, model):
+    """Check a model against the provider's model list before any request (strict validation)"""
+    with Status(f"[bold green]Checking if [cyan]{provider}/{model}[/cyan] is available...", spinner="dots"):
+        with span("validate model"):
+            models = retrieve_models(provider)
+            if model not in models:
+                # The cached catalog may predate the model, check the provider directly
+                models = retrieve_models(provider, refresh=True)
+    if model not in models:
+        print_unknown_model(UnknownModelError(provider, model, models))
+        return False
+    return True
+
 def run_with_model(arg):
     console = Console()
 
@@ -285,31 +300,14 @@ def run_with_model(arg):
     
     provider, model = parts
     
-    # 2. check if the provider and model are available
-    with Status(f"[bold green]Checking if provider [cyan]{provider}[/cyan] is available...", spinner="dots") as status:
-        available_providers = get_available_providers()
-        
-        if provider not in available_providers:
-            console.print(Panel(
-                f"[bold red]Provider '{provider}' not found![/bold red]\nAvailable providers: {', '.join(available_providers)}",
-                title="Error",
-                border_style="red",
-                expand=False
-            ))
-            return 1
-        
-        # Check if the model is available for this provider
-        models = retrieve_models(provider)
-        if model not in models:
-            # Stop the status spinner before showing the error message
-            status.stop()
-            console.print(Panel(
-                f"[bold red]Model '{model}' not found for provider '{provider}'![/bold red]\nAvailable models: {', '.join(models[:10])}{'...' if len(models) > 10 else ''}",
-                title="Error",
-                border_style="red",
-                expand=False
-            ))
-            return 1
+    # 2. check the provider; the model is only looked up if the provider
+    # rejects it (see model_check.py), unless validation is strict
+    error = check_provider(provider)
+    if error:
+        console.print(Panel(f"[bold red]{error}[/bold red]", title="Error", border_style="red", expand=False))
+        return 1
+    if is_strict_validation() and not validate_model(provider, model):
+        return 1
     
     # Show startup message
     console.print("")
@@ -324,6 +322,19 @@ def run_with_model(arg):
     return 0
 
 def run_with_model_and_prompt(arg1, arg2):
+    # Several comma-separated targets: with --fallback, answer with the first
+    # one that streams, otherwise compare the models side by side
+    if ',' in arg1 and is_fallback_mode():
+        from .hedge import run_hedged
+        return run_hedged(arg1, arg2)
+    if ',' in arg1:
+        from .fanout import run_fanout
+        return run_fanout(arg1, arg2)
+
+    # Scripts and pipes get the bare answer, without panels or spinners
+    if is_raw_mode():
+        return run_raw_with_model_and_prompt(arg1, arg2)
+
     console = Console()
 
     # 1. parse the argument to get the provider and model
@@ -340,31 +351,14 @@ def run_with_model_and_prompt(arg1, arg2):
     
     provider, model = parts
     
-    # Check if the provider is available
-    with Status(f"[bold green]Checking if provider [cyan]{provider}[/cyan] is available...", spinner="dots") as status:
-        available_providers = get_available_providers()
-        
-        if provider not in available_providers:
-            console.print(Panel(
-                f"[bold red]Provider '{provider}' not found![/bold red]\nAvailable providers: {', '.join(available_providers)}",
-                title="Error",
-                border_style="red",
-                expand=False
-            ))
-            return 1
-        
-        # Check if the model is available for this provider
-        models = retrieve_models(provider)
-        if model not in models:
-            # Stop the status spinner before showing the error message
-            status.stop()
-            console.print(Panel(
-                f"[bold red]Model '{model}' not found for provider '{provider}'![/bold red]\nAvailable models: {', '.join(models[:10])}{'...' if len(models) > 10 else ''}",
-                title="Error",
-                border_style="red",
-                expand=False
-            ))
-            return 1
+    # 2. check the provider; the model is only looked up if the provider
+    # rejects it (see model_check.py), unless validation is strict
+    error = check_provider(provider)
+    if error:
+        console.print(Panel(f"[bold red]{error}[/bold red]", title="Error", border_style="red", expand=False))
+        return 1
+    if is_strict_validation() and not validate_model(provider, model):
+        return 1
 
 
     # Get the prompt from arg2
@@ -381,9 +375,8 @@ def run_with_model_and_prompt(arg1, arg2):
     # 3. Send a single request to the model
     result = single_completion(provider, model, prompt)
     
-    # If there's no output (which is the case with ollama since it streams directly)
-    # we should at least provide some feedback that we're done
-    if result is None or result == "":
+    # If the model answered with nothing, we should at least provide some feedback that we're done
+    if result == "":
         console.print("\n\n[bold green]Completion finished.[/bold green]")
     
-    return 0
+    return 0 if result is not None else 1
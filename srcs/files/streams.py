@@ -0,0 +1,38 @@
+class StreamInterrupted(KeyboardInterrupt):
+    """
+    Raised when the user interrupts an answer while it streams (Ctrl+C).
+
+    It is a KeyboardInterrupt, so callers that don't care keep handling it as
+    one. `partial` holds the text received before the interruption.
+    """
+
+    def __init__(self, partial=""):
+        super().__init__()
+        self.partial = partial
+
+
+def close_stream(chunks):
+    """
+    Close a stream of text chunks.
+
+    Closing the generators of a provider stream closes the HTTP response
+    under them, so the provider stops generating (and billing) right away
+    and the connection isn't left half read.
+    """
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            # The stream is being abandoned anyway
+            pass
+
+
+async def aclose_stream(stream):
+    """Async version of close_stream, for async iterators of text chunks"""
+    aclose = getattr(stream, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# Reference point of every span: the moment the CLI started running its code
+_process_start = time.perf_counter()
+
+# Turned on by --timings; PROMPTLY_METRICS=path turns recording on as well
+_show_timings = False
+_metrics_path = None
+_enabled = False
+
+# (name, start, duration) tuples, in seconds since _process_start
+_spans = []
+
+# Shared do-nothing context manager returned while timings are off
+_NO_SPAN = nullcontext()
+
+
+def set_timings(value=True):
+    """Print a phase breakdown when the command ends (used by --timings)"""
+    global _show_timings
+    _show_timings = value
+    configure_timings()
+
+
+def configure_timings():
+    """Read PROMPTLY_METRICS (call again once the config file is loaded)"""
+    global _metrics_path, _enabled
+    _metrics_path = os.environ.get("PROMPTLY_METRICS") or None
+    _enabled = _show_timings or _metrics_path is not None
+
+
+def process_start():
+    """perf_counter value spans are measured from"""
+    return _process_start
+
+
+def record(name, start, duration):
+    """Record a phase that started at `start` (a perf_counter value) and lasted `duration` seconds"""
+    if _enabled:
+        _spans.append((name, start - _process_start, duration))
+
+
+@contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, start, time.perf_counter() - start)
+
+
+def span(name):
+    """
+    Time a block of code as a phase of the command.
+
+    Usage:
+        with span("load_environment"):
+            load_environment()
+
+    Costs a single flag check when timings are off.
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _timed(name)
+
+
+def timed_stream(chunks, name="request"):
+    """
+    Time a streamed answer.
+
+    Records `<name>` (request sent until first token, i.e. time to first
+    token) and `stream` (first token until the end). Returns `chunks`
+    untouched when timings are off.
+    """
+    if not _enabled:
+        return chunks
+
+    def timed():
+        start = time.perf_counter()
+        first = None
+        try:
+            for content in chunks:
+                if first is None:
+                    first = time.perf_counter()
+                    record(name, start, first - start)
+                yield content
+        finally:
+            # Closing the wrapper closes the provider stream
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            if first is not None:
+                record("stream", first, time.perf_counter() - first)
+            else:
+                record(name, start, time.perf_counter() - start)
+
+    return timed()
+
+
+def timed_calls(name, function):
+    """
+    Wrap a function called many times so its total time is one phase.
+
+    Returns `function` itself when timings are off.
+    """
+    if not _enabled:
+        return function
+
+    state = {"start": None, "total": 0.0}
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        if state["start"] is None:
+            state["start"] = start
+        try:
+            return function(*args, **kwargs)
+        finally:
+            state["total"] += time.perf_counter() - start
+
+    def flush():
+        """Record the accumulated time (call once, when done)"""
+        if state["start"] is not None:
+            record(name, state["start"], state["total"])
+
+    wrapper.flush = flush
+    return wrapper
+
+
+def print_timings(spans, total, out=None):
+    """Print the phase breakdown as plain text (on stderr by default)"""
+    out = out or sys.stderr
+    width = max([len(name) for name, _, _ in spans] + [len("total")])
+    out.write("\nTimings:\n")
+    for name, start, duration in sorted(spans, key=lambda item: item[1]):
+        out.write(f"  {name:<{width}}  {duration * 1000:9.1f} ms  (at {start * 1000:.1f} ms)\n")
+    out.write(f"  {'total':<{width}}  {total * 1000:9.1f} ms\n")
+    out.flush()
+
+
+def write_metrics(path, spans, total, status):
+    """Append a JSON record of the command to the metrics log"""
+    entry = {
+        "timestamp": time.time(),
+        "argv": sys.argv[1:],
+        "status": status,
+        "total_ms": round(total * 1000, 2),
+        "spans": [
+            {"name": name, "start_ms": round(start * 1000, 2), "duration_ms": round(duration * 1000, 2)}
+            for name, start, duration in spans
+        ],
+    }
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        sys.stderr.write(f"Warning: could not write metrics to {path}: {e}\n")
+
+
+def finish(status=0):
+    """Report the recorded phases: --timings breakdown and/or PROMPTLY_METRICS log"""
+    if not _enabled:
+        return
+    total = time.perf_counter() - _process_start
+    spans = list(_spans)
+    if _show_timings:
+        print_timings(spans, total)
+    if _metrics_path:
+        write_metrics(_metrics_path, spans, total, status)
+
+
+configure_timings()
@@ -0,0 +1,13 @@
+import math
+
+# Average number of characters per token for English text with the usual BPE
+# tokenizers. Streams don't report usage for every provider, so counts shown
+# to the user are estimates based on this ratio.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in a text"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
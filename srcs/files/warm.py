@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from .model_check import looks_like_unknown_model, unknown_model_error
+from .providers import get_provider
+
+# A local model has to be read from disk before it answers, which takes
+# seconds for large ones. `llm warm` loads it ahead of time, and a chat
+# starts loading it while the first message is still being typed.
+
+
+def preload_enabled():
+    """Return False if PROMPTLY_OLLAMA_PRELOAD=0 turned the chat preload off"""
+    return os.environ.get("PROMPTLY_OLLAMA_PRELOAD", "1").lower() not in ("0", "false", "no", "off")
+
+
+def preload_in_background(provider, model):
+    """
+    Start loading a model without waiting for it.
+
+    Does nothing for providers without the "warmup" capability. Errors are
+    ignored: the first request reports them if they persist.
+    """
+    backend = get_provider(provider)
+    if backend is None or "warmup" not in backend.capabilities or not preload_enabled():
+        return None
+
+    def preload():
+        try:
+            backend.warm(model)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=preload, name="promptly-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def run_warm(args):
+    """`llm warm provider/model [keep_alive]`: load a model and report how long it took"""
+    from rich.console import Console
+    from rich.panel import Panel
+    from rich.status import Status
+    from .llm_global import retrieve_models
+    from .oneshot import check_provider
+
+    console = Console()
+
+    def print_error(message):
+        console.print(Panel(f"[bold red]{message}[/bold red]", title="Error", border_style="red", expand=False))
+
+    if len(args) not in (1, 2):
+        print_error("Usage: llm warm provider/model [keep_alive]")
+        return 1
+    parts = args[0].split('/', 1)
+    if len(parts) != 2:
+        print_error(f"Invalid format: {args[0]}\nExpected format: provider/modelname")
+        return 1
+    provider, model = parts
+    keep_alive = args[1] if len(args) == 2 else None
+
+    error = check_provider(provider)
+    if error:
+        print_error(error)
+        return 1
+    backend = get_provider(provider)
+    if "warmup" not in backend.capabilities:
+        print_error(f"Provider '{provider}' runs its models remotely, there is nothing to load")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        with Status(f"[bold green]Loading [cyan]{provider}/{model}[/cyan]...", spinner="dots"):
+            backend.warm(model, keep_alive)
+    except Exception as e:
+        unknown = looks_like_unknown_model(e) and unknown_model_error(
+            provider, model, retrieve_models(provider, refresh=True))
+        if unknown:
+            from .render import print_unknown_model
+            print_unknown_model(unknown)
+        else:
+            print_error(f"Could not load {provider}/{model}: {e}")
+        return 1
+
+    console.print(f"[bold green]Loaded [cyan]{provider}/{model}[/cyan] in {time.perf_counter() - start:.1f}s[/bold green]")
+    return 0
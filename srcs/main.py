@@ -1,32 +1,97 @@
 import sys
-from files.man import Usage, list, run, help
+import time
+from files.timings import record, configure_timings, set_timings, finish, process_start
 from files.config import load_environment, debug_env_vars
+from files.catalog import set_force_refresh, wait_for_refreshes
+from files.raw import set_raw_mode
+from files.response_cache import set_cache_mode, CACHE_ON, CACHE_OFF, CACHE_ONLY
+from files.hedge import set_fallback_mode
+
+FLAGS = {
+    # Skip the cached model catalog and refetch from the providers
+    "--refresh": set_force_refresh,
+    # Write answers as plain text (automatic when stdout is not a terminal)
+    "--raw": set_raw_mode,
+    # Serve repeated single prompts from the local response cache
+    "--cache": lambda: set_cache_mode(CACHE_ON),
+    "--no-cache": lambda: set_cache_mode(CACHE_OFF),
+    "--cache-only": lambda: set_cache_mode(CACHE_ONLY),
+    # Print how long each phase of the command took
+    "--timings": set_timings,
+    # Treat `llm run a/x,b/y "prompt"` as a failover list, not a comparison
+    "--fallback": set_fallback_mode,
+}
 
 def main():
+    imported = time.perf_counter()
+
     # Force reload environment variables on each run
     load_environment(force_reload=True)
+    loaded = time.perf_counter()
     
     # Uncomment for debugging
     # debug_env_vars()
     
     args = sys.argv[1:]  # Get all command line arguments except the script name
+
+    # Global flags, accepted anywhere on the command line
+    for flag, enable in FLAGS.items():
+        if flag in args:
+            args = [arg for arg in args if arg != flag]
+            enable()
+
+    # PROMPTLY_METRICS may come from the config file, loaded above
+    configure_timings()
+    record("imports", process_start(), imported - process_start())
+    record("load_environment", imported, loaded - imported)
     
+    try:
+        status = route(args)
+    except KeyboardInterrupt:
+        # Ctrl+C outside of a chat: streams are already closed, just stop
+        status = 130
+
+    if status != 130:
+        # The answer is complete: make sure it's out before waiting on anything else
+        sys.stdout.flush()
+        wait_for_refreshes()
+
+    finish(status or 0)
+    sys.exit(status or 0)
+
+def route(args):
+    """Run the command given on the command line and return its exit status"""
+    # Commands are imported when used, each loads only the UI it needs
+    status = 0
     if not args:
         # No arguments were provided
+        from files.man import Usage
         Usage()
     else:
         # Process command line arguments
         if args[0] == "list":
+            from files.man import list
             list(args)
         elif args[0] == "run":
-            run(args)
+            from files.man import run
+            status = run(args)
+        elif args[0] == "batch":
+            from files.man import batch
+            status = batch(args)
+        elif args[0] == "serve":
+            from files.man import serve
+            status = serve(args)
+        elif args[0] == "warm":
+            from files.man import warm
+            status = warm(args)
         elif args[0] == "help":
+            from files.man import help
             help()
         elif args[0] == "debug":
             # Add a debug command to show environment variables
             debug_env_vars()
 
-    sys.exit(0)
+    return status
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
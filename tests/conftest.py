@@ -0,0 +1,97 @@
+import os
+import pty
+import subprocess
+import sys
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT_DIR, "srcs", "main.py")
+
+sys.path.insert(0, os.path.join(ROOT_DIR, "bench"))
+from fake_servers import FakeConfig, start_server  # noqa: E402
+
+# Unit tests import the CLI's modules directly
+sys.path.insert(0, os.path.join(ROOT_DIR, "srcs"))
+
+# Models listed by every fake server
+MODELS = ["bench-model", "bench-model-1"]
+
+# Start of every fake answer (see fake_servers.ANSWER_WORDS)
+ANSWER = "The **quick** brown fox"
+
+
+@pytest.fixture(scope="session")
+def servers():
+    """One fake server per protocol the tests talk to: {protocol: base URL}"""
+    config = FakeConfig(MODELS, tokens=20)
+    started = {protocol: start_server(protocol, config) for protocol in ("openai", "gemini", "ollama")}
+    yield {protocol: f"http://127.0.0.1:{server.server_address[1]}" for protocol, server in started.items()}
+    for server in started.values():
+        server.shutdown()
+
+
+def provider_env(servers):
+    """Settings pointing openai, gemini and ollama at the fake servers"""
+    return {
+        "OPENAI_API_KEY": "test",
+        # The OpenAI SDK expects the /v1 prefix in the base URL, the others add it
+        "OPENAI_BASE_URL": f"{servers['openai']}/v1",
+        "GEMINI_API_KEY": "test",
+        "GEMINI_BASE_URL": servers["gemini"],
+        "OLLAMA_ADDR": servers["ollama"],
+    }
+
+
+@pytest.fixture
+def home(tmp_path, servers):
+    """Throwaway HOME whose config file points the providers at the fake servers"""
+    config_dir = tmp_path / ".config" / "promptly_cli"
+    config_dir.mkdir(parents=True)
+    # The CLI reloads keys from its .env file, so they go there rather than in the environment
+    (config_dir / ".env").write_text("".join(f"{key}={value}\n" for key, value in provider_env(servers).items()))
+    return tmp_path
+
+
+@pytest.fixture
+def llm(home):
+    """Run the CLI in a subprocess, like the `llm` wrapper does; stdout is a pipe, so answers are raw"""
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith("PROMPTLY_") and not key.endswith(("_API_KEY", "_BASE_URL"))}
+    env.update(HOME=str(home), COLUMNS="200", PYTHONDONTWRITEBYTECODE="1")
+
+    def run(*args, input="", timeout=60, tty=False, **extra_env):
+        if not tty:
+            return subprocess.run([sys.executable, MAIN, *args], input=input, capture_output=True, text=True,
+                                  timeout=timeout, env=dict(env, **extra_env))
+
+        # stdout on a pseudo-terminal gets the rendered output (spinners, panels, Markdown)
+        master, slave = pty.openpty()
+        output = []
+
+        def read():
+            while True:
+                try:
+                    data = os.read(master, 4096)
+                except OSError:
+                    # EIO once the child closed its end
+                    break
+                if not data:
+                    break
+                output.append(data)
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        try:
+            process = subprocess.Popen([sys.executable, MAIN, *args], stdin=subprocess.PIPE, stdout=slave,
+                                       stderr=subprocess.PIPE, text=True, env=dict(env, **extra_env))
+            os.close(slave)
+            _, stderr = process.communicate(input, timeout=timeout)
+            reader.join(timeout)
+        finally:
+            os.close(master)
+        return subprocess.CompletedProcess(process.args, process.returncode,
+                                           b"".join(output).decode(errors="replace"), stderr)
+
+    return run
@@ -0,0 +1,89 @@
+"""llm batch, in-process with a fake backend"""
+import json
+import threading
+import time
+
+from files import batch, providers
+
+
+class SlowBackend:
+    """Answers "prompt-N" after delays[N] seconds, recording when each request starts and ends"""
+
+    name = "fake"
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = {}
+        self.ended = {}
+        self.lock = threading.Lock()
+
+    def is_configured(self):
+        return True
+
+    def retrying_stream(self, model, messages):
+        index = int(messages[0]["content"].split("-")[1])
+        with self.lock:
+            self.started[index] = time.monotonic()
+        time.sleep(self.delays[index])
+        with self.lock:
+            self.ended[index] = time.monotonic()
+        yield f"answer-{index}"
+
+
+def run(monkeypatch, tmp_path, backend, count, *options):
+    monkeypatch.setitem(providers._providers, "fake", backend)
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text("".join(json.dumps(f"prompt-{i}") + "\n" for i in range(count)))
+    output = tmp_path / "results.jsonl"
+    status = batch.run_batch(["fake/model", "--input", str(prompts), "--output", str(output), *options])
+    return status, [json.loads(line) for line in output.read_text().splitlines()]
+
+
+def test_slow_item_doesnt_stall_the_others(monkeypatch, tmp_path):
+    backend = SlowBackend([1.0] + [0.05] * 11)
+    status, records = run(monkeypatch, tmp_path, backend, 12, "--concurrency", "4")
+
+    assert status == 0
+    assert [record["response"] for record in records] == [f"answer-{i}" for i in range(12)]
+    # The other workers went through every other item while the first one was running
+    assert max(backend.started.values()) < backend.ended[0]
+
+
+def test_unordered(monkeypatch, tmp_path):
+    backend = SlowBackend([0.3, 0.0, 0.0])
+    status, records = run(monkeypatch, tmp_path, backend, 3, "--concurrency", "3", "--unordered")
+
+    assert status == 0
+    assert records[-1]["index"] == 0
+    assert sorted(record["index"] for record in records) == [0, 1, 2]
+
+
+def test_missing_input_keeps_the_output(monkeypatch, tmp_path, capsys):
+    monkeypatch.setitem(providers._providers, "fake", SlowBackend([]))
+    output = tmp_path / "results.jsonl"
+    output.write_text("previous results\n")
+
+    status = batch.run_batch(["fake/model", "--input", str(tmp_path / "missing.jsonl"), "--output", str(output)])
+
+    assert status == 1
+    assert "Can't read" in capsys.readouterr().err
+    assert output.read_text() == "previous results\n"
+
+
+def test_unwritable_output(monkeypatch, tmp_path, capsys):
+    monkeypatch.setitem(providers._providers, "fake", SlowBackend([]))
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text('"hi"\n')
+
+    status = batch.run_batch(["fake/model", "--input", str(prompts), "--output", str(tmp_path / "missing" / "out.jsonl")])
+
+    assert status == 1
+    assert "Can't write" in capsys.readouterr().err
+
+
+def test_unconfigured_provider(monkeypatch, tmp_path, capsys):
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    status = batch.run_batch(["mistral/model", "--input", str(tmp_path / "prompts.jsonl")])
+    assert status == 1
+    # Same message as llm run, with the config file to edit
+    assert "MISTRAL_API_KEY not found, please set it in your config file" in capsys.readouterr().err
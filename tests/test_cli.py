@@ -0,0 +1,178 @@
+"""Smoke tests: every subcommand against the fake provider servers (bench/fake_servers.py)"""
+import json
+import shutil
+import tempfile
+
+import pytest
+
+from conftest import ANSWER, MODELS
+
+
+def test_usage(llm):
+    result = llm()
+    assert result.returncode == 0
+    assert "llm run" in result.stdout
+
+
+def test_help(llm):
+    result = llm("help")
+    assert result.returncode == 0
+    assert "llm list" in result.stdout
+
+
+def test_debug(llm):
+    result = llm("debug")
+    assert result.returncode == 0
+
+
+def test_list(llm):
+    result = llm("list")
+    assert result.returncode == 0
+    for provider in ("openai", "gemini", "ollama"):
+        assert f"{provider.upper()} Models" in result.stdout
+    assert "bench-model-1" in result.stdout
+
+
+def test_list_provider(llm):
+    result = llm("list", "ollama")
+    assert result.returncode == 0
+    for model in MODELS:
+        assert model in result.stdout
+
+
+PLUGIN = """
+from files.providers import Provider
+
+
+class InhouseProvider(Provider):
+    requires_api_key = False
+
+    def list_models(self):
+        return ["house-model"]
+
+    def stream_chat(self, model, messages):
+        yield "house answer"
+"""
+
+
+@pytest.fixture
+def plugin(tmp_path):
+    """PYTHONPATH with an installed keyless provider plugin, named inhouse"""
+    site = tmp_path / "site"
+    dist_info = site / "inhouse_llm-0.1.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: inhouse-llm\nVersion: 0.1\n")
+    (dist_info / "entry_points.txt").write_text("[promptly_cli.providers]\ninhouse = inhouse_llm:InhouseProvider\n")
+    (site / "inhouse_llm.py").write_text(PLUGIN)
+    return {"PYTHONPATH": str(site)}
+
+
+def test_keyless_plugin(llm, plugin):
+    result = llm("list", **plugin)
+    assert result.returncode == 0, result.stderr
+    assert "INHOUSE Models" in result.stdout
+    assert "house-model" in result.stdout
+
+    result = llm("list", "inhouse", **plugin)
+    assert "house-model" in result.stdout
+    assert "Missing API Key" not in result.stdout
+
+    result = llm("run", "inhouse/house-model", "hi", **plugin)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("house answer")
+
+
+@pytest.mark.parametrize("target", ["openai/bench-model", "gemini/models/bench-model", "ollama/bench-model"])
+def test_run_one_shot(llm, target):
+    result = llm("run", target, "hi")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith(ANSWER)
+
+
+def test_run_one_shot_terminal(llm):
+    result = llm("run", "ollama/bench-model", "hi", tty=True)
+    assert result.returncode == 0, result.stderr
+    assert "quick" in result.stdout
+
+
+def test_run_unknown_model(llm):
+    result = llm("run", "openai/no-such-model", "hi")
+    assert result.returncode == 1
+    assert "no-such-model" in result.stdout + result.stderr
+
+
+def test_run_unknown_provider(llm):
+    result = llm("run", "nope/bench-model", "hi")
+    assert result.returncode == 1
+
+
+def test_run_fanout(llm):
+    result = llm("run", "openai/bench-model,ollama/bench-model", "hi")
+    assert result.returncode == 0, result.stderr
+    assert "openai/bench-model" in result.stdout
+    assert "ollama/bench-model" in result.stdout
+    assert result.stdout.count("quick") >= 2
+
+
+def test_run_fallback(llm):
+    result = llm("run", "--fallback", "openai/no-such-model,ollama/bench-model", "hi")
+    assert result.returncode == 0, result.stderr
+    assert ANSWER in result.stdout
+
+
+def test_run_chat(llm):
+    # Bare `llm run`: pick the first provider and its first model, ask one question, then EOF
+    result = llm("run", input="\n\nhello\n")
+    assert result.returncode == 0, result.stderr
+    assert "quick" in result.stdout
+
+
+def test_run_chat_with_model(llm):
+    result = llm("run", "ollama/bench-model", input="hello\n")
+    assert result.returncode == 0, result.stderr
+    assert "quick" in result.stdout
+
+
+def test_batch(llm, tmp_path):
+    prompts = tmp_path / "prompts.jsonl"
+    prompts.write_text('{"prompt": "hi"}\n"hello"\n{"messages": [{"role": "user", "content": "hey"}]}\n')
+    output = tmp_path / "results.jsonl"
+
+    result = llm("batch", "ollama/bench-model", "--input", str(prompts), "--output", str(output), "--concurrency", "2")
+    assert result.returncode == 0, result.stderr
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["index"] for record in records] == [0, 1, 2]
+    assert all(record["error"] is None for record in records)
+
+
+def test_warm(llm):
+    result = llm("warm", "ollama/bench-model")
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+def test_warm_remote_provider(llm):
+    result = llm("warm", "openai/bench-model")
+    assert result.returncode == 1
+
+
+def test_serve(llm):
+    # A short directory: Unix socket paths are limited to about 100 characters
+    socket_dir = tempfile.mkdtemp(prefix="promptly-")
+    env = {"PROMPTLY_SOCKET": f"{socket_dir}/daemon.sock"}
+    try:
+        assert llm("serve", "start", **env).returncode == 0
+        try:
+            status = llm("serve", "status", **env)
+            assert status.returncode == 0, status.stderr
+            assert "Running on" in status.stdout
+
+            answer = llm("run", "ollama/bench-model", "hi", **env)
+            assert answer.returncode == 0, answer.stderr
+            assert answer.stdout.startswith(ANSWER)
+            assert "1 requests served" in llm("serve", "status", **env).stdout
+        finally:
+            assert llm("serve", "stop", **env).returncode == 0
+        assert llm("serve", "status", **env).returncode == 1
+    finally:
+        shutil.rmtree(socket_dir, ignore_errors=True)
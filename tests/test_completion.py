@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from files import completion
+from files.completion import WordIndex, load_word_index
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    path = tmp_path / "words.json"
+    monkeypatch.setattr(completion, "WORD_INDEX_PATH", str(path))
+    return path
+
+
+def append_entries(path, *entries):
+    with open(path, "a") as f:
+        for entry in entries:
+            f.write(f"\n# 2025-01-01 00:00:00\n+{entry}\n")
+
+
+def test_word_index_prefix_lookup():
+    index = WordIndex(["Python", "pytest", "program", "pyramid"])
+    index.add_text("the quick python typed")
+    assert index.complete("py") == ["pyramid", "pytest", "Python"]
+    assert index.complete("PROG") == ["program"]
+    assert index.complete("zz") == []
+    # Short words aren't worth completing
+    assert "the" not in index.words()
+
+
+def test_word_index_bulk_update():
+    words = [f"word{i:04d}" for i in range(completion.BULK_INSERT_THRESHOLD * 3)]
+    index = WordIndex(reversed(words))
+    assert index.words() == words
+    assert index.complete("word000") == words[:10]
+
+
+def test_load_reads_only_appended_entries(tmp_path, index_path, monkeypatch):
+    history = tmp_path / "chat.history"
+    append_entries(history, "hello everyone")
+    index = load_word_index(str(history))
+    assert index.words() == ["everyone", "hello"]
+    assert index.offset == os.path.getsize(history)
+
+    append_entries(history, "goodbye friends")
+    # Bytes before the saved offset must not be read again
+    read = []
+    read_history_words = completion.read_history_words
+
+    def spy(history_file, offset):
+        read.append(offset)
+        return read_history_words(history_file, offset)
+
+    monkeypatch.setattr(completion, "read_history_words", spy)
+    index = load_word_index(str(history))
+    assert sorted(index.words()) == ["everyone", "friends", "goodbye", "hello"]
+    assert read[0] > 0
+
+
+def test_load_rebuilds_when_the_history_is_replaced(tmp_path, index_path):
+    history = tmp_path / "chat.history"
+    append_entries(history, "forgotten words", "more forgotten words")
+    load_word_index(str(history))
+
+    # Compaction writes a new file (new inode) in place of the old one
+    replacement = tmp_path / "new.history"
+    append_entries(replacement, "remaining")
+    os.replace(replacement, history)
+
+    assert load_word_index(str(history)).words() == ["remaining"]
+
+
+def test_load_rebuilds_when_the_history_shrinks(tmp_path, index_path):
+    history = tmp_path / "chat.history"
+    append_entries(history, "forgotten words", "more forgotten words")
+    load_word_index(str(history))
+
+    with open(history, "r+") as f:
+        f.truncate(0)
+    append_entries(history, "kept")
+
+    assert load_word_index(str(history)).words() == ["kept"]
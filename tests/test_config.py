@@ -0,0 +1,67 @@
+import pytest
+
+from files import config
+from files.config import atomic_write, get_env_number
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / "cache" / "data.json"
+    with atomic_write(str(path)) as f:
+        f.write("first")
+    with atomic_write(str(path)) as f:
+        f.write("second")
+    assert path.read_text() == "second"
+    assert [p.name for p in path.parent.iterdir()] == ["data.json"]
+
+
+def test_atomic_write_failure_leaves_the_file_alone(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("previous")
+    with pytest.raises(TypeError):
+        with atomic_write(str(path)) as f:
+            f.write("partial")
+            raise TypeError("not serializable")
+    assert path.read_text() == "previous"
+    assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+def test_get_env_number(monkeypatch):
+    monkeypatch.setenv("PROMPTLY_TEST_NUMBER", "2.5")
+    assert get_env_number("PROMPTLY_TEST_NUMBER", 1) == 2.5
+    monkeypatch.setenv("PROMPTLY_TEST_NUMBER", "lots")
+    assert get_env_number("PROMPTLY_TEST_NUMBER", 1) == 1
+    monkeypatch.delenv("PROMPTLY_TEST_NUMBER")
+    assert get_env_number("PROMPTLY_TEST_NUMBER", 1) == 1
+
+
+class RecordingEnviron(dict):
+    """os.environ stand-in remembering the keys removed from it"""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.removed = []
+
+    def pop(self, key, *default):
+        self.removed.append(key)
+        return super().pop(key, *default)
+
+    def __delitem__(self, key):
+        self.removed.append(key)
+        super().__delitem__(key)
+
+
+def test_refresh_environment_only_touches_changes(tmp_path, monkeypatch):
+    env_file = tmp_path / ".env"
+    env_file.write_text("OPENAI_API_KEY=same\nGEMINI_API_KEY=new\nOLLAMA_ADDR=http://box:11434\n")
+    monkeypatch.setattr(config, "ENV_FILE_PATH", str(env_file))
+    environ = RecordingEnviron({"OPENAI_API_KEY": "same", "GEMINI_API_KEY": "old",
+                                "MISTRAL_API_KEY": "deleted", "PATH": "/bin"})
+    monkeypatch.setattr(config.os, "environ", environ)
+    monkeypatch.setattr(config, "invalidate_stale_clients", lambda: None)
+
+    config.refresh_environment()
+
+    assert environ == {"OPENAI_API_KEY": "same", "GEMINI_API_KEY": "new",
+                       "OLLAMA_ADDR": "http://box:11434", "PATH": "/bin"}
+    # Keys still in the file are never missing, even for a moment
+    assert environ.removed == ["MISTRAL_API_KEY"]
@@ -0,0 +1,52 @@
+from files.conversation import Conversation, INTERRUPTED_MARKER, MESSAGE_OVERHEAD_TOKENS
+from files.tokens import estimate_tokens
+
+# 40 characters: 10 tokens, plus the per-message overhead
+TEXT = "x" * 40
+MESSAGE_TOKENS = estimate_tokens(TEXT) + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_window_keeps_everything_within_budget():
+    conversation = Conversation(budget=1000)
+    conversation.add_exchange("first", "answer")
+    conversation.add_exchange("second", "answer")
+    assert [message["content"] for message in conversation.window("third")] == ["first", "answer", "second", "answer"]
+    assert conversation.dropped == 0
+
+
+def test_window_drops_the_oldest_exchanges():
+    # Room for two exchanges next to the prompt
+    conversation = Conversation(budget=5 * MESSAGE_TOKENS)
+    for i in range(4):
+        conversation.add_exchange(f"{i}{TEXT[1:]}", TEXT)
+
+    window = conversation.window(TEXT)
+    assert [message["content"][0] for message in window[::2]] == ["2", "3"]
+    assert conversation.dropped == 4
+    assert conversation.tokens == 4 * MESSAGE_TOKENS
+
+
+def test_window_never_starts_with_an_answer():
+    conversation = Conversation(budget=4 * MESSAGE_TOKENS)
+    conversation.add("user", TEXT)
+    conversation.add("assistant", TEXT)
+    conversation.add("assistant", TEXT)
+    conversation.add("user", TEXT)
+    conversation.add("assistant", TEXT)
+
+    window = conversation.window(TEXT)
+    assert window[0]["role"] == "user"
+    assert len(window) == 2
+
+
+def test_window_with_a_prompt_larger_than_the_budget():
+    conversation = Conversation(budget=2 * MESSAGE_TOKENS)
+    conversation.add_exchange(TEXT, TEXT)
+    assert conversation.window(TEXT * 10) == []
+    assert conversation.tokens == 0
+
+
+def test_interrupted_answers_are_marked():
+    conversation = Conversation(budget=1000)
+    conversation.add_exchange("question", "partial", interrupted=True)
+    assert conversation.window("next")[1]["content"] == "partial" + INTERRUPTED_MARKER
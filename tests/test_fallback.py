@@ -0,0 +1,47 @@
+"""`llm run --fallback`: hedged requests, losers cancelled without hurting the winner"""
+import pytest
+
+from conftest import MODELS, FakeConfig, start_server
+
+# Answer length and pace of the slow servers: the hedge deadline passes before
+# the first token, and the winner is still streaming when the loser is cancelled
+TOKENS = 30
+
+
+@pytest.fixture(scope="module")
+def servers():
+    """Overrides the conftest servers with ones slow to answer"""
+    config = FakeConfig(MODELS, tokens=TOKENS, token_rate=30, latency=0.5)
+    started = {protocol: start_server(protocol, config) for protocol in ("openai", "gemini", "ollama")}
+    yield {protocol: f"http://127.0.0.1:{server.server_address[1]}" for protocol, server in started.items()}
+    for server in started.values():
+        server.shutdown()
+
+
+@pytest.mark.parametrize("provider, prefix", [("openai", ""), ("gemini", "models/"), ("ollama", "")])
+def test_hedge_on_one_provider(llm, provider, prefix):
+    # Both targets share the provider's pooled client: cancelling the second
+    # one must only close its own stream
+    targets = f"{provider}/{prefix}bench-model,{provider}/{prefix}bench-model-1"
+    result = llm("run", "--fallback", targets, "hi", PROMPTLY_FALLBACK_DEADLINE="0.1")
+
+    assert result.returncode == 0, result.stderr
+    assert f"also asking {provider}/{prefix}bench-model-1" in result.stderr
+    # Every token of the winning answer arrived (ten words per sentence)
+    assert result.stdout.count("jumps") == TOKENS // 10
+    assert result.stdout.endswith("dog.\n\n")
+
+
+@pytest.mark.parametrize("targets", [",", ",,", " , "])
+def test_fallback_without_targets(llm, targets):
+    result = llm("run", "--fallback", targets, "hi")
+    assert result.returncode == 1
+    assert "Invalid format" in result.stderr
+    assert "Traceback" not in result.stderr
+
+
+def test_fallback_trailing_comma(llm):
+    # Empty entries are skipped, a single target is answered as usual
+    result = llm("run", "--fallback", "ollama/bench-model,", "hi")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.count("jumps") == TOKENS // 10
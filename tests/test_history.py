@@ -0,0 +1,63 @@
+import time
+
+from files import history
+from files.history import BoundedFileHistory, format_entry, parse_history, read_last_entries
+
+
+def write_entries(path, entries):
+    with open(path, "wb") as f:
+        for entry in entries:
+            f.write(format_entry(entry))
+
+
+def test_parse_history_multiline_entries():
+    data = format_entry("one") + format_entry("two\nlines") + format_entry("three")
+    assert parse_history(data) == ["one", "two\nlines", "three"]
+
+
+def test_read_last_entries(tmp_path, monkeypatch):
+    # Small blocks: the backwards read has to stitch entries across them
+    monkeypatch.setattr(history, "READ_BLOCK_SIZE", 16)
+    path = tmp_path / "chat.history"
+    entries = [f"entry {i}\nsecond line" for i in range(50)]
+    write_entries(path, entries)
+
+    last, total = read_last_entries(str(path), 3)
+    assert last == entries[-3:]
+    assert total is None
+
+    everything, total = read_last_entries(str(path), 100)
+    assert everything == entries
+    assert total == 50
+
+
+def test_read_last_entries_empty_file(tmp_path):
+    path = tmp_path / "chat.history"
+    path.write_bytes(b"")
+    assert read_last_entries(str(path), 5) == ([], 0)
+
+
+def test_load_only_keeps_the_newest(tmp_path):
+    path = tmp_path / "chat.history"
+    write_entries(path, [f"entry {i}" for i in range(10)])
+    bounded = BoundedFileHistory(str(path), max_entries=3)
+    # Newest first, as prompt_toolkit expects
+    assert list(bounded.load_history_strings()) == ["entry 9", "entry 8", "entry 7"]
+
+
+def test_compaction(tmp_path):
+    path = tmp_path / "chat.history"
+    write_entries(path, [f"old {i}" for i in range(4)])
+    bounded = BoundedFileHistory(str(path), max_entries=3)
+    list(bounded.load_history_strings())
+
+    for i in range(3):
+        bounded.store_string(f"new {i}")
+    # Seven entries is more than twice the three kept: compacted in the background
+    deadline = time.monotonic() + 5
+    while bounded._compacting or len(parse_history(path.read_bytes())) > 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    assert parse_history(path.read_bytes()) == ["new 0", "new 1", "new 2"]
+    assert [p.name for p in tmp_path.iterdir()] == ["chat.history"]
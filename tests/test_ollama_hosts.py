@@ -0,0 +1,143 @@
+import pytest
+
+from files import catalog, ollama_hosts
+from files.ollama_hosts import Host, rank_hosts
+
+
+class ConnectError(Exception):
+    pass
+
+
+class ResponseError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ollama_hosts.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def new_process(tmp_path, monkeypatch):
+    """Catalog in a temporary directory; calling the fixture forgets the servers, like a new process"""
+    monkeypatch.setattr(catalog, "CATALOG_PATH", str(tmp_path / "models.json"))
+    monkeypatch.setenv("OLLAMA_ADDR", "http://a:11434,http://b:11434")
+
+    def start():
+        monkeypatch.setattr(ollama_hosts, "_hosts", {})
+    start()
+    return start
+
+
+def host(addr, models=None, latency=None, in_flight=0):
+    result = Host(addr)
+    if models is not None:
+        result.set_models(models)
+    result.latency = latency
+    result.in_flight = in_flight
+    return result
+
+
+def addrs(hosts):
+    return [h.addr for h in hosts]
+
+
+def test_rank_prefers_hosts_with_the_model():
+    hosts = [host("a", ["other"]), host("b", ["llama3"]), host("c")]
+    # "c" hasn't been listed yet: it may have it
+    assert sorted(addrs(rank_hosts(hosts, "llama3"))) == ["b", "c"]
+    hosts[1].missing.add("llama3")
+    assert addrs(rank_hosts(hosts, "llama3")) == ["c"]
+
+
+def test_rank_falls_back_to_every_host():
+    hosts = [host("a", ["other"]), host("b", ["other"])]
+    assert sorted(addrs(rank_hosts(hosts, "llama3"))) == ["a", "b"]
+
+
+def test_rank_by_latency_and_load():
+    fast, slow = host("fast", latency=0.1), host("slow", latency=0.5)
+    assert addrs(rank_hosts([slow, fast], "llama3")) == ["fast", "slow"]
+    # Five requests in flight make the fast one the slower choice
+    fast.in_flight = 5
+    assert addrs(rank_hosts([slow, fast], "llama3")) == ["slow", "fast"]
+
+
+def test_record_failure_ejects_after_repeated_errors(clock, monkeypatch):
+    monkeypatch.delenv("PROMPTLY_OLLAMA_EJECT_AFTER", raising=False)
+    monkeypatch.delenv("PROMPTLY_OLLAMA_EJECT_SECONDS", raising=False)
+    flaky, healthy = host("flaky"), host("healthy", latency=1.0)
+    flaky.latency = 0.1
+
+    # A missing model says nothing about the server's health
+    assert not flaky.record_failure(ResponseError(404))
+    assert not flaky.record_failure(ConnectError())
+    assert flaky.record_failure(ConnectError())
+    assert flaky.is_ejected()
+    assert flaky.ejected_until == clock[0] + ollama_hosts.DEFAULT_EJECT_SECONDS
+
+    # Ejected servers come last, whatever their latency
+    assert addrs(rank_hosts([flaky, healthy], "llama3")) == ["healthy", "flaky"]
+
+    # A success brings it back
+    flaky.record_success(0.1)
+    assert not flaky.is_ejected()
+    assert addrs(rank_hosts([flaky, healthy], "llama3")) == ["flaky", "healthy"]
+
+
+def test_latency_moving_average():
+    h = host("a")
+    h.record_success(1.0)
+    h.record_success(2.0)
+    assert h.latency == pytest.approx(1.0 + ollama_hosts.LATENCY_SMOOTHING)
+
+
+def test_saved_states_route_the_next_process(new_process):
+    a, b = ollama_hosts.get_hosts(["http://a:11434", "http://b:11434"])
+    a.set_models(["other"])
+    b.set_models(["llama3"])
+    ollama_hosts.save_states([a, b])
+    # A new model list doesn't lose them
+    catalog.save_models("ollama", ollama_hosts.get_states_source(), ["other", "llama3"])
+
+    new_process()
+    hosts = ollama_hosts.get_hosts(["http://a:11434", "http://b:11434"])
+    assert hosts[1].models == {"llama3"}
+    assert addrs(rank_hosts(hosts, "llama3")) == ["http://b:11434"]
+
+
+def test_saved_ejection_outlives_the_process(new_process, monkeypatch):
+    monkeypatch.delenv("PROMPTLY_OLLAMA_EJECT_AFTER", raising=False)
+    monkeypatch.delenv("PROMPTLY_OLLAMA_EJECT_SECONDS", raising=False)
+    a, b = ollama_hosts.get_hosts(["http://a:11434", "http://b:11434"])
+    # One failure per process still adds up to an ejection
+    assert not a.record_failure(ConnectError())
+    ollama_hosts.save_states([a])
+    new_process()
+    a, b = ollama_hosts.get_hosts(["http://a:11434", "http://b:11434"])
+    assert a.record_failure(ConnectError())
+    ollama_hosts.save_states([a])
+
+    # Monotonic clocks differ between processes, the time out doesn't
+    clock = [5.0]
+    monkeypatch.setattr(ollama_hosts.time, "monotonic", lambda: clock[0])
+    new_process()
+    a, b = ollama_hosts.get_hosts(["http://a:11434", "http://b:11434"])
+    assert a.is_ejected()
+    assert a.ejected_until - clock[0] == pytest.approx(ollama_hosts.DEFAULT_EJECT_SECONDS, abs=1)
+    assert addrs(rank_hosts([a, b], "llama3")) == ["http://b:11434", "http://a:11434"]
+
+
+def test_states_belong_to_the_configuration(new_process, monkeypatch):
+    a, = ollama_hosts.get_hosts(["http://a:11434"])
+    a.set_models(["llama3"])
+    ollama_hosts.save_states([a])
+
+    monkeypatch.setenv("OLLAMA_ADDR", "http://a:11434")
+    new_process()
+    a, = ollama_hosts.get_hosts(["http://a:11434"])
+    assert a.models is None
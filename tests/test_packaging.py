@@ -0,0 +1,43 @@
+"""The PyInstaller hook must list every provider module and SDK imported by name"""
+import ast
+import os
+import sys
+
+from conftest import ROOT_DIR
+from files.providers import BUILTIN_PROVIDERS
+
+SRCS_DIR = os.path.join(ROOT_DIR, "srcs")
+HOOK = os.path.join(ROOT_DIR, "scripts", "pyinstaller_hooks", "hook-files.providers.py")
+
+
+def hook_lists():
+    """BACKENDS and SDKS of the hook, read without importing PyInstaller"""
+    lists = {}
+    for node in ast.parse(open(HOOK).read()).body:
+        if isinstance(node, ast.Assign) and node.targets[0].id in ("BACKENDS", "SDKS"):
+            lists[node.targets[0].id] = ast.literal_eval(node.value)
+    return lists["BACKENDS"], lists["SDKS"]
+
+
+def module_level_imports(module):
+    """Third-party modules imported at the top of a files.* module"""
+    path = os.path.join(SRCS_DIR, *module.split(".")) + ".py"
+    imported = []
+    for node in ast.parse(open(path).read()).body:
+        if isinstance(node, ast.Import):
+            imported += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            imported += [f"{node.module}.{alias.name}" for alias in node.names]
+    return [name for name in imported if name.split(".")[0] not in sys.stdlib_module_names]
+
+
+def test_hook_lists_every_builtin_provider():
+    backends, _ = hook_lists()
+    assert sorted(backends) == sorted({target.split(":")[0] for target in BUILTIN_PROVIDERS.values()})
+
+
+def test_hook_collects_every_provider_sdk():
+    backends, sdks = hook_lists()
+    for backend in backends:
+        for name in module_level_imports(backend):
+            assert any(name == sdk or name.startswith(sdk + ".") for sdk in sdks), f"{backend} imports {name}"
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from files import resilience
+from files.resilience import (CircuitBreaker, CircuitOpenError, classify_error, get_retry_after,
+                              resilient_stream, retry_delay, ERROR_AUTH, ERROR_CONNECTION,
+                              ERROR_RATE_LIMIT, ERROR_SERVER, ERROR_TIMEOUT)
+
+
+class Response:
+    def __init__(self, status_code=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class APIError(Exception):
+    def __init__(self, status_code=None, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = Response(status_code, headers)
+
+
+class ConnectTimeout(Exception):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    # Retries happen right away
+    monkeypatch.setattr(resilience.time, "sleep", lambda seconds: None)
+
+
+def test_classify_error():
+    assert classify_error(APIError(429)) == ERROR_RATE_LIMIT
+    assert classify_error(APIError(502)) == ERROR_SERVER
+    assert classify_error(APIError(401)) == ERROR_AUTH
+    assert classify_error(ConnectTimeout()) == ERROR_TIMEOUT
+    assert classify_error(ConnectionError()) == ERROR_CONNECTION
+
+
+def test_get_retry_after():
+    assert get_retry_after(APIError(429, {"retry-after": "2"})) == 2
+    assert get_retry_after(APIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert get_retry_after(APIError(429, {"retry-after": "soon"})) is None
+    assert get_retry_after(APIError(429)) is None
+
+
+def test_retry_delay_backoff(monkeypatch):
+    monkeypatch.delenv("PROMPTLY_MAX_RETRIES", raising=False)
+    error = APIError(502)
+    for attempt in range(resilience.DEFAULT_MAX_RETRIES):
+        delay = retry_delay(error, ERROR_SERVER, attempt)
+        assert 0 <= delay <= min(resilience.RETRY_MAX_DELAY, resilience.RETRY_BASE_DELAY * 2 ** attempt)
+    assert retry_delay(error, ERROR_SERVER, resilience.DEFAULT_MAX_RETRIES) is None
+    assert retry_delay(APIError(401), ERROR_AUTH, 0) is None
+
+
+def test_retry_delay_honors_retry_after(monkeypatch):
+    monkeypatch.setenv("PROMPTLY_RETRY_MAX_WAIT", "10")
+    assert retry_delay(APIError(429, {"retry-after": "3"}), ERROR_RATE_LIMIT, 0) == 3
+    # Longer than we are willing to wait: fail now
+    assert retry_delay(APIError(429, {"retry-after": "60"}), ERROR_RATE_LIMIT, 0) is None
+
+
+def test_circuit_breaker_half_open(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("fake", threshold=2, cooldown=30)
+
+    breaker.record_failure(ERROR_AUTH)
+    breaker.record_failure(ERROR_SERVER)
+    breaker.before_call()
+    breaker.record_failure(ERROR_SERVER)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # After the cooldown one call goes through, and a single failure reopens the circuit
+    now[0] += 31
+    breaker.before_call()
+    breaker.record_failure(ERROR_SERVER)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    # A success closes it
+    now[0] += 31
+    breaker.before_call()
+    breaker.record_success()
+    breaker.record_failure(ERROR_SERVER)
+    breaker.before_call()
+
+
+def failing_stream(tokens, error):
+    yield from tokens
+    raise error
+
+
+def test_retries_until_the_first_token():
+    attempts = []
+
+    def open_stream():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            return failing_stream([], APIError(503))
+        return iter(["Hello", " world"])
+
+    assert list(resilient_stream("fake", open_stream)) == ["Hello", " world"]
+    assert len(attempts) == 3
+
+
+def test_no_retry_after_the_first_token():
+    attempts = []
+
+    def open_stream():
+        attempts.append(1)
+        return failing_stream(["Hello"], APIError(503))
+
+    received = []
+    with pytest.raises(APIError):
+        for content in resilient_stream("fake", open_stream):
+            received.append(content)
+    # The text already shown is never sent twice
+    assert received == ["Hello"]
+    assert len(attempts) == 1
+
+
+def test_no_retry_for_request_errors():
+    attempts = []
+
+    def open_stream():
+        attempts.append(1)
+        return failing_stream([], APIError(400))
+
+    with pytest.raises(APIError):
+        list(resilient_stream("fake", open_stream))
+    assert len(attempts) == 1